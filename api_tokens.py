@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Per-client API tokens for the DNS Update Service.
+
+Tokens live in a JSON file as SHA-256 digests (tokens are random, so a
+fast hash is enough), each with scopes ('update', 'read', 'admin'), an
+optional list of domains and a revoked flag. The file is reloaded automatically
+when it changes; a reload builds a new digest -> token dict and swaps it
+in with a single assignment, so lookups never see a half-loaded store.
+
+Usage:
+  python api_tokens.py add router-home --scopes update --domains home.example.com
+  python api_tokens.py revoke router-home
+  python api_tokens.py list
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import secrets
+import sys
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ('update', 'read', 'admin')
+TOKEN_PREFIX = 'dnsu_'
+
+
+def generate_token():
+    """Generate a new random token."""
+    return TOKEN_PREFIX + secrets.token_urlsafe(32)
+
+
+def token_digest(token):
+    """Digest under which a token is stored."""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class ApiToken:
+    """A token's identity and permissions."""
+
+    __slots__ = ('id', 'scopes', 'domains', 'revoked')
+
+    def __init__(self, token_id, scopes, domains=(), revoked=False):
+        self.id = token_id
+        self.scopes = frozenset(scopes)
+        self.domains = frozenset(d.rstrip('.').lower() for d in domains)
+        self.revoked = revoked
+
+    def allows(self, scope, domain=None):
+        """Check whether the token grants `scope` (for `domain`, if it is domain-scoped)."""
+        if self.revoked or scope not in self.scopes:
+            return False
+        if self.domains and scope == 'update':
+            return bool(domain) and domain.rstrip('.').lower() in self.domains
+        return True
+
+
+def parse_tokens(document):
+    """
+    Build the digest -> ApiToken dict from a token file document.
+    Raises ValueError if the document is invalid.
+    """
+    if not isinstance(document, dict) or not isinstance(document.get('tokens'), list):
+        raise ValueError("Token file must be an object with a 'tokens' list")
+    by_digest = {}
+    ids = set()
+    for index, item in enumerate(document['tokens']):
+        try:
+            token_id = item['id']
+            digest = item['digest']
+            scopes = item.get('scopes', ['update'])
+        except (KeyError, TypeError):
+            raise ValueError(f"Token #{index} needs 'id' and 'digest'")
+        unknown = set(scopes) - set(SCOPES)
+        if unknown:
+            raise ValueError(f"Token '{token_id}' has unknown scopes: {', '.join(sorted(unknown))}")
+        if token_id in ids or digest in by_digest:
+            raise ValueError(f"Duplicate token '{token_id}'")
+        ids.add(token_id)
+        by_digest[digest] = ApiToken(token_id, scopes, item.get('domains', []), bool(item.get('revoked', False)))
+    return by_digest
+
+
+class TokenStore:
+    """
+    Token lookup backed by a JSON file, reloaded when the file changes.
+    The file is checked at most every `check_interval` seconds.
+    """
+
+    def __init__(self, path=None, check_interval=5, clock=time.monotonic):
+        self.path = path
+        self.check_interval = check_interval
+        self._clock = clock
+        self._by_digest = {}
+        self._file_state = None
+        self._next_check = 0
+        self._lock = threading.Lock()
+        self.loaded_at = None
+        self.last_error = None
+
+    def __len__(self):
+        return len(self._by_digest)
+
+    def _stat(self):
+        stat = os.stat(self.path)
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def load(self):
+        """
+        Load the token file now. A missing file leaves no valid tokens (so
+        deleting it revokes them all); on any other error the previous
+        tokens are kept. Returns True if the file was loaded.
+        """
+        with self._lock:
+            try:
+                state = self._stat()
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    by_digest = parse_tokens(json.load(f))
+            except FileNotFoundError as e:
+                self._by_digest = {}
+                self._file_state = None
+                self.last_error = str(e)
+                logger.warning(f"API token file {self.path} is missing; no API tokens are valid")
+                return False
+            except (OSError, ValueError) as e:
+                self.last_error = str(e)
+                logger.error(f"Failed to load API tokens from {self.path}: {e}")
+                return False
+            # Single reference swap: concurrent lookups see the old or the new dict
+            self._by_digest = by_digest
+            self._file_state = state
+            self.loaded_at = time.time()
+            self.last_error = None
+            logger.info(f"Loaded {len(by_digest)} API tokens from {self.path}")
+            return True
+
+    def reload_if_changed(self):
+        """Reload the token file if it changed since the last load."""
+        if not self.path:
+            return
+        now = self._clock()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            state = self._stat()
+        except OSError:
+            state = None
+        if state != self._file_state:
+            self.load()
+
+    def authenticate(self, token):
+        """Get the ApiToken for a presented token, or None if unknown or revoked."""
+        self.reload_if_changed()
+        if not token or not token.startswith(TOKEN_PREFIX):
+            return None
+        api_token = self._by_digest.get(token_digest(token))
+        if api_token is None or api_token.revoked:
+            return None
+        return api_token
+
+    def stats(self):
+        tokens = list(self._by_digest.values())
+        return {
+            'tokens': len(tokens),
+            'revoked': sum(1 for t in tokens if t.revoked),
+            'loaded_at': self.loaded_at,
+            'last_error': self.last_error,
+        }
+
+
+def read_token_file(path):
+    if not os.path.exists(path):
+        return {'tokens': []}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_token_file(path, document):
+    """Write the token file atomically (the service never sees a partial file)."""
+    parse_tokens(document)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.api_tokens_', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+            f.write('\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Manage DNS Update Service API tokens')
+    parser.add_argument('--file', default=os.environ.get('API_TOKENS_FILE') or 'api_tokens.json',
+                        help='Token file (default: $API_TOKENS_FILE or api_tokens.json)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    add = subparsers.add_parser('add', help='Create a token and print it')
+    add.add_argument('id')
+    add.add_argument('--scopes', default='update', help=f"Comma-separated scopes ({', '.join(SCOPES)})")
+    add.add_argument('--domains', default='', help='Comma-separated domains the token may update (default: any)')
+    revoke = subparsers.add_parser('revoke', help='Revoke a token')
+    revoke.add_argument('id')
+    subparsers.add_parser('list', help='List tokens')
+    args = parser.parse_args()
+
+    try:
+        document = read_token_file(args.file)
+        if args.command == 'add':
+            if any(item['id'] == args.id for item in document['tokens']):
+                raise ValueError(f"Token '{args.id}' already exists")
+            token = generate_token()
+            document['tokens'].append({
+                'id': args.id,
+                'digest': token_digest(token),
+                'scopes': [s for s in args.scopes.split(',') if s],
+                'domains': [d for d in args.domains.split(',') if d],
+                'revoked': False,
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            })
+            write_token_file(args.file, document)
+            print(f"✅ Token '{args.id}' created. It is shown only once:", file=sys.stderr)
+            print(token)
+        elif args.command == 'revoke':
+            matches = [item for item in document['tokens'] if item['id'] == args.id]
+            if not matches:
+                raise ValueError(f"Token '{args.id}' not found")
+            matches[0]['revoked'] = True
+            write_token_file(args.file, document)
+            print(f"✅ Token '{args.id}' revoked")
+        else:
+            for item in document['tokens']:
+                status = 'revoked' if item.get('revoked') else 'active'
+                domains = ','.join(item.get('domains', [])) or '*'
+                print(f"{item['id']:<24} {status:<8} {','.join(item.get('scopes', [])):<14} {domains}")
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
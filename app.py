@@ -1,13 +1,32 @@
-from flask import Flask, request, jsonify, render_template, make_response, session, redirect
-import boto3
+from flask import Flask, request, jsonify, render_template, make_response, session, redirect, g, has_request_context
 import os
 import sys
-from botocore.exceptions import ClientError
+import signal
+import threading
+import time
 import logging
 import re
 import json
 from datetime import datetime, timedelta, timezone
-from config import Config
+from urllib.parse import parse_qs, urlsplit
+import config as config_module
+from config import Config, load_config
+from rate_limit import RateLimiter, retry_after_seconds
+from route53_scheduler import Route53Scheduler, RETRYABLE_ERROR_CODES, get_error_code, is_aws_client_error
+from aws_credentials import CredentialRefresher, assume_role_fetcher, provider_chain_fetcher
+from metrics import Registry, Counter, Gauge, Histogram, LogFileStats, IO_BUCKETS, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from profiling import StageTimer, SamplingProfiler
+from password_hash import PasswordVerifier, is_password_hash
+from api_tokens import TokenStore
+from health import HealthProbes, ProbeError
+from drift import DriftReconciler, get_desired_state
+from log_writer import get_writer
+from compact_log import get_compact_writer, is_compact_log, read_compact_log
+from log_scan import read_matching, search_prefilter, status_prefilter, SEARCH_FIELDS
+from log_entry import LogEntry, gc_paused
+from log_columns import LogColumns, datetime_micros
+from record_state import RecordState
+from log_dedup import RepeatedErrors
 import hashlib
 import hmac
 
@@ -18,15 +37,389 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.secret_key = Config.FLASK_SECRET_KEY
 
-# Validate AWS configuration on startup
-try:
-    Config.validate_aws_config()
-    # AWS Route53 client
-    route53_client = boto3.client('route53')
-    logger.info("AWS Route53 client initialized successfully")
-except ValueError as e:
-    logger.error(f"AWS configuration error: {e}")
-    route53_client = None
+def get_config():
+    """
+    Get the configuration snapshot to use.
+    A request keeps the snapshot it first read for its whole lifetime, so a
+    reload while it is in flight does not change settings under its feet.
+    """
+    if not has_request_context():
+        return Config
+    config = g.get('config')
+    if config is None:
+        config = g.config = Config
+    return config
+
+# Settings that are only read at startup; changing them needs a restart
+RESTART_REQUIRED_PREFIXES = ('AWS_', 'ROUTE53_', 'FLASK_', 'ASYNC_', 'RATE_LIMIT_', 'METRICS_', 'LOG_LEVEL',
+                             'AUTH_CACHE_', 'HEALTH_PROBE_', 'DRIFT_', 'LOG_FORMAT', 'ERROR_LOG_')
+_config_reload_lock = threading.Lock()
+
+def get_settings(config):
+    """Get the plain settings of a Config class as a dict."""
+    return {name: value for name, value in vars(config).items() if name.isupper()}
+
+def reload_config():
+    """
+    Re-read the environment and CONFIG_FILE, validate and compile the new
+    configuration and swap it in. New requests use the new configuration;
+    in-flight requests finish on the one they started with.
+    Returns (changed, restart_required) setting names. Raises ValueError if
+    the new configuration is invalid, leaving the running one untouched.
+    """
+    global Config, api_token_store
+    
+    with _config_reload_lock:
+        new_config = load_config()
+        if new_config.AUTH_PASSWORD_HASH and not is_password_hash(new_config.AUTH_PASSWORD_HASH):
+            raise ValueError("AUTH_PASSWORD_HASH is not a hash from password_hash.py")
+        
+        token_store = api_token_store
+        if (new_config.API_TOKENS_FILE, new_config.API_TOKENS_CHECK_INTERVAL) != \
+                (Config.API_TOKENS_FILE, Config.API_TOKENS_CHECK_INTERVAL):
+            token_store = TokenStore(new_config.API_TOKENS_FILE, check_interval=new_config.API_TOKENS_CHECK_INTERVAL)
+            if new_config.API_TOKENS_FILE and not token_store.load():
+                raise ValueError(f"Invalid API token file: {token_store.last_error}")
+        
+        old_settings = get_settings(Config)
+        changed = sorted(name for name, value in get_settings(new_config).items()
+                         if old_settings.get(name) != value)
+        restart_required = [name for name in changed if name.startswith(RESTART_REQUIRED_PREFIXES)]
+        
+        # Each swap is a single reference assignment
+        api_token_store = token_store
+        Config = config_module.Config = new_config
+        request_profiler.configure(sample_rate=new_config.PROFILE_SAMPLE_RATE, directory=new_config.PROFILE_DIR)
+    
+    logger.info(f"Configuration reloaded. Changed: {', '.join(changed) or 'nothing'}")
+    if restart_required:
+        logger.warning(f"These settings only take effect after a restart: {', '.join(restart_required)}")
+    return changed, restart_required
+
+def reload_config_in_background():
+    """Reload the configuration, logging (not raising) errors."""
+    try:
+        reload_config()
+    except ValueError as e:
+        logger.error(f"Configuration reload rejected, keeping the current configuration: {e}")
+
+def install_reload_signal_handler():
+    """
+    Reload the configuration on SIGHUP. Must be called from the main thread.
+    The reload runs in its own thread so the handler never blocks the server.
+    """
+    def handle_sighup(signum, frame):
+        threading.Thread(target=reload_config_in_background, name='config-reload', daemon=True).start()
+    
+    signal.signal(signal.SIGHUP, handle_sighup)
+
+def install_shutdown_signal_handler():
+    """Write the repeated failures counted so far on SIGTERM. Must be called from the main thread."""
+    repeated_errors.install_signal_handler(signal.SIGTERM)
+
+def create_credential_refresher():
+    """
+    Create the background refresher for role-based credentials (EC2/ECS role,
+    AWS CLI configuration or AWS_ROLE_ARN) and fetch the first set.
+    """
+    import botocore.session
+    
+    base_session = botocore.session.get_session()
+    if Config.AWS_ROLE_ARN:
+        fetch = assume_role_fetcher(base_session, Config.AWS_ROLE_ARN,
+                                    Config.AWS_ROLE_SESSION_NAME, Config.AWS_ROLE_DURATION)
+    else:
+        fetch = provider_chain_fetcher(base_session)
+    
+    refresher = CredentialRefresher(
+        fetch,
+        refresh_margin=Config.AWS_CREDENTIAL_REFRESH_MARGIN,
+        check_interval=Config.AWS_CREDENTIAL_CHECK_INTERVAL
+    )
+    refresher.refresh()
+    return refresher
+
+def create_route53_client(credentials=None):
+    """
+    Create the Route53 client with tuned connection settings.
+    boto3 is imported here rather than at module level because importing it
+    costs hundreds of milliseconds that startup and /health should not pay.
+    If a botocore credentials object is given it is used instead of the
+    default credential chain.
+    """
+    import boto3
+    import botocore.session
+    from botocore.config import Config as BotocoreConfig
+    
+    client_config = BotocoreConfig(
+        connect_timeout=Config.ROUTE53_CONNECT_TIMEOUT,
+        read_timeout=Config.ROUTE53_READ_TIMEOUT,
+        max_pool_connections=Config.ROUTE53_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=Config.ROUTE53_TCP_KEEPALIVE,
+        retries={
+            'mode': Config.ROUTE53_RETRY_MODE,
+            'total_max_attempts': Config.ROUTE53_MAX_ATTEMPTS
+        }
+    )
+    if credentials is None:
+        return boto3.client('route53', config=client_config, region_name=Config.AWS_REGION,
+                            endpoint_url=Config.ROUTE53_ENDPOINT_URL)
+    
+    botocore_session = botocore.session.get_session()
+    # botocore has no public setter for a pre-built credentials object
+    botocore_session._credentials = credentials
+    return boto3.Session(botocore_session=botocore_session).client(
+        'route53', config=client_config, region_name=Config.AWS_REGION,
+        endpoint_url=Config.ROUTE53_ENDPOINT_URL
+    )
+
+# AWS Route53 client, created on first use by get_route53_client()
+route53_client = None
+credential_refresher = None
+_route53_client_attempted = False
+_route53_client_lock = threading.Lock()
+
+def get_route53_client():
+    """
+    Get the Route53 client, creating it on first use.
+    Returns None if AWS is not configured.
+    """
+    global route53_client, credential_refresher, _route53_client_attempted
+    
+    if route53_client is not None or _route53_client_attempted:
+        return route53_client
+    
+    with _route53_client_lock:
+        if route53_client is None and not _route53_client_attempted:
+            try:
+                Config.validate_aws_config()
+                if Config.uses_static_credentials():
+                    route53_client = create_route53_client()
+                else:
+                    credential_refresher = create_credential_refresher()
+                    route53_client = create_route53_client(credential_refresher.botocore_credentials())
+                    credential_refresher.start()
+                _route53_client_attempted = True
+                logger.info("AWS Route53 client initialized successfully")
+            except ValueError as e:
+                logger.error(f"AWS configuration error: {e}")
+                _route53_client_attempted = True
+            except Exception as e:
+                # Transient credential errors (IMDS/STS unreachable): try again on next use
+                logger.error(f"Failed to obtain AWS credentials: {e}")
+    
+    return route53_client
+
+def get_credential_stats():
+    """
+    Get the AWS credential source, expiry and refresh latency.
+    """
+    if credential_refresher is not None:
+        stats = credential_refresher.stats()
+        stats['source'] = 'assume-role' if Config.AWS_ROLE_ARN else 'provider-chain'
+        return stats
+    if Config.uses_static_credentials():
+        return {'source': 'static'}
+    return {'source': None}
+
+# Shared scheduler for all Route53 API calls (account-wide rate limit + throttling retries)
+route53_scheduler = Route53Scheduler(
+    rate_per_second=Config.ROUTE53_RATE_LIMIT,
+    burst=Config.ROUTE53_BURST,
+    deadline=Config.ROUTE53_RETRY_DEADLINE,
+    max_retries=Config.ROUTE53_MAX_RETRIES
+)
+
+def warm_route53_client():
+    """
+    Make a cheap Route53 call so DNS resolution, the TLS handshake and
+    credential resolution happen before the first real update.
+    Returns True if the connection was established.
+    """
+    client = get_route53_client()
+    if client is None:
+        return False
+    
+    try:
+        route53_scheduler.call(client.get_hosted_zone_count)
+        return True
+    except Exception as e:
+        if is_aws_client_error(e):
+            # An AWS error response (e.g. AccessDenied) still means the connection is warm
+            logger.debug(f"Route53 warm-up call returned an error: {e}")
+            return True
+        logger.warning(f"Route53 warm-up failed: {e}")
+        return False
+
+def keep_route53_warm(interval, stop_event):
+    """
+    Periodically ping Route53 so pooled connections do not go idle.
+    """
+    while not stop_event.wait(interval):
+        warm_route53_client()
+
+def start_route53_warmup():
+    """
+    Create and pre-warm the Route53 client in the background and start the
+    optional keep-warm ping. Returns the event that stops the keep-warm thread.
+    """
+    stop_event = threading.Event()
+    
+    if Config.ROUTE53_PREWARM:
+        threading.Thread(target=warm_route53_client, name='route53-prewarm', daemon=True).start()
+    
+    if Config.ROUTE53_KEEP_WARM_INTERVAL > 0:
+        threading.Thread(target=keep_route53_warm, args=(Config.ROUTE53_KEEP_WARM_INTERVAL, stop_event),
+                         name='route53-keep-warm', daemon=True).start()
+        logger.info(f"Route53 keep-warm ping enabled every {Config.ROUTE53_KEEP_WARM_INTERVAL}s")
+    
+    return stop_event
+
+# AWS error codes meaning the credentials themselves were rejected
+CREDENTIAL_ERROR_CODES = {
+    'InvalidClientTokenId', 'UnrecognizedClientException', 'SignatureDoesNotMatch',
+    'ExpiredToken', 'ExpiredTokenException', 'InvalidAccessKeyId'
+}
+
+def probe_route53():
+    """
+    Check that Route53 answers. Any AWS error response still proves the
+    endpoint is reachable; its code is kept for the credentials probe.
+    """
+    client = get_route53_client()
+    if client is None:
+        raise ProbeError('AWS Route53 client not available')
+    try:
+        route53_scheduler.call(client.get_hosted_zone_count)
+    except Exception as e:
+        if not is_aws_client_error(e):
+            raise ProbeError(f'Route53 unreachable: {e}')
+        return {'reachable': True, 'error_code': get_error_code(e)}
+    return {'reachable': True}
+
+def probe_credentials():
+    """
+    Check that AWS credentials are present, unexpired and accepted by AWS
+    (using the result of the last Route53 probe rather than another call).
+    """
+    if get_route53_client() is None:
+        raise ProbeError('AWS credentials not available')
+    stats = get_credential_stats()
+    expires_in = stats.get('expires_in_seconds')
+    if expires_in is not None and expires_in <= 0:
+        raise ProbeError('AWS credentials have expired')
+    error_code = (health_probes.result('route53') or {}).get('error_code')
+    if error_code in CREDENTIAL_ERROR_CODES:
+        raise ProbeError(f'AWS rejected the credentials ({error_code})')
+    return {'source': stats.get('source'), 'expires_in_seconds': expires_in}
+
+def probe_log_writer():
+    """
+    Check that the DNS update log can be written and the disk has room.
+    Uses access() and statvfs() only; nothing is written or synced.
+    """
+    log_file = os.environ.get('DNS_LOG_FILE', 'dns_updates.log')
+    directory = os.path.dirname(os.path.abspath(log_file))
+    target = log_file if os.path.exists(log_file) else directory
+    if not os.access(target, os.W_OK):
+        raise ProbeError(f'{target} is not writable')
+    stat = os.statvfs(directory)
+    free_mb = stat.f_bavail * stat.f_frsize / (1024 * 1024)
+    if free_mb < Config.HEALTH_MIN_FREE_MB:
+        raise ProbeError(f'Only {free_mb:.0f} MB free in {directory}')
+    return {'path': log_file, 'free_mb': int(free_mb)}
+
+# Dependency probes for /health?deep=1 and /ready, refreshed in the background
+health_probes = HealthProbes(
+    {'route53': probe_route53, 'credentials': probe_credentials, 'log_writer': probe_log_writer},
+    interval=Config.HEALTH_PROBE_INTERVAL
+)
+
+# In-process rate limiters for /update-dns (independent of any nginx limit_req)
+ip_rate_limiter = RateLimiter(Config.RATE_LIMIT_PER_IP, Config.RATE_LIMIT_IP_BURST,
+                              max_keys=Config.RATE_LIMIT_MAX_KEYS)
+credential_rate_limiter = RateLimiter(Config.RATE_LIMIT_PER_CREDENTIAL, Config.RATE_LIMIT_CREDENTIAL_BURST,
+                                      max_keys=Config.RATE_LIMIT_MAX_KEYS)
+# Separate buckets for /check, so polling never spends the budget of the update it leads to
+check_ip_rate_limiter = RateLimiter(Config.RATE_LIMIT_CHECK_PER_IP, Config.RATE_LIMIT_CHECK_IP_BURST,
+                                    max_keys=Config.RATE_LIMIT_MAX_KEYS)
+check_credential_rate_limiter = RateLimiter(Config.RATE_LIMIT_CHECK_PER_CREDENTIAL,
+                                            Config.RATE_LIMIT_CHECK_CREDENTIAL_BURST,
+                                            max_keys=Config.RATE_LIMIT_MAX_KEYS)
+
+# Prometheus metrics (shared across worker processes when METRICS_DIR is set)
+metrics_registry = Registry(Config.METRICS_DIR)
+http_requests_total = Counter(metrics_registry, 'dns_update_http_requests_total',
+                              'HTTP requests by route, method and status', ('route', 'method', 'status'))
+http_request_seconds = Histogram(metrics_registry, 'dns_update_http_request_duration_seconds',
+                                 'HTTP request latency by route, method and status', ('route', 'method', 'status'))
+http_requests_in_flight = Gauge(metrics_registry, 'dns_update_http_requests_in_flight',
+                                'HTTP requests currently being served')
+auth_failures_total = Counter(metrics_registry, 'dns_update_auth_failures_total',
+                              'Authentication failures by method', ('method',))
+route53_change_seconds = Histogram(metrics_registry, 'dns_update_route53_change_duration_seconds',
+                                   'Route53 change_resource_record_sets call latency per attempt', ('outcome',))
+log_write_seconds = Histogram(metrics_registry, 'dns_update_log_write_duration_seconds',
+                              'Time to write a DNS update log entry', buckets=IO_BUCKETS)
+log_fsync_seconds = Histogram(metrics_registry, 'dns_update_log_fsync_duration_seconds',
+                              'Time to fsync the DNS update log', buckets=IO_BUCKETS)
+log_file_stats = LogFileStats()
+
+def collect_log_file_metrics():
+    """
+    Log file size and entry count, computed at scrape time.
+    """
+    size, entries = log_file_stats.get(os.environ.get('DNS_LOG_FILE', 'dns_updates.log'))
+    return [
+        ('dns_update_log_file_size_bytes', 'gauge', 'Size of the DNS update log file', [([], size)]),
+        ('dns_update_log_entries', 'gauge', 'Entries in the DNS update log file', [([], entries)]),
+    ]
+
+metrics_registry.register_callback(collect_log_file_metrics)
+
+@app.before_request
+def start_request_metrics():
+    """Start timing the request."""
+    if get_config().ENABLE_METRICS:
+        g.metrics_start = time.perf_counter()
+        http_requests_in_flight.inc()
+
+@app.after_request
+def record_request_metrics(response):
+    """Record request count and latency by route and status."""
+    start = g.get('metrics_start')
+    if start is not None:
+        # Label by route pattern, not path, to keep the number of series bounded
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        labels = (route, request.method, response.status_code)
+        http_requests_total.labels(*labels).inc()
+        http_request_seconds.labels(*labels).observe(time.perf_counter() - start)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    """Decrement the in-flight gauge, even if the request raised."""
+    if g.pop('metrics_start', None) is not None:
+        http_requests_in_flight.dec()
+
+# Opt-in cProfile sampling of /update-dns (PROFILE_SAMPLE_RATE or POST /admin/profiling)
+request_profiler = SamplingProfiler(Config.PROFILE_DIR, Config.PROFILE_SAMPLE_RATE)
+
+def mark_stage(name):
+    """End the current request stage, if the request is being timed."""
+    if not has_request_context():
+        return  # A background write
+    timer = g.get('stage_timer')
+    if timer is not None:
+        timer.mark(name)
+
+@app.after_request
+def add_server_timing(response):
+    """Expose the per-stage timing of the request as a Server-Timing header."""
+    timer = g.get('stage_timer')
+    if timer is not None and get_config().ENABLE_SERVER_TIMING:
+        response.headers['Server-Timing'] = timer.server_timing()
+    return response
 
 def is_valid_ip(ip_address):
     """
@@ -59,13 +452,44 @@ def get_requester_ip():
         # Fall back to direct connection IP
         return request.remote_addr
 
+def get_client_address():
+    """
+    Get the address per-client limits are keyed on: the connecting peer,
+    or the client it forwarded for if the peer is a trusted proxy
+    (TRUSTED_PROXIES). Unlike get_requester_ip, proxy headers from anyone
+    else are ignored, so they cannot be rotated to get a fresh bucket.
+    """
+    remote_addr = request.remote_addr
+    if is_trusted_proxy(remote_addr):
+        # nginx sets X-Real-IP, and appends the address it saw to X-Forwarded-For
+        forwarded = request.headers.get('X-Real-IP') or request.headers.get('X-Forwarded-For', '').split(',')[-1].strip()
+        if forwarded:
+            return forwarded
+    return remote_addr or 'unknown'
+
+def is_trusted_proxy(address):
+    """
+    Check whether a peer address is a trusted proxy. A Unix socket peer is
+    local: Werkzeug reports it as '<local>', ASGI servers as no address.
+    """
+    if not address or address == '<local>':
+        return True
+    try:
+        import ipaddress
+        ip_obj = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip_obj in network for network in get_config().TRUSTED_PROXY_NETWORKS)
+
 def is_ip_match_allowed(requested_ip, requester_ip):
     """
     Check if the requested IP address is allowed to be updated.
     Returns True if the update is allowed, False otherwise.
     """
+    config = get_config()
+    
     # If IP validation is disabled, allow all updates
-    if not Config.ENABLE_IP_VALIDATION:
+    if not config.ENABLE_IP_VALIDATION:
         return True
     
     # Check if the requested IP matches the requester's IP
@@ -73,72 +497,197 @@ def is_ip_match_allowed(requested_ip, requester_ip):
         return True
     
     # Check if the requester's IP is in the allowed list
-    if Config.ALLOWED_IPS and requester_ip in Config.ALLOWED_IPS:
+    if requester_ip in config.ALLOWED_IP_SET:
         return True
     
-    # Check if the requester's IP is in allowed subnets
-    if Config.ALLOWED_SUBNETS:
-        for subnet in Config.ALLOWED_SUBNETS:
-            if is_ip_in_subnet(requester_ip, subnet):
-                return True
+    # Check if the requester's IP is in allowed subnets (parsed when the configuration was loaded)
+    if config.ALLOWED_NETWORKS:
+        try:
+            import ipaddress
+            ip_obj = ipaddress.ip_address(requester_ip)
+        except ValueError:
+            return False
+        return any(ip_obj in network for network in config.ALLOWED_NETWORKS)
     
     return False
 
-def is_ip_in_subnet(ip, subnet):
-    """
-    Check if an IP address is within a subnet (CIDR notation).
-    """
-    try:
-        import ipaddress
-        ip_obj = ipaddress.ip_address(ip)
-        subnet_obj = ipaddress.ip_network(subnet, strict=False)
-        return ip_obj in subnet_obj
-    except ValueError:
-        # If subnet parsing fails, return False
-        return False
-
-def validate_password(request, password_from_body=None):
+def get_presented_password(request, password_from_body=None):
     """
-    Validate the password from the request.
-    Returns True if password is valid or authentication is disabled, False otherwise.
+    Get the password presented with the request, if any.
+    Checks the combined body format, Authorization header, X-Auth-Password
+    header and query parameter, in that order.
     """
-    # If password authentication is disabled, allow all requests
-    if not Config.ENABLE_PASSWORD_AUTH:
-        return True
-    
-    # If no password is configured, allow all requests
-    if not Config.AUTH_PASSWORD:
-        return True
-    
     # Check password from combined format (passed as parameter)
     if password_from_body:
-        return password_from_body == Config.AUTH_PASSWORD
+        return password_from_body
     
     # Check for password in Authorization header
     auth_header = request.headers.get('Authorization')
     if auth_header:
         # Support both "Bearer password" and "password" formats
         if auth_header.startswith('Bearer '):
-            password = auth_header[7:]  # Remove "Bearer " prefix
-        else:
-            password = auth_header
-        return password == Config.AUTH_PASSWORD
+            return auth_header[7:]  # Remove "Bearer " prefix
+        return auth_header
     
     # Check for password in X-Auth-Password header
     password_header = request.headers.get('X-Auth-Password')
     if password_header:
-        return password_header == Config.AUTH_PASSWORD
+        return password_header
     
     # Check for password in query parameter
     password_param = request.args.get('password')
     if password_param:
-        return password_param == Config.AUTH_PASSWORD
+        return password_param
+    
+    return None
+
+# Verifies presented passwords against the scrypt hash, with a short-lived cache of successes
+password_verifier = PasswordVerifier(cache_ttl=Config.AUTH_CACHE_TTL, cache_size=Config.AUTH_CACHE_SIZE)
+
+# Per-client API tokens (API_TOKENS_FILE), reloaded when the file changes
+api_token_store = TokenStore(Config.API_TOKENS_FILE, check_interval=Config.API_TOKENS_CHECK_INTERVAL)
+
+def is_password_configured():
+    """Check whether a password (hash or plaintext) or a token file is configured."""
+    config = get_config()
+    return bool(config.AUTH_PASSWORD_HASH or config.AUTH_PASSWORD or config.API_TOKENS_FILE)
+
+def get_api_token(token):
+    """
+    Look up a presented API token.
+    Returns the ApiToken, or None if tokens are not configured or it is unknown/revoked.
+    """
+    if not get_config().API_TOKENS_FILE or not token:
+        return None
+    return api_token_store.authenticate(token)
+
+def check_password(password):
+    """
+    Check a presented password against the configured password.
+    """
+    config = get_config()
+    try:
+        return password_verifier.verify(password, config.AUTH_PASSWORD_HASH, config.AUTH_PASSWORD)
+    except ValueError as e:
+        logger.error(f"AUTH_PASSWORD_HASH is invalid: {e}")
+        return False
+
+def validate_password(request, password_from_body=None):
+    """
+    Validate the password from the request.
+    Returns True if password is valid or authentication is disabled, False otherwise.
+    """
+    # If password authentication is disabled, allow all requests
+    if not get_config().ENABLE_PASSWORD_AUTH:
+        return True
+    
+    # If no password is configured, allow all requests
+    if not is_password_configured():
+        return True
+    
+    password = get_presented_password(request, password_from_body)
+    if password:
+        api_token = get_api_token(password)
+        if api_token is not None:
+            # Remember the token for the log entry
+            g.api_token = api_token
+            return api_token.allows('update', get_config().DOMAIN_NAME)
+        return check_password(password)
     
     return False
 
-def log_dns_update(ip_address, requester_ip, domain_name, status, change_id=None, error_message=None, auth_method=None):
+def append_log_entry(log_file, log_entry):
+    """
+    Append an entry to a log file in LOG_FORMAT and force it to disk,
+    recording write and fsync time.
+    """
+    if get_config().LOG_FORMAT == 'compact':
+        writer = get_compact_writer(log_file)
+        data = log_entry
+    else:
+        writer = get_writer(log_file)
+        data = json.dumps(log_entry) + '\n'
+    start = time.perf_counter()
+    writer.write(data)  # One atomic append on a descriptor kept open per process
+    written = time.perf_counter()
+    mark_stage('log_write')
+    writer.sync()  # Force sync to disk
+    synced = time.perf_counter()
+    mark_stage('log_fsync')
+    log_write_seconds.observe(written - start)
+    log_fsync_seconds.observe(synced - written)
+
+def check_rate_limit(requester_ip, password=None, limiters=None):
+    """
+    Apply the per-requester and per-credential rate limits, by default the
+    /update-dns ones; `limiters` is an (ip, credential) pair of others.
+    Returns 0 if the request may proceed, otherwise the number of seconds
+    the client should wait. A request is only charged to its buckets if
+    both allow it, so a flood of guesses at a shared credential does not
+    also drain the buckets of the clients sending them.
+    """
+    if not get_config().ENABLE_RATE_LIMIT:
+        return 0
+    ip_limiter, credential_limiter = limiters or (ip_rate_limiter, credential_rate_limiter)
+    ip_key = requester_ip or 'unknown'
+    
+    wait = ip_limiter.hit(ip_key)
+    if wait:
+        return wait
+    
+    if password:
+        # Key credentials by a keyed hash so raw secrets are never held in memory
+        credential_key = hmac.new(
+            app.secret_key.encode('utf-8'),
+            password.encode('utf-8'),
+            hashlib.sha256
+        ).hexdigest()
+        wait = credential_limiter.hit(credential_key)
+        if wait:
+            ip_limiter.refund(ip_key)
+    
+    return wait
+
+def write_log_entry(log_entry):
+    """
+    Write a log entry to the DNS update log, falling back to
+    /tmp/dns_updates.log and then stderr.
+    """
+    description = f"{log_entry.get('ip_address')} -> {log_entry.get('domain_name')} ({log_entry.get('status')})"
+    
+    # Get log file path from config or use default
+    log_file = os.environ.get('DNS_LOG_FILE', 'dns_updates.log')
+    
+    # Try to write to the specified log file
+    try:
+        append_log_entry(log_file, log_entry)
+        logger.info(f"DNS update logged: {description}")
+    except (IOError, OSError, ValueError) as e:
+        # If the specified log file fails, try writing to /tmp
+        if log_file != '/tmp/dns_updates.log':
+            logger.warning(f"Failed to write to {log_file}: {e}. Trying /tmp/dns_updates.log")
+            try:
+                append_log_entry('/tmp/dns_updates.log', log_entry)
+                logger.info(f"DNS update logged to /tmp/dns_updates.log: {description}")
+            except (IOError, OSError, ValueError) as tmp_error:
+                logger.error(f"Failed to write to /tmp/dns_updates.log: {tmp_error}")
+                # Log to stderr as fallback
+                print(f"DNS_LOG_FALLBACK: {json.dumps(log_entry)}", file=sys.stderr)
+        else:
+            logger.error(f"Failed to write to {log_file}: {e}")
+            # Log to stderr as fallback
+            print(f"DNS_LOG_FALLBACK: {json.dumps(log_entry)}", file=sys.stderr)
+
+# Repeated failures from one requester are written once per window, with a repeat count (see log_dedup.py)
+repeated_errors = RepeatedErrors(write_log_entry, window=Config.ERROR_LOG_DEDUP_WINDOW,
+                                 max_keys=Config.ERROR_LOG_DEDUP_MAX_KEYS)
+
+def log_dns_update(ip_address, requester_ip, domain_name, status, change_id=None, error_message=None, auth_method=None,
+                   error_kind=None, hosted_zone_id=None):
     """
     Log DNS update attempt to JSON log file.
+    A failure given an `error_kind` is only counted if the same requester
+    failed the same way within the dedup window.
     """
     try:
         log_entry = {
@@ -150,37 +699,23 @@ def log_dns_update(ip_address, requester_ip, domain_name, status, change_id=None
             'change_id': change_id,
             'error_message': error_message,
             'auth_method': auth_method,
+            'token_id': g.api_token.id if g.get('api_token') is not None else None,
             'user_agent': request.headers.get('User-Agent', '')
         }
+        if hosted_zone_id:
+            log_entry['hosted_zone_id'] = hosted_zone_id  # The zone the drift check compares the record in
         
-        # Get log file path from config or use default
-        log_file = os.environ.get('DNS_LOG_FILE', 'dns_updates.log')
+        # Stage timings up to this point (the log write itself is only in Server-Timing)
+        timer = g.get('stage_timer')
+        if timer is not None and timer.stages:
+            log_entry['timings'] = timer.as_dict()
         
-        # Try to write to the specified log file
-        try:
-            with open(log_file, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(log_entry) + '\n')
-                f.flush()  # Ensure data is written to disk immediately
-                os.fsync(f.fileno())  # Force sync to disk
-            logger.info(f"DNS update logged: {ip_address} -> {domain_name} ({status})")
-        except (IOError, OSError) as e:
-            # If the specified log file fails, try writing to /tmp
-            if log_file != '/tmp/dns_updates.log':
-                logger.warning(f"Failed to write to {log_file}: {e}. Trying /tmp/dns_updates.log")
-                try:
-                    with open('/tmp/dns_updates.log', 'a', encoding='utf-8') as f:
-                        f.write(json.dumps(log_entry) + '\n')
-                        f.flush()  # Ensure data is written to disk immediately
-                        os.fsync(f.fileno())  # Force sync to disk
-                    logger.info(f"DNS update logged to /tmp/dns_updates.log: {ip_address} -> {domain_name} ({status})")
-                except (IOError, OSError) as tmp_error:
-                    logger.error(f"Failed to write to /tmp/dns_updates.log: {tmp_error}")
-                    # Log to stderr as fallback
-                    print(f"DNS_LOG_FALLBACK: {json.dumps(log_entry)}", file=sys.stderr)
-            else:
-                logger.error(f"Failed to write to {log_file}: {e}")
-                # Log to stderr as fallback
-                print(f"DNS_LOG_FALLBACK: {json.dumps(log_entry)}", file=sys.stderr)
+        # Keyed on the peer, not on proxy headers or the posted address a client could rotate
+        key = (get_client_address(), error_kind, auth_method)
+        if error_kind and repeated_errors.add(key, log_entry):
+            return log_entry
+        write_log_entry(log_entry)
+        return log_entry
                 
     except Exception as e:
         logger.error(f"Failed to log DNS update: {e}")
@@ -213,36 +748,44 @@ def get_auth_method(request, password_from_body=None):
     else:
         return None
 
+# Last applied value of each record, per log file, kept up to date from the log tail
+_record_states = {}
+
 def get_last_successful_dns_ip():
     """
     Get the IP address from the last successful DNS update.
     Returns None if no successful updates found.
     """
     try:
-        logs = read_logs_from_file()
-        # Find the most recent successful update
-        for log in sorted(logs, key=lambda x: x.get('timestamp', ''), reverse=True):
-            if log.get('status') == 'success':
-                return log.get('ip_address')
-        return None
+        record = get_record_state().last_updated()
+        return record['ip_address'] if record else None
     except Exception as e:
         logger.error(f"Error getting last successful DNS IP: {e}")
         return None
 
-def create_auth_cookie(password):
+def get_credential_fingerprint():
+    """
+    Fingerprint of the configured password, signed into cookies (but not
+    stored in them) so that changing the password invalidates existing cookies.
+    """
+    config = get_config()
+    configured = config.AUTH_PASSWORD_HASH or config.AUTH_PASSWORD or ''
+    return hashlib.sha256(configured.encode('utf-8')).hexdigest()
+
+def create_auth_cookie():
     """
     Create a secure authentication cookie.
+    The cookie holds only a timestamp and a signature, never the password.
     """
-    # Create a hash of the password with a timestamp
     timestamp = str(int(datetime.now().timestamp()))
-    data = f"{password}:{timestamp}"
+    data = f"{timestamp}:{get_credential_fingerprint()}"
     signature = hmac.new(
         app.secret_key.encode('utf-8'),
         data.encode('utf-8'),
         hashlib.sha256
     ).hexdigest()
     
-    return f"{data}:{signature}"
+    return f"{timestamp}:{signature}"
 
 def validate_auth_cookie(cookie_value):
     """
@@ -254,10 +797,10 @@ def validate_auth_cookie(cookie_value):
     try:
         # Split the cookie value
         parts = cookie_value.split(':')
-        if len(parts) != 3:
+        if len(parts) != 2:
             return False
         
-        password, timestamp, signature = parts
+        timestamp, signature = parts
         
         # Check if cookie is not too old (24 hours)
         cookie_time = int(timestamp)
@@ -266,29 +809,30 @@ def validate_auth_cookie(cookie_value):
             return False
         
         # Verify signature
-        data = f"{password}:{timestamp}"
+        data = f"{timestamp}:{get_credential_fingerprint()}"
         expected_signature = hmac.new(
             app.secret_key.encode('utf-8'),
             data.encode('utf-8'),
             hashlib.sha256
         ).hexdigest()
         
-        return hmac.compare_digest(signature, expected_signature) and password == Config.AUTH_PASSWORD
+        return hmac.compare_digest(signature, expected_signature)
     except Exception as e:
         logger.error(f"Error validating auth cookie: {e}")
         return False
 
-def authenticate_logs_access():
+def authenticate_logs_access(query_password=None):
     """
     Authenticate access to logs and stats pages.
+    `query_password` overrides the ?password= argument (see /cache-key).
     Returns (is_authenticated, response) tuple.
     """
     # Check if authentication is disabled
-    if not Config.ENABLE_PASSWORD_AUTH:
+    if not get_config().ENABLE_PASSWORD_AUTH:
         return True, None
     
     # Check if no password is configured
-    if not Config.AUTH_PASSWORD:
+    if not is_password_configured():
         return True, None
     
     # Get requester IP
@@ -305,9 +849,14 @@ def authenticate_logs_access():
         return True, None
     
     # Check for password in request (for API access)
-    password = request.args.get('password') or request.headers.get('X-Auth-Password')
-    if password and password == Config.AUTH_PASSWORD:
-        return True, None
+    password = query_password or request.args.get('password') or request.headers.get('X-Auth-Password')
+    if password:
+        api_token = get_api_token(password)
+        if api_token is not None:
+            g.api_token = api_token
+            return api_token.allows('read'), None
+        if check_password(password):
+            return True, None
     
     # Authentication failed
     return False, None
@@ -320,6 +869,7 @@ def require_auth(f):
         is_authenticated, response = authenticate_logs_access()
         
         if not is_authenticated:
+            auth_failures_total.labels('dashboard').inc()
             # Return authentication required response
             if request.path.startswith('/api/'):
                 # API endpoint - return JSON
@@ -333,21 +883,61 @@ def require_auth(f):
     decorated_function.__name__ = f.__name__
     return decorated_function
 
+def authenticate_admin():
+    """
+    Authenticate a request to an /admin/ endpoint: the configured password,
+    or an API token with the 'admin' scope. Unlike the dashboard, the login
+    cookie, the last updated IP and 'read' tokens are not enough.
+    """
+    config = get_config()
+    if not config.ENABLE_PASSWORD_AUTH:
+        return True
+    
+    password = get_presented_password(request)
+    if not password:
+        return False
+    api_token = get_api_token(password)
+    if api_token is not None:
+        g.api_token = api_token
+        return api_token.allows('admin')
+    return bool(config.AUTH_PASSWORD_HASH or config.AUTH_PASSWORD) and check_password(password)
+
+def require_admin(f):
+    """
+    Decorator to require admin authentication (see authenticate_admin).
+    """
+    def decorated_function(*args, **kwargs):
+        if not authenticate_admin():
+            auth_failures_total.labels('admin').inc()
+            return jsonify({'error': 'Admin authentication required'}), 401
+        return f(*args, **kwargs)
+    
+    decorated_function.__name__ = f.__name__
+    return decorated_function
+
 def read_logs_from_single_file(file_path):
     """
     Read logs from a single file.
-    Returns a list of log entries.
+    Returns a list of log entries (LogEntry, see log_entry.py).
     """
     logs = []
+    if is_compact_log(file_path):
+        try:
+            with gc_paused():
+                return read_compact_log(file_path, LogEntry.from_dict)
+        except (IOError, OSError) as e:
+            logger.warning(f"Failed to read from {file_path}: {e}")
+            return logs
     if os.path.exists(file_path):
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
+            with open(file_path, 'r', encoding='utf-8') as f, gc_paused():
                 for line in f:
                     try:
                         log_entry = json.loads(line.strip())
-                        logs.append(log_entry)
                     except json.JSONDecodeError:
                         continue  # Skip invalid lines
+                    if isinstance(log_entry, dict):
+                        logs.append(LogEntry.from_dict(log_entry))
         except (IOError, OSError) as e:
             logger.warning(f"Failed to read from {file_path}: {e}")
     return logs
@@ -369,7 +959,129 @@ def read_logs_from_file():
     
     return logs
 
+def read_matching_logs(file_path, prefilter, predicate):
+    """
+    Read the log entries of a single file for which predicate(entry) is true,
+    decoding only JSON lines found by the prefilter (see log_scan.py).
+    Returns a list of log entries.
+    """
+    if is_compact_log(file_path):
+        return [log for log in read_logs_from_single_file(file_path) if predicate(log)]
+    try:
+        with gc_paused():
+            return [LogEntry.from_dict(log) for log in read_matching(file_path, prefilter, predicate)]
+    except FileNotFoundError:
+        return []
+    except (IOError, OSError) as e:
+        logger.warning(f"Failed to read from {file_path}: {e}")
+        return []
+
+_log_columns = {}
+_log_tails_lock = threading.Lock()
+
+def get_log_tail(views, view_class):
+    """
+    Get the view (a LogTail, see log_tail.py) of the log file that
+    read_logs_from_file reads, with the entries appended since the last
+    call. `views` holds one view per path. Returns (log file path, view).
+    """
+    def refreshed(path):
+        with _log_tails_lock:
+            view = views.setdefault(path, view_class())
+        return view.refresh(path)
+    
+    log_file = os.environ.get('DNS_LOG_FILE', 'dns_updates.log')
+    view = refreshed(log_file)
+    if not len(view) and log_file != '/tmp/dns_updates.log':
+        log_file = '/tmp/dns_updates.log'
+        view = refreshed(log_file)
+    return log_file, view
+
+def get_log_columns():
+    """
+    Get the columnar store (see log_columns.py) of the log file.
+    Returns (log file path, LogColumns).
+    """
+    return get_log_tail(_log_columns, LogColumns)
+
+def get_record_state():
+    """Get the RecordState (see record_state.py) of the log file."""
+    return get_log_tail(_record_states, RecordState)[1]
+
+def matches_log_filter(log, filter_type, search):
+    """Check a log entry against the /api/logs filter and search."""
+    # Status filter
+    if filter_type == 'success' and log.get('status') != 'success':
+        return False
+    elif filter_type == 'error' and log.get('status') != 'error':
+        return False
+    elif filter_type == 'today':
+        log_date = datetime.fromisoformat(log.get('timestamp', '')).date()
+        if log_date != datetime.now(timezone.utc).date():
+            return False
+    elif filter_type == 'week':
+        log_date = datetime.fromisoformat(log.get('timestamp', ''))
+        if log_date < datetime.now(timezone.utc) - timedelta(days=7):
+            return False
+    
+    # Search filter (text fields only, so a null field does not match 'none')
+    if search:
+        search_lower = search.lower()
+        if not any(isinstance(log.get(field), str) and search_lower in log[field].lower()
+                   for field in SEARCH_FIELDS):
+            return False
+    
+    return True
+
+def get_log_version():
+    """
+    Get a version string for the DNS update log that changes on every write
+    (from any process), built from the inode, size and mtime of the log files.
+    Returns None if no log file exists.
+    """
+    log_file = os.environ.get('DNS_LOG_FILE', 'dns_updates.log')
+    parts = []
+    for path in dict.fromkeys([log_file, '/tmp/dns_updates.log']):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        parts.append(f"{stat.st_ino:x}.{stat.st_size:x}.{stat.st_mtime_ns:x}")
+    return '-'.join(parts) or None
+
+def get_cache_version():
+    """
+    Get the X-Cache-Version of the read APIs: the log version, plus the
+    repeats counted since, which the statistics include before they are
+    written.
+    """
+    version = get_log_version() or '0'
+    if repeated_errors.pending():
+        version = f"{version}+{repeated_errors.counted}"
+    return version
+
+# Read APIs that a reverse proxy may micro-cache (see nginx/dns-update.conf)
+CACHEABLE_PATHS = ('/api/logs', '/api/stats')
+
+@app.after_request
+def add_cache_headers(response):
+    """
+    Let nginx cache successful read API responses for API_CACHE_TTL seconds
+    (X-Accel-Expires) while browsers always revalidate (Cache-Control).
+    """
+    if request.path not in CACHEABLE_PATHS or request.method != 'GET':
+        return response
+    ttl = get_config().API_CACHE_TTL
+    if response.status_code == 200 and ttl > 0:
+        response.headers['X-Accel-Expires'] = str(ttl)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.headers['X-Cache-Version'] = get_cache_version()
+    else:
+        response.headers['Cache-Control'] = 'no-store'
+    return response
+
 @app.route('/update-dns', methods=['POST'])
+@request_profiler.wrap('update-dns')
 def update_dns():
     """
     Update Route53 A record via HTTP POST request.
@@ -377,12 +1089,29 @@ def update_dns():
     Expected plain text payload with just the IP address.
     Domain name and hosted zone are pre-configured.
     """
+    response, update = begin_dns_update()
+    if update is None:
+        return response
+    try:
+        change = apply_dns_update(update)
+    except Exception as e:
+        return dns_update_error(e)
+    return finish_dns_update(update, change)
+
+def begin_dns_update():
+    """
+    Parse, rate limit, authenticate and check an /update-dns request, up to
+    the Route53 call. Returns (response, None) to answer right away, or
+    (None, update) with the update to make.
+    """
+    g.stage_timer = StageTimer()
+    config = get_config()
     try:
         # Get request data - support both combined format and plain IP format
         request_data = request.get_data(as_text=True).strip()
         
         if not request_data:
-            return jsonify({'error': 'No data provided'}), 400
+            return (jsonify({'error': 'No data provided'}), 400), None
         
         # Parse data - support "IP PASSWORD" format or plain IP
         data_parts = request_data.split()
@@ -397,79 +1126,121 @@ def update_dns():
             ip_address = data_parts[0]
             password = None
         else:
-            return jsonify({'error': 'Invalid data format. Expected "IP PASSWORD" or just "IP"'}), 400
+            return (jsonify({'error': 'Invalid data format. Expected "IP PASSWORD" or just "IP"'}), 400), None
+        mark_stage('parse')
+        
+        # Enforce rate limits before any log I/O or AWS call
+        wait = check_rate_limit(get_client_address(), get_presented_password(request, password))
+        mark_stage('rate_limit')
+        if wait:
+            response = jsonify({'error': 'Rate limit exceeded. Please retry later.'})
+            response.headers['Retry-After'] = str(retry_after_seconds(wait))
+            return (response, 429), None
         
         # Validate IP address format (basic validation)
         if not is_valid_ip(ip_address):
-            return jsonify({'error': 'Invalid IP address format'}), 400
+            return (jsonify({'error': 'Invalid IP address format'}), 400), None
         
         # Validate password authentication
-        if not validate_password(request, password):
+        password_valid = validate_password(request, password)
+        mark_stage('auth')
+        if not password_valid:
             auth_method = get_auth_method(request, password)
-            log_dns_update(ip_address, get_requester_ip(), Config.DOMAIN_NAME, 'error', 
-                          error_message='Authentication failed', auth_method=auth_method)
-            return jsonify({
+            auth_failures_total.labels(auth_method or 'none').inc()
+            log_dns_update(ip_address, get_requester_ip(), config.DOMAIN_NAME, 'error', 
+                          error_message='Authentication failed', auth_method=auth_method, error_kind='auth_failed')
+            return (jsonify({
                 'error': 'Authentication failed. Invalid or missing password.'
-            }), 401
+            }), 401), None
         
         # Get requester's IP address
         requester_ip = get_requester_ip()
         
         # Check if the requested IP matches the requester's IP
-        if not is_ip_match_allowed(ip_address, requester_ip):
+        ip_allowed = is_ip_match_allowed(ip_address, requester_ip)
+        mark_stage('ip_check')
+        if not ip_allowed:
             auth_method = get_auth_method(request, password)
-            log_dns_update(ip_address, requester_ip, Config.DOMAIN_NAME, 'error',
+            log_dns_update(ip_address, requester_ip, config.DOMAIN_NAME, 'error',
                           error_message=f'IP address mismatch. Requested: {ip_address}, Requester: {requester_ip}', 
-                          auth_method=auth_method)
-            return jsonify({
+                          auth_method=auth_method, error_kind='ip_mismatch')
+            return (jsonify({
                 'error': f'IP address mismatch. Requested: {ip_address}, Requester: {requester_ip}. Only updating to your own IP address is allowed.'
-            }), 403
+            }), 403), None
         
         # Use pre-configured values
-        hosted_zone_id = Config.HOSTED_ZONE_ID
-        domain_name = Config.DOMAIN_NAME
+        hosted_zone_id = config.HOSTED_ZONE_ID
+        domain_name = config.DOMAIN_NAME
         
         if not hosted_zone_id or not domain_name:
             auth_method = get_auth_method(request, password)
             log_dns_update(ip_address, requester_ip, domain_name or 'unknown', 'error',
-                          error_message='Domain name or hosted zone not configured', auth_method=auth_method)
-            return jsonify({
+                          error_message='Domain name or hosted zone not configured', auth_method=auth_method,
+                          error_kind='not_configured')
+            return (jsonify({
                 'error': 'Domain name or hosted zone not configured. Please set HOSTED_ZONE_ID and DOMAIN_NAME environment variables.'
-            }), 500
+            }), 500), None
         
         # Check if AWS client is available
-        if route53_client is None:
+        client = get_route53_client()
+        mark_stage('aws_client')
+        if client is None:
             auth_method = get_auth_method(request, password)
             log_dns_update(ip_address, requester_ip, domain_name, 'error',
-                          error_message='AWS Route53 client not available', auth_method=auth_method)
-            return jsonify({'error': 'AWS Route53 client not available. Check AWS credentials.'}), 500
+                          error_message='AWS Route53 client not available', auth_method=auth_method,
+                          error_kind='no_aws_client')
+            return (jsonify({'error': 'AWS Route53 client not available. Check AWS credentials.'}), 500), None
         
-        # Update the A record
-        response = update_a_record(hosted_zone_id, domain_name, ip_address)
+        return None, {
+            'hosted_zone_id': hosted_zone_id,
+            'domain_name': domain_name,
+            'ip_address': ip_address,
+            'requester_ip': requester_ip,
+            'auth_method': get_auth_method(request, password),
+        }
         
-        # Log successful update
-        auth_method = get_auth_method(request, password)
-        log_dns_update(ip_address, requester_ip, domain_name, 'success', 
-                      change_id=response['ChangeInfo']['Id'], auth_method=auth_method)
+    except Exception as e:
+        return dns_update_error(e), None
+
+def apply_dns_update(update):
+    """Make the Route53 change for an update from begin_dns_update. Blocks until Route53 answers."""
+    response = update_a_record(update['hosted_zone_id'], update['domain_name'], update['ip_address'])
+    mark_stage('route53')
+    return response
+
+def finish_dns_update(update, response):
+    """Log a successful update and build the response."""
+    try:
+        change_id = response['ChangeInfo']['Id']
+        log_entry = log_dns_update(update['ip_address'], update['requester_ip'], update['domain_name'], 'success',
+                                   change_id=change_id, auth_method=update['auth_method'],
+                                   hosted_zone_id=update['hosted_zone_id'])
+        updated_at = log_entry['timestamp'] if log_entry else datetime.now(timezone.utc).isoformat()
+        get_record_state().set(update['domain_name'], update['ip_address'], updated_at, change_id,
+                               update['hosted_zone_id'])
         
         return jsonify({
             'success': True,
-            'message': f'A record for {domain_name} updated to {ip_address}',
-            'change_id': response['ChangeInfo']['Id']
+            'message': f"A record for {update['domain_name']} updated to {update['ip_address']}",
+            'change_id': change_id
         }), 200
-        
-    except ClientError as e:
+    except Exception as e:
+        return dns_update_error(e)
+
+def dns_update_error(e):
+    """Build the response for an exception raised while handling /update-dns."""
+    if is_aws_client_error(e):
         logger.error(f"AWS error: {e}")
         return jsonify({'error': f'AWS error: {str(e)}'}), 500
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        return jsonify({'error': f'Unexpected error: {str(e)}'}), 500
+    logger.error(f"Unexpected error: {e}")
+    return jsonify({'error': f'Unexpected error: {str(e)}'}), 500
 
 def update_a_record(hosted_zone_id, domain_name, ip_address):
     """
     Update Route53 A record with new IP address.
     """
-    if route53_client is None:
+    client = get_route53_client()
+    if client is None:
         raise ValueError("AWS Route53 client not available")
     
     # Prepare the change batch
@@ -491,8 +1262,24 @@ def update_a_record(hosted_zone_id, domain_name, ip_address):
         ]
     }
     
-    # Submit the change request
-    response = route53_client.change_resource_record_sets(
+    def change_resource_record_sets(**kwargs):
+        # Time each attempt separately so retries show up as extra observations
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = client.change_resource_record_sets(**kwargs)
+            outcome = 'success'
+            return result
+        except Exception as e:
+            if get_error_code(e) in RETRYABLE_ERROR_CODES:
+                outcome = 'throttled'
+            raise
+        finally:
+            route53_change_seconds.labels(outcome).observe(time.perf_counter() - start)
+    
+    # Submit the change request (throttling errors are retried by the scheduler)
+    response = route53_scheduler.call(
+        change_resource_record_sets,
         HostedZoneId=hosted_zone_id,
         ChangeBatch=change_batch
     )
@@ -500,11 +1287,115 @@ def update_a_record(hosted_zone_id, domain_name, ip_address):
     logger.info(f"DNS update submitted: {response['ChangeInfo']['Id']}")
     return response
 
+@app.route('/check', methods=['GET'])
+def check_record():
+    """
+    Tell a client whether the record needs an update: the requester IP,
+    the record's last applied value and whether they differ. Answered from
+    memory, with no log write and no Route53 call.
+    """
+    config = get_config()
+    requester_ip = get_requester_ip()
+    wait = check_rate_limit(get_client_address(), get_presented_password(request),
+                            limiters=(check_ip_rate_limiter, check_credential_rate_limiter))
+    if wait:
+        response = jsonify({'error': 'Rate limit exceeded. Please retry later.'})
+        response.headers['Retry-After'] = str(retry_after_seconds(wait))
+        return response, 429
+    
+    if not validate_password(request):
+        auth_failures_total.labels(get_auth_method(request) or 'none').inc()
+        return jsonify({'error': 'Authentication failed. Invalid or missing password.'}), 401
+    
+    if not config.DOMAIN_NAME:
+        return jsonify({'error': 'Domain name not configured. Please set the DOMAIN_NAME environment variable.'}), 500
+    
+    record = get_record_state().get(config.DOMAIN_NAME)
+    record_ip = record['ip_address'] if record else None
+    return jsonify({
+        'requester_ip': requester_ip,
+        'domain_name': config.DOMAIN_NAME,
+        'record_ip': record_ip,
+        'updated_at': record['updated_at'] if record else None,
+        'update_needed': record_ip != requester_ip
+    }), 200
+
+def get_managed_records():
+    """Get the last value applied to each record of the configured zone, from the record state."""
+    return get_desired_state(get_record_state().records(), Config.HOSTED_ZONE_ID)
+
+# Compares managed records with Route53 using one paginated zone scan per interval
+drift_reconciler = DriftReconciler(
+    get_route53_client,
+    get_managed_records,
+    interval=Config.DRIFT_CHECK_INTERVAL,
+    call=route53_scheduler.call,
+    repair=update_a_record if Config.DRIFT_REPAIR else None
+)
+
+def deep_health_response():
+    """
+    Report the cached dependency probe results.
+    Returns 503 if any probe is failing, stale or has not run yet.
+    """
+    health_probes.start()
+    healthy, checks = health_probes.snapshot()
+    return jsonify({
+        'status': 'healthy' if healthy else 'unhealthy',
+        'service': 'DNS Update Service',
+        'checks': checks
+    }), 200 if healthy else 503
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint."""
+    """Health check endpoint. Add ?deep=1 for dependency checks."""
+    if request.args.get('deep', '').lower() in ('1', 'true'):
+        return deep_health_response()
     return jsonify({'status': 'healthy', 'service': 'DNS Update Service'}), 200
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness endpoint: healthy only if Route53, credentials and the log writer are."""
+    return deep_health_response()
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics endpoint."""
+    if not get_config().ENABLE_METRICS:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    response = make_response(metrics_registry.generate_latest())
+    response.headers['Content-Type'] = METRICS_CONTENT_TYPE
+    return response
+
+@app.route('/admin/reload-config', methods=['POST'])
+@require_admin
+def admin_reload_config():
+    """Reload the configuration (same as sending SIGHUP)."""
+    try:
+        changed, restart_required = reload_config()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return jsonify({'success': True, 'changed': changed, 'restart_required': restart_required})
+
+@app.route('/admin/profiling', methods=['GET', 'POST'])
+@require_admin
+def admin_profiling():
+    """
+    View or change the /update-dns sampling profiler.
+    POST {"sample_rate": N} profiles 1 in N requests; 0 turns it off.
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            sample_rate = data.get('sample_rate')
+            request_profiler.configure(sample_rate=int(sample_rate) if sample_rate is not None else None)
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'error': f'Invalid sample_rate: {e}'}), 400
+        logger.info(f"Profiler sample rate set to {request_profiler.sample_rate}")
+    
+    return jsonify({'success': True, 'profiler': request_profiler.stats()})
+
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     """Login endpoint for logs and stats access."""
@@ -514,11 +1405,12 @@ def login():
     # Handle POST request
     password = request.form.get('password')
     
-    if not password or password != Config.AUTH_PASSWORD:
+    if not password or not check_password(password):
+        auth_failures_total.labels('login').inc()
         return render_template('login.html', error='Invalid password'), 401
     
     # Create authentication cookie
-    auth_cookie = create_auth_cookie(password)
+    auth_cookie = create_auth_cookie()
     
     # Redirect to logs page with cookie
     response = make_response(redirect('/logs'))
@@ -538,6 +1430,27 @@ def logs_page():
     """DNS logs web interface."""
     return render_template('logs.html')
 
+@app.route('/cache-key', methods=['GET'])
+def cache_key():
+    """
+    Authenticate a read API request for nginx's auth_request and return the
+    parts of its cache key: X-Cache-Key (who is asking) and X-Cache-Version
+    (changes on every log write, so cached pages are never stale).
+    """
+    # auth_request subrequests carry no query string; nginx sends the original URI
+    original_args = parse_qs(urlsplit(request.headers.get('X-Original-URI', '')).query)
+    is_authenticated, _ = authenticate_logs_access(query_password=original_args.get('password', [None])[0])
+    if not is_authenticated:
+        auth_failures_total.labels('dashboard').inc()
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    api_token = g.get('api_token')
+    response = make_response('', 204)
+    response.headers['X-Cache-Key'] = f"token:{api_token.id}" if api_token is not None else 'dashboard'
+    response.headers['X-Cache-Version'] = get_cache_version()
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 @app.route('/api/logs', methods=['GET'])
 @require_auth
 def api_logs():
@@ -548,34 +1461,20 @@ def api_logs():
         filter_type = request.args.get('filter', 'all')
         search = request.args.get('search', '').strip()
         
-        # Read logs from file using helper function
-        logs = read_logs_from_file()
-        
-        # Apply filters
-        filtered_logs = []
-        for log in logs:
-            # Status filter
-            if filter_type == 'success' and log.get('status') != 'success':
-                continue
-            elif filter_type == 'error' and log.get('status') != 'error':
-                continue
-            elif filter_type == 'today':
-                log_date = datetime.fromisoformat(log.get('timestamp', '')).date()
-                if log_date != datetime.now(timezone.utc).date():
-                    continue
-            elif filter_type == 'week':
-                log_date = datetime.fromisoformat(log.get('timestamp', ''))
-                if log_date < datetime.now(timezone.utc) - timedelta(days=7):
-                    continue
-            
-            # Search filter
-            if search:
-                search_lower = search.lower()
-                if not any(search_lower in str(log.get(field, '')).lower() 
-                          for field in ['ip_address', 'requester_ip', 'domain_name', 'error_message']):
-                    continue
-            
-            filtered_logs.append(log)
+        def predicate(log):
+            return matches_log_filter(log, filter_type, search)
+        
+        # Counts over all logs come from the columnar store
+        log_file, columns = get_log_columns()
+        summary = columns.stats(pending=repeated_errors.pending())
+        if search or filter_type in ('success', 'error'):
+            # Decode only lines that can match
+            prefilter = search_prefilter(search) if search else None
+            if prefilter is None and filter_type in ('success', 'error'):
+                prefilter = status_prefilter(filter_type)
+            filtered_logs = read_matching_logs(log_file, prefilter, predicate)
+        else:
+            filtered_logs = [log for log in read_logs_from_single_file(log_file) if predicate(log)]
         
         # Sort by timestamp (newest first)
         filtered_logs.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
@@ -587,21 +1486,12 @@ def api_logs():
         end_idx = start_idx + per_page
         paginated_logs = filtered_logs[start_idx:end_idx]
         
-        # Calculate statistics using the same logs
-        successful_count = sum(1 for log in logs if log.get('status') == 'success')
-        failed_count = sum(1 for log in logs if log.get('status') == 'error')
-        unique_ips = len(set(log.get('ip_address') for log in logs if log.get('ip_address')))
-        
-        stats = {
-            'total': len(logs),
-            'successful': successful_count,
-            'failed': failed_count,
-            'unique_ips': unique_ips
-        }
+        # Statistics over all logs
+        stats = {key: summary[key] for key in ('total', 'successful', 'failed', 'unique_ips')}
         
         return jsonify({
             'success': True,
-            'logs': paginated_logs,
+            'logs': [log.to_dict() for log in paginated_logs],
             'stats': stats,
             'current_page': page,
             'total_pages': total_pages,
@@ -617,40 +1507,25 @@ def api_logs():
 def api_stats():
     """API endpoint for getting DNS update statistics."""
     try:
-        # Read logs from file using helper function
-        logs = read_logs_from_file()
-        
-        # Calculate basic stats
-        total = len(logs)
-        successful = sum(1 for log in logs if log.get('status') == 'success')
-        failed = sum(1 for log in logs if log.get('status') == 'error')
-        unique_ips = len(set(log.get('ip_address') for log in logs if log.get('ip_address')))
-        
-        # Get recent activity (last 24 hours)
+        # Aggregate the columnar store of the log, with recent activity (last 24 hours)
         yesterday = datetime.now(timezone.utc) - timedelta(days=1)
-        recent_updates = sum(1 for log in logs 
-                           if datetime.fromisoformat(log.get('timestamp', '')) >= yesterday)
-        
-        # Get top IP addresses
-        ip_counts = {}
-        for log in logs:
-            ip = log.get('ip_address')
-            if ip:
-                ip_counts[ip] = ip_counts.get(ip, 0) + 1
-        
-        top_ips = sorted(ip_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-        top_ips_data = [{'ip': ip, 'count': count} for ip, count in top_ips]
+        stats = get_log_columns()[1].stats(since=datetime_micros(yesterday), top=5, pending=repeated_errors.pending())
+        top_ips_data = [{'ip': ip, 'count': count} for ip, count in stats['top_ips']]
         
         return jsonify({
             'success': True,
             'stats': {
-                'total': total,
-                'successful': successful,
-                'failed': failed,
-                'unique_ips': unique_ips,
-                'recent_updates': recent_updates,
-                'top_ips': top_ips_data
-            }
+                'total': stats['total'],
+                'successful': stats['successful'],
+                'failed': stats['failed'],
+                'unique_ips': stats['unique_ips'],
+                'recent_updates': stats['recent'],
+                'top_ips': top_ips_data,
+                'auth_methods': stats['auth_methods']
+            },
+            'route53': route53_scheduler.stats(),
+            'aws_credentials': get_credential_stats(),
+            'drift': drift_reconciler.stats()
         })
         
     except Exception as e:
@@ -664,4 +1539,11 @@ if __name__ == '__main__':
     debug = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
     
     logger.info(f"Starting DNS Update Service on {host}:{port}")
-    app.run(host=host, port=port, debug=debug) 
\ No newline at end of file
+    start_route53_warmup()
+    health_probes.start()
+    drift_reconciler.start()
+    install_reload_signal_handler()
+    install_shutdown_signal_handler()
+    from server import run_server  # not needed when imported by a WSGI server or tests
+    run_server(app, host, port, unix_socket=Config.FLASK_UNIX_SOCKET,
+               unix_socket_mode=Config.FLASK_UNIX_SOCKET_MODE, debug=debug) 
\ No newline at end of file
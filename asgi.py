@@ -0,0 +1,256 @@
+"""
+Async serving mode for the DNS Update Service.
+
+With the WSGI server (python app.py) a request holds a thread from the
+moment its connection is accepted until the response is written: while a
+slow client sends its body, and for the whole blocking Route53 call.
+ASGIApp serves the same Flask app as an ASGI application instead:
+
+- request bodies are received and responses sent on the event loop, so an
+  idle or slow connection costs a coroutine, not a thread;
+- /update-dns runs the same parsing, rate limiting, auth and logging steps
+  as the Flask view on a small I/O thread pool, and the Route53 call on a
+  separate pool of ASYNC_ROUTE53_WORKERS threads, so requests waiting for
+  Route53 hold no thread at all;
+- every other route runs through the Flask app on the I/O pool, which keeps
+  log reads and writes off the event loop.
+
+Run with `python asgi.py` (needs uvicorn: pip install uvicorn), or point
+any ASGI server at asgi:application.
+"""
+
+import asyncio
+import contextvars
+import io
+import logging
+import socket
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from flask import request_started
+import app as app_module
+from app import app, Config
+
+logger = logging.getLogger(__name__)
+
+UPDATE_PATH = '/update-dns'
+
+TOO_LARGE_BODY = b'{"error": "Request body too large"}\n'
+
+
+def build_environ(scope, body):
+    """Build the WSGI environ for an ASGI HTTP request."""
+    server = scope.get('server') or ('localhost', None)  # None on a Unix socket
+    client = scope.get('client')
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0] if client else '',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        key = name.decode('latin-1').upper().replace('-', '_')
+        if key == 'CONTENT_LENGTH':
+            continue  # The body has been read; its length is known
+        if key != 'CONTENT_TYPE':
+            key = 'HTTP_' + key
+        value = value.decode('latin-1')
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def run_wsgi(wsgi_app, environ):
+    """Run a WSGI app (or Flask response) to completion. Returns the ASGI status, headers and body."""
+    started = []
+    chunks = []
+
+    def start_response(status, headers, exc_info=None):
+        started[:] = [status, headers]
+        return chunks.append
+
+    app_iter = wsgi_app(environ, start_response)
+    try:
+        chunks.extend(app_iter)
+    finally:
+        if hasattr(app_iter, 'close'):
+            app_iter.close()
+    status, headers = started
+    return (int(status.split(' ', 1)[0]),
+            [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+            b''.join(chunks))
+
+
+class ASGIApp:
+    """ASGI application serving a Flask app, with /update-dns split around the Route53 call."""
+
+    def __init__(self, flask_app, io_workers=8, route53_workers=10, max_body_size=65536):
+        self.flask_app = flask_app
+        self.io_executor = ThreadPoolExecutor(io_workers, thread_name_prefix='asgi-io')
+        self.route53_executor = ThreadPoolExecutor(route53_workers, thread_name_prefix='asgi-route53')
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return  # No websockets
+
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > self.max_body_size:
+                await send_response(send, 413, [(b'content-type', b'application/json')], TOO_LARGE_BODY)
+                return
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                break
+
+        environ = build_environ(scope, b''.join(chunks))
+        loop = asyncio.get_running_loop()
+        if scope['method'] == 'POST' and scope['path'] == UPDATE_PATH:
+            status, headers, body = await self.update_dns(loop, environ)
+        else:
+            status, headers, body = await loop.run_in_executor(
+                self.io_executor, run_wsgi, self.flask_app.wsgi_app, environ)
+        await send_response(send, status, headers, body)
+
+    async def update_dns(self, loop, environ):
+        """
+        Serve /update-dns like the Flask view, with each step on a thread
+        pool: validation and logging on the I/O pool, the Route53 call on
+        the Route53 pool. The Flask request context lives in one
+        contextvars.Context that every step runs in, so `request` and `g`
+        carry over between steps. A request picked by the request profiler
+        has its view steps profiled as one sample, as the Flask view's are.
+        """
+        context = contextvars.Context()
+        request_context = self.flask_app.request_context(environ)
+        sample = app_module.request_profiler.start('update-dns')
+
+        def run(executor, func, *args):
+            return loop.run_in_executor(executor, context.run, func, *args)
+
+        def run_view(executor, func, *args):
+            if sample is None:
+                return run(executor, func, *args)
+            return run(executor, sample.run, func, *args)
+
+        await run(self.io_executor, request_context.push)
+        rv = None
+        error = None
+        try:
+            rv, update = await run(self.io_executor, self._begin_update, sample)
+            if update is not None:
+                try:
+                    change = await run_view(self.route53_executor, app_module.apply_dns_update, update)
+                except Exception as e:
+                    rv = await run_view(self.io_executor, app_module.dns_update_error, e)
+                else:
+                    rv = await run_view(self.io_executor, app_module.finish_dns_update, update, change)
+        except Exception as e:
+            error = e
+        finally:
+            if sample is not None:
+                sample.finish()
+        return await run(self.io_executor, self._finish_request, request_context, environ, rv, error)
+
+    def _begin_update(self, sample=None):
+        """Run the before_request hooks, then validate the update (profiled if `sample` is given)."""
+        request_started.send(self.flask_app)
+        rv = self.flask_app.preprocess_request()
+        if rv is not None:
+            return rv, None
+        if sample is not None:
+            return sample.run(app_module.begin_dns_update)
+        return app_module.begin_dns_update()
+
+    def _finish_request(self, request_context, environ, rv, error):
+        """Turn the view's return value (or error) into a response as Flask does, then pop the context."""
+        unhandled = None
+        try:
+            if error is not None:
+                rv = self.flask_app.handle_user_exception(error)
+            response = self.flask_app.finalize_request(rv)
+        except Exception as e:
+            unhandled = e
+            response = self.flask_app.handle_exception(e)
+        try:
+            return run_wsgi(response, environ)
+        finally:
+            request_context.pop(unhandled)
+
+    async def lifespan(self, receive, send):
+        """Answer the server's startup and shutdown events; shut the pools down on shutdown."""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                app_module.repeated_errors.flush(force=True)
+                self.io_executor.shutdown(wait=False)
+                self.route53_executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+async def send_response(send, status, headers, body):
+    """Send a complete response."""
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+application = ASGIApp(app, io_workers=Config.ASYNC_IO_WORKERS, route53_workers=Config.ASYNC_ROUTE53_WORKERS,
+                      max_body_size=Config.ASYNC_MAX_BODY_SIZE)
+
+
+def main():
+    """Serve the app with uvicorn on the configured socket."""
+    try:
+        import uvicorn
+    except ImportError:
+        print("The async serving mode needs uvicorn: pip install uvicorn", file=sys.stderr)
+        sys.exit(1)
+    from server import bind_unix_socket, get_socket_address, get_systemd_listen_fds
+
+    # One server on every socket passed by systemd, else on the Unix socket, else on TCP
+    fds = get_systemd_listen_fds()
+    if fds:
+        sockets = [socket.socket(fileno=fd) for fd in fds]
+        where = ', '.join(f"{host}{':' + str(port) if port else ''}"
+                          for host, port in map(get_socket_address, fds)) + ' (systemd sockets)'
+    elif Config.FLASK_UNIX_SOCKET:
+        sockets = [bind_unix_socket(Config.FLASK_UNIX_SOCKET, Config.FLASK_UNIX_SOCKET_MODE)]
+        where = f"unix://{Config.FLASK_UNIX_SOCKET}"
+    else:
+        sockets = None
+        where = f"{Config.FLASK_HOST}:{Config.FLASK_PORT}"
+
+    logger.info(f"Starting DNS Update Service (async) on {where}")
+    app_module.start_route53_warmup()
+    app_module.health_probes.start()
+    app_module.drift_reconciler.start()
+    app_module.install_reload_signal_handler()  # uvicorn handles SIGTERM; lifespan shutdown flushes repeated errors
+    config = uvicorn.Config(application, host=Config.FLASK_HOST, port=Config.FLASK_PORT,
+                            log_level=Config.LOG_LEVEL.lower())
+    uvicorn.Server(config).run(sockets=sockets)
+
+
+if __name__ == '__main__':
+    main()
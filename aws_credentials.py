@@ -0,0 +1,199 @@
+"""
+Background AWS credential refresh for the DNS Update Service.
+
+With instance/container roles or assumed roles, botocore refreshes
+credentials lazily inside whichever request happens to hit expiry, stalling
+it on an IMDS/STS round trip. CredentialRefresher fetches new credentials in
+a background thread well before they expire, and hands botocore the cached
+copy so requests never wait on the network for credentials.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+def provider_chain_fetcher(botocore_session):
+    """
+    Build a fetch function that resolves credentials through botocore's
+    default provider chain (environment, shared config, ECS container role,
+    EC2 instance role).
+    """
+    from botocore.credentials import create_credential_resolver
+
+    def fetch():
+        credentials = create_credential_resolver(botocore_session).load_credentials()
+        if credentials is None:
+            raise ValueError(
+                "No AWS credentials found. Set AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY, "
+                "configure the AWS CLI, or run with an IAM role."
+            )
+        frozen = credentials.get_frozen_credentials()
+        return {
+            'access_key': frozen.access_key,
+            'secret_key': frozen.secret_key,
+            'token': frozen.token,
+            # Only refreshable (role) credentials carry an expiry
+            'expiry_time': getattr(credentials, '_expiry_time', None),
+            'method': getattr(credentials, 'method', 'unknown'),
+        }
+
+    return fetch
+
+
+def assume_role_fetcher(botocore_session, role_arn, session_name='dns-update', duration=3600):
+    """
+    Build a fetch function that assumes an IAM role through STS, using the
+    default provider chain for the source credentials.
+    """
+    def fetch():
+        sts = botocore_session.create_client('sts')
+        response = sts.assume_role(
+            RoleArn=role_arn,
+            RoleSessionName=session_name,
+            DurationSeconds=duration
+        )
+        credentials = response['Credentials']
+        return {
+            'access_key': credentials['AccessKeyId'],
+            'secret_key': credentials['SecretAccessKey'],
+            'token': credentials['SessionToken'],
+            'expiry_time': credentials['Expiration'],
+            'method': 'assume-role',
+        }
+
+    return fetch
+
+
+class CredentialRefresher:
+    """
+    Keeps a cached set of AWS credentials fresh from a background thread.
+
+    `fetch` is a callable returning a dict with access_key, secret_key,
+    token, expiry_time (aware datetime or None) and method. Credentials are
+    refreshed once fewer than `refresh_margin` seconds remain, which must be
+    larger than botocore's own 15 minute advisory window so botocore only
+    ever sees already-fresh credentials.
+    """
+
+    def __init__(self, fetch, refresh_margin=1200, check_interval=60, clock=time.time):
+        self.fetch = fetch
+        self.refresh_margin = refresh_margin
+        self.check_interval = check_interval
+        self.clock = clock
+        self._metadata = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._stats = {
+            'refreshes': 0,
+            'refresh_failures': 0,
+            'last_refresh_ms': None,
+            'last_refresh_at': None,
+            'last_error': None,
+        }
+
+    def refresh(self):
+        """Fetch new credentials and replace the cached copy."""
+        start = time.perf_counter()
+        try:
+            metadata = self.fetch()
+        except Exception as e:
+            with self._lock:
+                self._stats['refresh_failures'] += 1
+                self._stats['last_error'] = str(e)
+            raise
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._metadata = metadata
+            self._stats['refreshes'] += 1
+            self._stats['last_refresh_ms'] = round(elapsed_ms, 1)
+            self._stats['last_refresh_at'] = datetime.now(timezone.utc).isoformat()
+            self._stats['last_error'] = None
+        logger.info(f"AWS credentials refreshed via {metadata.get('method')} in {elapsed_ms:.0f}ms")
+        return metadata
+
+    def seconds_until_expiry(self):
+        """Seconds until the cached credentials expire, or None if they do not expire."""
+        metadata = self._metadata
+        if metadata is None or metadata.get('expiry_time') is None:
+            return None
+        return metadata['expiry_time'].timestamp() - self.clock()
+
+    def needs_refresh(self):
+        """Check whether the cached credentials are missing or inside the refresh margin."""
+        if self._metadata is None:
+            return True
+        remaining = self.seconds_until_expiry()
+        return remaining is not None and remaining < self.refresh_margin
+
+    @property
+    def refreshable(self):
+        """True if the credentials expire and need background refresh."""
+        return self._metadata is not None and self._metadata.get('expiry_time') is not None
+
+    def get_metadata(self):
+        """
+        Get the cached credentials in botocore's metadata format.
+        Only fetches inline if nothing has been cached yet.
+        """
+        metadata = self._metadata
+        if metadata is None:
+            metadata = self.refresh()
+        expiry_time = metadata.get('expiry_time')
+        return {
+            'access_key': metadata['access_key'],
+            'secret_key': metadata['secret_key'],
+            'token': metadata['token'],
+            'expiry_time': expiry_time.isoformat() if expiry_time else None,
+        }
+
+    def botocore_credentials(self):
+        """
+        Build a botocore credentials object backed by the cache.
+        When botocore decides to refresh it reads the cache, which the
+        background thread keeps fresh, so no network call happens in a request.
+        """
+        from botocore.credentials import Credentials, RefreshableCredentials
+
+        metadata = self.get_metadata()
+        if not self.refreshable:
+            return Credentials(metadata['access_key'], metadata['secret_key'], metadata['token'],
+                               method=self._metadata.get('method'))
+        return RefreshableCredentials.create_from_metadata(
+            metadata, refresh_using=self.get_metadata, method='dns-update-background-refresh'
+        )
+
+    def _run(self):
+        while not self._stop_event.wait(self.check_interval):
+            if not self.needs_refresh():
+                continue
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Background AWS credential refresh failed: {e}")
+
+    def start(self):
+        """Start the background refresh thread (no-op for non-expiring credentials)."""
+        if self._thread is not None or not self.refreshable:
+            return
+        self._thread = threading.Thread(target=self._run, name='aws-credential-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background refresh thread."""
+        self._stop_event.set()
+
+    def stats(self):
+        """Get a snapshot of the credential state for /api/stats."""
+        with self._lock:
+            stats = dict(self._stats)
+        metadata = self._metadata
+        remaining = self.seconds_until_expiry()
+        stats['method'] = metadata.get('method') if metadata else None
+        stats['expires_at'] = metadata['expiry_time'].isoformat() if metadata and metadata.get('expiry_time') else None
+        stats['expires_in_seconds'] = int(remaining) if remaining is not None else None
+        return stats
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the log subsystem.
+Measures wall time, peak RSS and peak traced allocations for the log readers,
+the log API endpoints, log_dns_update and the view_logs.py commands at
+several log sizes. Each measurement runs in a fresh process so peak RSS is
+not polluted by earlier cases.
+
+Usage:
+  python benchmarks/bench_logs.py                            - 10^4, 10^5, 10^6 entries
+  python benchmarks/bench_logs.py --sizes 10000,10000000     - Custom sizes
+  python benchmarks/bench_logs.py --output results.json      - Save machine-readable results
+  python benchmarks/bench_logs.py --compare before.json after.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+DEFAULT_SIZES = [10 ** 4, 10 ** 5, 10 ** 6]
+LOG_WRITE_COUNT = 200
+
+CASES = [
+    'read_logs_from_file',
+    'api_logs',
+    'api_logs_error_filter',
+    'api_logs_search',
+    'api_logs_error_filter_warm',
+    'api_logs_search_warm',
+    'api_stats',
+    'api_stats_warm',
+    'get_last_successful_dns_ip',
+    'log_dns_update',
+    'view_logs_stats',
+    'view_logs_failed',
+    'view_logs_recent',
+]
+
+def max_rss_kb():
+    """Peak resident set size of this process in KB."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+def prepare_case(case, log_file):
+    """
+    Import what the case needs and return a zero-argument callable to measure.
+    Imports happen here so they are not counted in the measurement.
+    """
+    sys.path.insert(0, REPO_DIR)
+    os.environ['DNS_LOG_FILE'] = log_file
+    os.environ['ENABLE_PASSWORD_AUTH'] = 'false'
+
+    if case.startswith('view_logs_'):
+        import view_logs
+        argv = ['view_logs.py', case[len('view_logs_'):]]
+
+        def run():
+            sys.argv = argv
+            with contextlib.redirect_stdout(io.StringIO()):
+                view_logs.main()
+        return run
+
+    import app as app_module
+    client = app_module.app.test_client()
+
+    if case == 'read_logs_from_file':
+        return app_module.read_logs_from_file
+    if case == 'get_last_successful_dns_ip':
+        return app_module.get_last_successful_dns_ip
+    if case.startswith('api_'):
+        url = {
+            'api_logs': '/api/logs?page=1',
+            'api_logs_error_filter': '/api/logs?page=1&filter=error',
+            'api_logs_search': '/api/logs?page=1&search=203.',
+            'api_stats': '/api/stats',
+        }[case.replace('_warm', '')]
+        if case.endswith('_warm'):
+            # Filter after an unfiltered page has been served for the same log version
+            client.get('/api/logs?page=1')
+
+        def run():
+            response = client.get(url)
+            assert response.status_code == 200, response.status_code
+        return run
+    if case == 'log_dns_update':
+        # Appends go to a scratch file so the benchmark log is left untouched
+        scratch = tempfile.NamedTemporaryFile(prefix='bench_write_', suffix='.log', delete=False)
+        scratch.close()
+        os.environ['DNS_LOG_FILE'] = scratch.name
+        context = app_module.app.test_request_context('/update-dns', method='POST',
+                                                       headers={'User-Agent': 'curl/8.4.0'})
+
+        def run():
+            with context:
+                for i in range(LOG_WRITE_COUNT):
+                    app_module.log_dns_update('203.0.113.10', '203.0.113.10', 'home.example.com',
+                                              'success', change_id=f'/change/C{i:020d}', auth_method='header')
+            os.unlink(scratch.name)
+        return run
+    raise ValueError(f"Unknown case: {case}")
+
+def run_worker(case, log_file, trace):
+    """Measure one case in this process and print the result as JSON."""
+    logging.disable(logging.CRITICAL)
+    func = prepare_case(case, log_file)
+    rss_before = max_rss_kb()
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    wall_ms = (time.perf_counter() - start) * 1000
+    result = {'wall_ms': round(wall_ms, 2)}
+    if trace:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['alloc_peak_kb'] = peak // 1024
+    else:
+        result['max_rss_kb'] = max_rss_kb()
+        result['rss_before_kb'] = rss_before
+    print(json.dumps(result))
+
+def measure(case, log_file, repeat):
+    """Run a case in fresh processes: `repeat` timed runs plus one traced run."""
+    def spawn(trace):
+        command = [sys.executable, os.path.abspath(__file__), '--worker', case, log_file]
+        if trace:
+            command.append('--trace')
+        output = subprocess.run(command, capture_output=True, text=True, check=True, cwd=REPO_DIR).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    runs = [spawn(False) for _ in range(repeat)]
+    traced = spawn(True)
+    wall = sorted(run['wall_ms'] for run in runs)
+    result = {
+        'wall_ms': wall[len(wall) // 2],
+        'wall_ms_min': wall[0],
+        'max_rss_kb': max(run['max_rss_kb'] for run in runs),
+        'rss_delta_kb': max(run['max_rss_kb'] - run['rss_before_kb'] for run in runs),
+        'alloc_peak_kb': traced['alloc_peak_kb'],
+    }
+    if case == 'log_dns_update':
+        result['per_entry_us'] = round(result['wall_ms'] * 1000 / LOG_WRITE_COUNT, 1)
+    return result
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=REPO_DIR).stdout.strip() or None
+    except OSError:
+        return None
+
+def run_suite(sizes, cases, repeat, data_dir):
+    """Run every case at every size. Returns the results document."""
+    sys.path.insert(0, BENCH_DIR)
+    from generate_logs import generate_logs
+
+    results = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'results': {},
+    }
+    for size in sizes:
+        log_file = os.path.join(data_dir, f'dns_updates_{size}.log')
+        if not os.path.exists(log_file):
+            print(f"📝 Generating {size} entries...", file=sys.stderr)
+            generate_logs(log_file, size)
+        results['results'][str(size)] = {}
+        for case in cases:
+            result = measure(case, log_file, repeat)
+            results['results'][str(size)][case] = result
+            print(f"  {size:>9} {case:<28} {result['wall_ms']:>10.1f} ms  "
+                  f"rss {result['max_rss_kb'] / 1024:>8.1f} MB  alloc {result['alloc_peak_kb'] / 1024:>8.1f} MB",
+                  file=sys.stderr)
+    return results
+
+def compare(before_path, after_path):
+    """Print the change between two result files."""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"📊 {before.get('revision')} -> {after.get('revision')}")
+    print(f"{'size':>9} {'case':<28} {'wall':>18} {'rss':>18} {'alloc':>18}")
+    for size, cases in after['results'].items():
+        for case, new in cases.items():
+            old = before['results'].get(size, {}).get(case)
+            if not old:
+                continue
+            cells = []
+            for key in ('wall_ms', 'max_rss_kb', 'alloc_peak_kb'):
+                ratio = new[key] / old[key] if old[key] else float('nan')
+                cells.append(f"{ratio:>9.2f}x ({new[key]:>6.0f})")
+            print(f"{size:>9} {case:<28} {' '.join(cells)}")
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Benchmark the log subsystem')
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help='Comma-separated log sizes (entries)')
+    parser.add_argument('--cases', default=','.join(CASES), help='Comma-separated cases to run')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per case (median reported)')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'dns-update-bench'),
+                        help='Where generated logs are cached')
+    parser.add_argument('--output', help='Write JSON results to this file (default: stdout)')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='Compare two result files')
+    parser.add_argument('--worker', nargs=2, metavar=('CASE', 'LOG_FILE'), help=argparse.SUPPRESS)
+    parser.add_argument('--trace', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker[0], args.worker[1], args.trace)
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    sizes = [int(float(s)) for s in args.sizes.split(',')]
+    cases = args.cases.split(',')
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        print(f"❌ Unknown cases: {', '.join(unknown)}. Available: {', '.join(CASES)}")
+        sys.exit(1)
+
+    results = run_suite(sizes, cases, args.repeat, args.data_dir)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        print(f"✅ Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Per-entry memory footprint of the in-memory log entry representations.
+Reads a synthetic log into a list of plain dicts (json.loads, as before
+LogEntry) and into a list of LogEntry objects (read_logs_from_single_file),
+each in a fresh process, and reports the memory the list retains per entry
+(traced allocations and resident set size) and the read time.
+
+Usage:
+  python benchmarks/entry_memory.py                  - 10^6 entries
+  python benchmarks/entry_memory.py --size 100000
+"""
+
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+REPRESENTATIONS = ['dict', 'LogEntry']
+
+def current_rss_kb():
+    """Current resident set size of this process in KB (Linux), else the peak."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss // 1024 if sys.platform == 'darwin' else rss
+
+def read_dicts(log_file):
+    logs = []
+    with open(log_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                logs.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return logs
+
+def run_worker(representation, log_file, trace):
+    """Read the log in this process and print what the entries retain as JSON."""
+    logging.disable(logging.CRITICAL)
+    sys.path.insert(0, REPO_DIR)
+    import app as app_module
+    read = read_dicts if representation == 'dict' else app_module.read_logs_from_single_file
+
+    if trace:
+        tracemalloc.start()
+    rss_before = current_rss_kb()
+    start = time.perf_counter()
+    logs = read(log_file)
+    result = {'entries': len(logs), 'read_ms': round((time.perf_counter() - start) * 1000, 1),
+              'rss_per_entry': round((current_rss_kb() - rss_before) * 1024 / len(logs), 1)}
+    if trace:
+        result['bytes_per_entry'] = round(tracemalloc.get_traced_memory()[0] / len(logs), 1)
+        tracemalloc.stop()
+    print(json.dumps(result))
+
+def measure(representation, log_file):
+    """Run a representation in fresh processes: one timed run plus one traced run."""
+    def spawn(trace):
+        command = [sys.executable, os.path.abspath(__file__), '--worker', representation, log_file]
+        if trace:
+            command.append('--trace')
+        output = subprocess.run(command, capture_output=True, text=True, check=True, cwd=REPO_DIR).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    result = spawn(False)
+    result['bytes_per_entry'] = spawn(True)['bytes_per_entry']
+    return result
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Measure the memory retained per log entry')
+    parser.add_argument('--size', type=lambda s: int(float(s)), default=10 ** 6, help='Log size (entries)')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'dns-update-bench'),
+                        help='Where generated logs are cached')
+    parser.add_argument('--worker', nargs=2, metavar=('REPRESENTATION', 'LOG_FILE'), help=argparse.SUPPRESS)
+    parser.add_argument('--trace', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker[0], args.worker[1], args.trace)
+        return
+
+    sys.path.insert(0, BENCH_DIR)
+    from generate_logs import generate_logs
+    os.makedirs(args.data_dir, exist_ok=True)
+    log_file = os.path.join(args.data_dir, f'dns_updates_{args.size}.log')
+    if not os.path.exists(log_file):
+        print(f"📝 Generating {args.size} entries...", file=sys.stderr)
+        generate_logs(log_file, args.size)
+
+    print(f"{'representation':<16} {'entries':>9} {'bytes/entry':>12} {'rss/entry':>10} {'read':>10}")
+    results = {}
+    for representation in REPRESENTATIONS:
+        result = results[representation] = measure(representation, log_file)
+        print(f"{representation:<16} {result['entries']:>9} {result['bytes_per_entry']:>12.0f} "
+              f"{result['rss_per_entry']:>10.0f} {result['read_ms']:>8.0f} ms")
+    ratio = results['dict']['bytes_per_entry'] / results['LogEntry']['bytes_per_entry']
+    print(f"LogEntry retains {ratio:.1f}x less memory per entry than dict")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Local Route53 stand-in for load testing the DNS Update Service.
+Speaks enough of the Route53 REST/XML API for boto3: ChangeResourceRecordSets,
+GetChange, GetHostedZoneCount and ListResourceRecordSets, with configurable
+latency and throttling.
+
+Usage:
+  python benchmarks/fake_route53.py --port 8053 --latency-ms 80 --rate 5
+
+Then start the service against it:
+  ROUTE53_ENDPOINT_URL=http://127.0.0.1:8053 AWS_ACCESS_KEY_ID=test \\
+  AWS_SECRET_ACCESS_KEY=test python app.py
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from urllib.parse import parse_qs
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rate_limit import TokenBucket
+
+XMLNS = 'https://route53.amazonaws.com/doc/2013-04-01/'
+
+CHANGE_PATH = re.compile(r'^/2013-04-01/hostedzone/([^/]+)/rrset/?$')
+GET_CHANGE_PATH = re.compile(r'^/2013-04-01/change/([^/]+)$')
+ZONE_COUNT_PATH = re.compile(r'^/2013-04-01/hostedzonecount$')
+
+
+class FakeRoute53:
+    """
+    State and behaviour of the fake Route53 account.
+
+    `rate` is the account request rate in requests per second (0 disables
+    throttling), `throttle_probability` throttles a random fraction of
+    requests, and `latency_ms`/`jitter_ms` delay every response.
+    """
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, rate=0.0, burst=5, throttle_probability=0.0,
+                 insync_after=0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate = rate
+        self.burst = burst
+        self.throttle_probability = throttle_probability
+        self.insync_after = insync_after
+        self.records = {}
+        self.changes = {}
+        self.counters = {'requests': 0, 'throttled': 0, 'changes': 0, 'list_calls': 0}
+        self._bucket = TokenBucket(burst, time.monotonic())
+        self._lock = threading.Lock()
+
+    def admit(self):
+        """Count a request and decide whether to throttle it."""
+        with self._lock:
+            self.counters['requests'] += 1
+            throttled = random.random() < self.throttle_probability
+            if not throttled and self.rate > 0:
+                throttled = self._bucket.take(self.burst, self.rate, time.monotonic()) > 0
+            if throttled:
+                self.counters['throttled'] += 1
+        return not throttled
+
+    def delay(self):
+        """Sleep for the configured latency."""
+        delay_ms = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000.0)
+
+    def apply_changes(self, zone_id, body):
+        """Apply a ChangeBatch XML document. Returns the new change id."""
+        root = ET.fromstring(body)
+        ns = {'r': XMLNS}
+        with self._lock:
+            for change in root.iterfind('.//r:Change', ns):
+                action = change.findtext('r:Action', namespaces=ns)
+                rrset = change.find('r:ResourceRecordSet', ns)
+                name = rrset.findtext('r:Name', namespaces=ns)
+                record_type = rrset.findtext('r:Type', namespaces=ns)
+                key = (zone_id, name.rstrip('.') + '.', record_type)
+                if action == 'DELETE':
+                    self.records.pop(key, None)
+                else:
+                    self.records[key] = {
+                        'ttl': int(rrset.findtext('r:TTL', default='300', namespaces=ns)),
+                        'values': [v.text for v in rrset.iterfind('.//r:ResourceRecord/r:Value', ns)],
+                    }
+            change_id = 'C' + uuid.uuid4().hex[:20].upper()
+            self.changes[change_id] = time.monotonic()
+            self.counters['changes'] += 1
+        return change_id
+
+    def list_records(self, zone_id, start_name=None, start_type=None, max_items=300):
+        """
+        Get one page of a zone's record sets in Route53 order (labels compared
+        right to left). Returns (records, next (name, type) or None).
+        """
+        def order(key):
+            return (list(reversed(key[1].rstrip('.').split('.'))), key[2])
+
+        with self._lock:
+            self.counters['list_calls'] += 1
+            keys = sorted((key for key in self.records if key[0] == zone_id), key=order)
+            if start_name:
+                start = order((zone_id, start_name.rstrip('.') + '.', start_type or ''))
+                keys = [key for key in keys if order(key) >= start]
+            page = [(key[1], key[2], self.records[key]) for key in keys[:max_items]]
+        following = keys[max_items] if len(keys) > max_items else None
+        return page, (following[1], following[2]) if following else None
+
+    def change_status(self, change_id):
+        """PENDING until `insync_after` seconds have passed, then INSYNC."""
+        submitted = self.changes.get(change_id)
+        if submitted is None:
+            return None
+        return 'INSYNC' if time.monotonic() - submitted >= self.insync_after else 'PENDING'
+
+
+def change_info_xml(change_id, status):
+    submitted_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+    return (f'<ChangeInfo><Id>/change/{change_id}</Id><Status>{status}</Status>'
+            f'<SubmittedAt>{submitted_at}</SubmittedAt></ChangeInfo>')
+
+
+def record_sets_xml(records, next_record, max_items):
+    parts = ['<ResourceRecordSets>']
+    for name, record_type, record in records:
+        values = ''.join(f'<ResourceRecord><Value>{v}</Value></ResourceRecord>' for v in record['values'])
+        parts.append(f'<ResourceRecordSet><Name>{name}</Name><Type>{record_type}</Type><TTL>{record["ttl"]}</TTL>'
+                     f'<ResourceRecords>{values}</ResourceRecords></ResourceRecordSet>')
+    parts.append('</ResourceRecordSets>')
+    if next_record:
+        parts.append(f'<IsTruncated>true</IsTruncated><NextRecordName>{next_record[0]}</NextRecordName>'
+                     f'<NextRecordType>{next_record[1]}</NextRecordType>')
+    else:
+        parts.append('<IsTruncated>false</IsTruncated>')
+    parts.append(f'<MaxItems>{max_items}</MaxItems>')
+    return ''.join(parts)
+
+
+def error_xml(code, message):
+    return (f'<?xml version="1.0" encoding="UTF-8"?><ErrorResponse xmlns="{XMLNS}">'
+            f'<Error><Type>Sender</Type><Code>{code}</Code><Message>{message}</Message></Error>'
+            f'<RequestId>{uuid.uuid4()}</RequestId></ErrorResponse>')
+
+
+def make_handler(route53):
+    """Build a request handler class bound to a FakeRoute53 instance."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass  # Keep load tests quiet
+
+        def send_xml(self, status, body):
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/xml')
+            self.send_header('Content-Length', str(len(data)))
+            self.send_header('x-amzn-RequestId', str(uuid.uuid4()))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def handle_request(self, method):
+            length = int(self.headers.get('Content-Length', 0))
+            body = self.rfile.read(length) if length else b''
+            route53.delay()
+            if not route53.admit():
+                return self.send_xml(400, error_xml('Throttling', 'Rate exceeded'))
+
+            path, _, query = self.path.partition('?')
+            params = {key: values[0] for key, values in parse_qs(query).items()}
+            match = CHANGE_PATH.match(path)
+            if method == 'GET' and match:
+                max_items = min(int(params.get('maxitems', 300)), 300)
+                records, next_record = route53.list_records(match.group(1), params.get('name'),
+                                                            params.get('type'), max_items)
+                return self.send_xml(200, f'<?xml version="1.0" encoding="UTF-8"?>'
+                                          f'<ListResourceRecordSetsResponse xmlns="{XMLNS}">'
+                                          f'{record_sets_xml(records, next_record, max_items)}'
+                                          f'</ListResourceRecordSetsResponse>')
+            if method == 'POST' and match:
+                change_id = route53.apply_changes(match.group(1), body)
+                return self.send_xml(200, f'<?xml version="1.0" encoding="UTF-8"?>'
+                                          f'<ChangeResourceRecordSetsResponse xmlns="{XMLNS}">'
+                                          f'{change_info_xml(change_id, "PENDING")}'
+                                          f'</ChangeResourceRecordSetsResponse>')
+            match = GET_CHANGE_PATH.match(path)
+            if method == 'GET' and match:
+                status = route53.change_status(match.group(1))
+                if status is None:
+                    return self.send_xml(404, error_xml('NoSuchChange', 'No such change'))
+                return self.send_xml(200, f'<?xml version="1.0" encoding="UTF-8"?>'
+                                          f'<GetChangeResponse xmlns="{XMLNS}">'
+                                          f'{change_info_xml(match.group(1), status)}</GetChangeResponse>')
+            if method == 'GET' and ZONE_COUNT_PATH.match(path):
+                return self.send_xml(200, f'<?xml version="1.0" encoding="UTF-8"?>'
+                                          f'<GetHostedZoneCountResponse xmlns="{XMLNS}">'
+                                          f'<HostedZoneCount>1</HostedZoneCount></GetHostedZoneCountResponse>')
+            return self.send_xml(400, error_xml('InvalidInput', f'Unsupported request {method} {path}'))
+
+        def do_GET(self):
+            self.handle_request('GET')
+
+        def do_POST(self):
+            self.handle_request('POST')
+
+    return Handler
+
+
+def start_server(route53, host='127.0.0.1', port=0):
+    """
+    Start the fake Route53 server in a background thread.
+    Returns (server, endpoint_url).
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(route53))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='fake-route53', daemon=True).start()
+    return server, f'http://{host}:{server.server_address[1]}'
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Local Route53 stand-in for load testing')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8053)
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='Mean response latency')
+    parser.add_argument('--jitter-ms', type=float, default=20.0, help='Uniform latency jitter')
+    parser.add_argument('--rate', type=float, default=5.0, help='Account request rate per second (0 = unlimited)')
+    parser.add_argument('--burst', type=int, default=5, help='Account request burst')
+    parser.add_argument('--throttle-probability', type=float, default=0.0,
+                        help='Fraction of requests throttled at random')
+    parser.add_argument('--insync-after', type=float, default=0.0, help='Seconds until a change is INSYNC')
+    args = parser.parse_args()
+
+    route53 = FakeRoute53(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate=args.rate,
+                          burst=args.burst, throttle_probability=args.throttle_probability,
+                          insync_after=args.insync_after)
+    server, endpoint_url = start_server(route53, args.host, args.port)
+    print(f"🛰️  Fake Route53 listening on {endpoint_url}")
+    print(f"   Set ROUTE53_ENDPOINT_URL={endpoint_url} for the service")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"   requests={route53.counters['requests']} changes={route53.counters['changes']} "
+                  f"throttled={route53.counters['throttled']}")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Synthetic dns_updates.log generator for benchmarks.
+Produces entries in the same format as app.log_dns_update with realistic
+distributions: a few hosts account for most updates (Zipf), most updates
+succeed, failures are mostly bad passwords, and user agents come from a
+small set of router/cron clients.
+
+Usage:
+  python benchmarks/generate_logs.py 100000 /tmp/dns_updates.log
+  python benchmarks/generate_logs.py 1000000 /tmp/big.log --days 365 --seed 7
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+DOMAIN_NAME = 'home.example.com'
+
+USER_AGENTS = [
+    ('curl/7.68.0', 30),
+    ('curl/8.4.0', 20),
+    ('python-requests/2.31.0', 15),
+    ('Wget/1.21.2', 10),
+    ('Mozilla/5.0 (Linux; OpenWrt 23.05) ddns-scripts/2.8.2', 10),
+    ('RouterOS/7.12 fetch', 8),
+    ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36', 5),
+    ('', 2),
+]
+
+AUTH_METHODS = [('header', 50), ('combined', 35), ('query', 10), (None, 5)]
+
+# (weight, error message template); None marks a successful update
+OUTCOMES = [
+    (92.0, None),
+    (4.8, 'Authentication failed'),
+    (2.4, 'IP address mismatch. Requested: {ip}, Requester: {requester}'),
+    (0.5, 'AWS Route53 client not available'),
+    (0.3, 'Domain name or hosted zone not configured'),
+]
+
+def weighted(pairs):
+    """Split [(value, weight), ...] into (values, cumulative weights) for random.choices."""
+    values = [value for value, _ in pairs]
+    cumulative = []
+    total = 0
+    for _, weight in pairs:
+        total += weight
+        cumulative.append(total)
+    return values, cumulative
+
+def random_ip(rng):
+    """Random public-looking IPv4 address."""
+    return f'{rng.choice([24, 49, 73, 81, 98, 103, 118, 151, 176, 203])}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}'
+
+def generate_entries(count, seed=42, days=365, end_time=None):
+    """
+    Yield `count` synthetic log entries in chronological order.
+    """
+    rng = random.Random(seed)
+    end_time = end_time or time.time()
+    start_time = end_time - days * 86400
+    step = (end_time - start_time) / max(1, count)
+
+    # A small population of hosts, updated with Zipf-like frequency
+    host_count = max(20, count // 2000)
+    host_ips = [random_ip(rng) for _ in range(host_count)]
+    host_weights = [1.0 / (rank + 1) for rank in range(host_count)]
+    hosts = list(range(host_count))
+    _, host_cumulative = weighted(list(zip(hosts, host_weights)))
+
+    user_agents, ua_cumulative = weighted(USER_AGENTS)
+    auth_methods, auth_cumulative = weighted(AUTH_METHODS)
+    outcomes, outcome_cumulative = weighted([(message, weight) for weight, message in OUTCOMES])
+
+    for i in range(count):
+        timestamp = start_time + i * step + rng.random() * step
+        host = rng.choices(hosts, cum_weights=host_cumulative)[0]
+        # Dynamic addresses change now and then
+        if rng.random() < 0.01:
+            host_ips[host] = random_ip(rng)
+        ip_address = host_ips[host]
+        requester_ip = ip_address
+        message = rng.choices(outcomes, cum_weights=outcome_cumulative)[0]
+        if message is not None and message.startswith('IP address mismatch'):
+            requester_ip = random_ip(rng)
+            message = message.format(ip=ip_address, requester=requester_ip)
+
+        auth_method = rng.choices(auth_methods, cum_weights=auth_cumulative)[0]
+        # Some routers have moved to per-client API tokens
+        token_id = f'router-{host:04d}' if auth_method == 'header' and host % 3 == 0 else None
+
+        yield {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(timestamp))
+                         + f'.{int((timestamp % 1) * 1e6):06d}+00:00',
+            'ip_address': ip_address,
+            'requester_ip': requester_ip,
+            'domain_name': DOMAIN_NAME,
+            'status': 'success' if message is None else 'error',
+            'change_id': f'/change/C{rng.getrandbits(80):020X}' if message is None else None,
+            'error_message': message,
+            'auth_method': auth_method,
+            'token_id': token_id,
+            'user_agent': rng.choices(user_agents, cum_weights=ua_cumulative)[0],
+        }
+
+def generate_logs(path, count, seed=42, days=365):
+    """Write `count` synthetic entries to `path` as NDJSON."""
+    with open(path, 'w', encoding='utf-8') as f:
+        batch = []
+        for entry in generate_entries(count, seed=seed, days=days):
+            batch.append(json.dumps(entry))
+            if len(batch) >= 10000:
+                f.write('\n'.join(batch) + '\n')
+                batch = []
+        if batch:
+            f.write('\n'.join(batch) + '\n')
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Generate a synthetic dns_updates.log')
+    parser.add_argument('count', type=int, help='Number of entries')
+    parser.add_argument('path', help='Output file')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--days', type=float, default=365, help='Time span covered by the log')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    generate_logs(args.path, args.count, seed=args.seed, days=args.days)
+    print(f"✅ Wrote {args.count} entries to {args.path} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Startup time check for the DNS Update Service.
+Measures the cost of importing the app with `python -X importtime` and the
+time until the first /health response, and fails if either exceeds its budget.
+
+Usage:
+  python benchmarks/import_time.py                 - Print a summary
+  python benchmarks/import_time.py --json          - Machine-readable output
+  IMPORT_TIME_BUDGET_MS=300 python benchmarks/import_time.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budgets in milliseconds (override with environment variables)
+IMPORT_TIME_BUDGET_MS = float(os.environ.get('IMPORT_TIME_BUDGET_MS', 400))
+HEALTH_TIME_BUDGET_MS = float(os.environ.get('HEALTH_TIME_BUDGET_MS', 600))
+
+# Modules that must never be imported just to start serving
+FORBIDDEN_MODULES = ['boto3', 'botocore']
+
+HEALTH_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import app
+response = app.app.test_client().get('/health')
+elapsed = (time.perf_counter() - start) * 1000
+assert response.status_code == 200, response.status_code
+print(elapsed)
+print(','.join(m for m in %r if m in sys.modules))
+""" % (FORBIDDEN_MODULES,)
+
+def measure_import_time():
+    """
+    Run `python -X importtime -c "import app"` and parse the report.
+    Returns (total_ms, [(module, cumulative_ms), ...] slowest first) where the
+    module list holds the direct imports of app.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True
+    )
+    modules = []
+    children = []
+    total_ms = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name_field = line[len('import time:'):].split('|')
+        name = name_field.strip()
+        # The report indents nested imports by two spaces per level and lists children before parents
+        depth = (len(name_field) - len(name_field.lstrip()) - 1) // 2
+        cumulative_ms = int(cumulative_us) / 1000.0
+        if depth == 1:
+            children.append((name, cumulative_ms))
+        elif depth == 0:
+            if name == 'app':
+                total_ms = cumulative_ms
+                modules = children
+            children = []
+    modules.sort(key=lambda x: x[1], reverse=True)
+    return total_ms, modules
+
+def measure_time_to_health():
+    """
+    Time from the start of `import app` to the first /health response.
+    Returns (elapsed_ms, forbidden modules that were imported).
+    """
+    result = subprocess.run(
+        [sys.executable, '-c', HEALTH_SCRIPT],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True
+    )
+    lines = result.stdout.strip().splitlines()
+    loaded = [m for m in lines[1].split(',') if m] if len(lines) > 1 else []
+    return float(lines[0]), loaded
+
+def main():
+    """Main function."""
+    import_ms, modules = measure_import_time()
+    health_ms, loaded = measure_time_to_health()
+
+    report = {
+        'import_ms': round(import_ms, 1),
+        'import_budget_ms': IMPORT_TIME_BUDGET_MS,
+        'time_to_health_ms': round(health_ms, 1),
+        'time_to_health_budget_ms': HEALTH_TIME_BUDGET_MS,
+        'forbidden_modules_loaded': loaded,
+        'slowest_imports': [{'module': name, 'ms': round(ms, 1)} for name, ms in modules[:10]],
+    }
+    ok = import_ms <= IMPORT_TIME_BUDGET_MS and health_ms <= HEALTH_TIME_BUDGET_MS and not loaded
+
+    if '--json' in sys.argv:
+        print(json.dumps(report, indent=2))
+    else:
+        print("⏱️  DNS Update Service startup time")
+        print("=" * 40)
+        print(f"import app:      {import_ms:.1f} ms (budget {IMPORT_TIME_BUDGET_MS:.0f} ms)")
+        print(f"first /health:   {health_ms:.1f} ms (budget {HEALTH_TIME_BUDGET_MS:.0f} ms)")
+        if loaded:
+            print(f"❌ Imported at startup but should be lazy: {', '.join(loaded)}")
+        print("\nSlowest imports:")
+        for name, ms in modules[:10]:
+            print(f"  {ms:8.1f} ms  {name}")
+        print("\n✅ Within budget" if ok else "\n❌ Over budget")
+
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
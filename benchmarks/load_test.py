@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Load generator for the DNS Update Service.
+Drives /update-dns and the read APIs at a target concurrency, or replays an
+existing dns_updates.log at N× speed, and reports requests/sec and
+p50/p99/p999 latency per endpoint.
+
+Usage:
+  python benchmarks/load_test.py --concurrency 50 --duration 30
+  python benchmarks/load_test.py --mix update=1 --concurrency 200
+  python benchmarks/load_test.py --replay /opt/dns-update/logs/dns_updates.log --speed 60
+  python benchmarks/load_test.py --json > results.json
+
+Run the service with ENABLE_RATE_LIMIT=false and ROUTE53_ENDPOINT_URL pointing
+at benchmarks/fake_route53.py to measure the service rather than its limits.
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+ENDPOINTS = {
+    'update': ('POST', '/update-dns'),
+    'logs': ('GET', '/api/logs'),
+    'stats': ('GET', '/api/stats'),
+    'health': ('GET', '/health'),
+}
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+class Results:
+    """Thread-safe per-endpoint latency and status recorder."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, endpoint, status, seconds):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            self.statuses[endpoint][status] += 1
+
+    def summary(self):
+        """Summarise results per endpoint (latencies in milliseconds)."""
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        report = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            report[endpoint] = {
+                'requests': len(values),
+                'rps': round(len(values) / elapsed, 1) if elapsed > 0 else None,
+                'p50_ms': round(percentile(values, 0.50) * 1000, 2),
+                'p99_ms': round(percentile(values, 0.99) * 1000, 2),
+                'p999_ms': round(percentile(values, 0.999) * 1000, 2),
+                'max_ms': round(values[-1] * 1000, 2),
+                'statuses': {str(k): v for k, v in sorted(self.statuses[endpoint].items(), key=lambda x: str(x[0]))},
+            }
+        return {'elapsed_seconds': round(elapsed, 2), 'endpoints': report}
+
+def random_test_ip():
+    """Random address from the RFC 5737 documentation ranges."""
+    prefix = random.choice(['192.0.2', '198.51.100', '203.0.113'])
+    return f'{prefix}.{random.randint(1, 254)}'
+
+def send(session, base_url, endpoint, password, ip_address=None, requester_ip=None, results=None):
+    """Send one request and record its latency."""
+    method, path = ENDPOINTS[endpoint]
+    headers = {}
+    data = None
+    if password:
+        headers['X-Auth-Password'] = password
+    if endpoint == 'update':
+        ip_address = ip_address or random_test_ip()
+        headers['Content-Type'] = 'text/plain'
+        # Present as the requester so IP validation passes
+        headers['X-Forwarded-For'] = requester_ip or ip_address
+        data = ip_address
+    start = time.perf_counter()
+    try:
+        response = session.request(method, base_url + path, headers=headers, data=data, timeout=30)
+        status = response.status_code
+    except requests.exceptions.RequestException as e:
+        status = type(e).__name__
+    results.record(endpoint, status, time.perf_counter() - start)
+
+def parse_mix(mix):
+    """Parse 'update=8,logs=1,stats=1' into (endpoints, weights)."""
+    endpoints, weights = [], []
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}'. Choose from: {', '.join(ENDPOINTS)}")
+        endpoints.append(name)
+        weights.append(float(weight or 1))
+    return endpoints, weights
+
+def run_concurrency(base_url, password, concurrency, duration, mix):
+    """Keep `concurrency` workers busy for `duration` seconds."""
+    endpoints, weights = parse_mix(mix)
+    results = Results()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        session = requests.Session()  # one keep-alive connection per worker
+        while time.perf_counter() < deadline:
+            endpoint = random.choices(endpoints, weights)[0]
+            send(session, base_url, endpoint, password, results=results)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.finished = time.perf_counter()
+    return results
+
+def load_replay_entries(log_file):
+    """Read log entries to replay, oldest first."""
+    entries = []
+    with open(log_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                timestamp = datetime.fromisoformat(entry['timestamp']).timestamp()
+            except (json.JSONDecodeError, KeyError, ValueError):
+                continue
+            if entry.get('ip_address'):
+                entries.append((timestamp, entry))
+    entries.sort(key=lambda x: x[0])
+    return entries
+
+def run_replay(base_url, password, log_file, speed, concurrency):
+    """Replay /update-dns traffic from a log file at `speed`× the original rate."""
+    entries = load_replay_entries(log_file)
+    results = Results()
+    if not entries:
+        results.finished = time.perf_counter()
+        return results
+
+    local = threading.local()
+
+    def replay(entry):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        send(local.session, base_url, 'update', password, ip_address=entry['ip_address'],
+             requester_ip=entry.get('requester_ip'), results=results)
+
+    first_timestamp = entries[0][0]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for timestamp, entry in entries:
+            wait = (timestamp - first_timestamp) / speed - (time.perf_counter() - start)
+            if wait > 0:
+                time.sleep(wait)
+            executor.submit(replay, entry)
+    results.finished = time.perf_counter()
+    return results
+
+def print_summary(summary):
+    """Print a human-readable results table."""
+    print(f"\n📈 Load test results ({summary['elapsed_seconds']}s)")
+    print("=" * 86)
+    print(f"{'endpoint':<10}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'p999 ms':>10}{'max ms':>10}  statuses")
+    for endpoint, row in summary['endpoints'].items():
+        statuses = ' '.join(f"{k}:{v}" for k, v in row['statuses'].items())
+        print(f"{endpoint:<10}{row['requests']:>10}{row['rps']:>10}{row['p50_ms']:>10}{row['p99_ms']:>10}"
+              f"{row['p999_ms']:>10}{row['max_ms']:>10}  {statuses}")
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Load generator for the DNS Update Service')
+    parser.add_argument('--url', default='http://localhost:5000', help='Service base URL')
+    parser.add_argument('--password', default='', help='Password sent in X-Auth-Password')
+    parser.add_argument('--concurrency', type=int, default=20, help='Concurrent workers')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run (concurrency mode)')
+    parser.add_argument('--mix', default='update=8,logs=1,stats=1', help='Weighted endpoint mix')
+    parser.add_argument('--replay', metavar='LOG_FILE', help='Replay /update-dns traffic from a dns_updates.log')
+    parser.add_argument('--speed', type=float, default=1.0, help='Replay speed multiplier')
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip('/')
+    try:
+        if args.replay:
+            results = run_replay(base_url, args.password, args.replay, args.speed, args.concurrency)
+        else:
+            results = run_concurrency(base_url, args.password, args.concurrency, args.duration, args.mix)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    summary = results.summary()
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+Compact binary format for the DNS update log (LOG_FORMAT=compact).
+
+A JSON log line repeats every key name, the domain, the status and the
+user agent, and stores addresses and timestamps as text. A compact log
+starts with MAGIC and is a sequence of length-prefixed records:
+
+  <u32 payload length><u8 record type><payload>
+
+  'S'  string table entry (UTF-8); the n-th 'S' record is string n
+  'E'  log entry:
+         u16   presence bits of FIELDS
+         i64   timestamp as microseconds since the epoch (UTC)
+         2 x   address: u8 size (0, 4 or 16) + packed bytes
+         6 x   u32 string table reference (0 = None, else index + 1) for
+               domain_name, status, auth_method, token_id, error_message,
+               user_agent
+         u16   change_id length (0xFFFF = None) + UTF-8
+         u32   extras length + JSON object of everything else
+  'R'  raw NDJSON line, kept verbatim (lines that would not round-trip)
+
+String table entries are written just before the first entry using them,
+so the file is append-only. Writers hold an exclusive flock while they
+append and first read any string table entries other processes added.
+
+Every line is encoded so that converting back reproduces it exactly;
+entries that would not are stored as 'R' records.
+
+Usage:
+  python compact_log.py to-compact dns_updates.log dns_updates.clog
+  python compact_log.py to-ndjson dns_updates.clog dns_updates.log
+"""
+
+import argparse
+import fcntl
+import ipaddress
+import json
+import os
+import struct
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+
+MAGIC = b'DNSLOGC1'
+
+RECORD_HEADER = struct.Struct('<IB')
+STRING, ENTRY, RAW = ord('S'), ord('E'), ord('R')
+
+# Known fields in the order log_dns_update writes them
+FIELDS = ('timestamp', 'ip_address', 'requester_ip', 'domain_name', 'status', 'change_id',
+          'error_message', 'auth_method', 'token_id', 'user_agent')
+STRING_FIELDS = ('domain_name', 'status', 'auth_method', 'token_id', 'error_message', 'user_agent')
+FIELD_BITS = {name: 1 << i for i, name in enumerate(FIELDS)}
+
+ENTRY_HEAD = struct.Struct('<Hq')
+STRING_REFS = struct.Struct('<6I')
+U16 = struct.Struct('<H')
+U32 = struct.Struct('<I')
+NO_CHANGE_ID = 0xFFFF
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def is_compact_log(path):
+    """Check whether a file is a compact log."""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def format_timestamp(micros):
+    return (EPOCH + timedelta(microseconds=micros)).isoformat()
+
+
+def parse_timestamp(value):
+    """Get epoch microseconds for a UTC ISO timestamp that formats back identically, else None."""
+    if not isinstance(value, str) or not value.endswith('+00:00'):
+        return None
+    try:
+        delta = datetime.fromisoformat(value) - EPOCH
+    except ValueError:
+        return None
+    micros = (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+    return micros if format_timestamp(micros) == value else None
+
+
+def pack_address(value):
+    """Pack an IP address that formats back identically, else None."""
+    if not isinstance(value, str):
+        return None
+    try:
+        address = ipaddress.ip_address(value)
+    except ValueError:
+        return None
+    return address.packed if str(address) == value else None
+
+
+def unpack_address(packed):
+    return str(ipaddress.ip_address(packed))
+
+
+class StringTable:
+    """Maps strings to indexes; new strings are queued until written."""
+
+    def __init__(self):
+        self.strings = []
+        self.index = {}
+        self.pending = []
+
+    def add(self, value):
+        self.index[value] = len(self.strings)
+        self.strings.append(value)
+
+    def ref(self, value):
+        """Get the reference for a string, queueing it if it is new."""
+        if value is None:
+            return 0
+        index = self.index.get(value)
+        if index is None:
+            self.add(value)
+            self.pending.append(value)
+            index = len(self.strings) - 1
+        return index + 1
+
+    def rollback(self):
+        """Forget queued strings (the entry using them was not written)."""
+        for value in self.pending:
+            del self.index[value]
+        del self.strings[len(self.strings) - len(self.pending):]
+        self.pending = []
+
+    def take_pending(self):
+        pending, self.pending = self.pending, []
+        return b''.join(encode_record(STRING, value.encode('utf-8')) for value in pending)
+
+
+def encode_record(record_type, payload):
+    return RECORD_HEADER.pack(len(payload), record_type) + payload
+
+
+def encode_entry(entry, table):
+    """Encode a log entry dict as an 'E' record payload (known fields packed, the rest in extras)."""
+    presence = 0
+    extras = {}
+    for name, value in entry.items():
+        if name in FIELD_BITS:
+            presence |= FIELD_BITS[name]
+        else:
+            extras[name] = value
+
+    def take(name, value):
+        # A known field that cannot be packed moves to extras
+        nonlocal presence
+        if presence & FIELD_BITS[name] and value is None and entry[name] is not None:
+            presence &= ~FIELD_BITS[name]
+            extras[name] = entry[name]
+        return value
+
+    micros = parse_timestamp(entry.get('timestamp'))
+    if presence & FIELD_BITS['timestamp'] and micros is None:
+        presence &= ~FIELD_BITS['timestamp']
+        extras['timestamp'] = entry['timestamp']
+    parts = []
+    for name in ('ip_address', 'requester_ip'):
+        packed = take(name, pack_address(entry.get(name)))
+        parts.append(bytes([len(packed)]) + packed if packed else b'\x00')
+
+    refs = []
+    for name in STRING_FIELDS:
+        value = entry.get(name)
+        refs.append(table.ref(take(name, value if isinstance(value, str) else None)))
+    parts.append(STRING_REFS.pack(*refs))
+
+    change_id = take('change_id', entry.get('change_id') if isinstance(entry.get('change_id'), str) else None)
+    change_id_bytes = change_id.encode('utf-8') if change_id is not None else b''
+    if change_id is None or len(change_id_bytes) >= NO_CHANGE_ID:
+        if change_id is not None:
+            presence &= ~FIELD_BITS['change_id']
+            extras['change_id'] = change_id
+        parts.append(U16.pack(NO_CHANGE_ID))
+    else:
+        parts.append(U16.pack(len(change_id_bytes)) + change_id_bytes)
+
+    extras_bytes = json.dumps(extras).encode('utf-8') if extras else b''
+    parts.append(U32.pack(len(extras_bytes)) + extras_bytes)
+    return ENTRY_HEAD.pack(presence, micros or 0) + b''.join(parts)
+
+
+def decode_entry(payload, strings):
+    """Decode an 'E' record payload into a log entry dict."""
+    presence, micros = ENTRY_HEAD.unpack_from(payload, 0)
+    offset = ENTRY_HEAD.size
+    addresses = []
+    for _ in range(2):
+        size = payload[offset]
+        addresses.append(unpack_address(payload[offset + 1:offset + 1 + size]) if size else None)
+        offset += 1 + size
+    refs = STRING_REFS.unpack_from(payload, offset)
+    offset += STRING_REFS.size
+    (length,) = U16.unpack_from(payload, offset)
+    offset += U16.size
+    change_id = None
+    if length != NO_CHANGE_ID:
+        change_id = payload[offset:offset + length].decode('utf-8')
+        offset += length
+    (length,) = U32.unpack_from(payload, offset)
+    offset += U32.size
+
+    values = {
+        'timestamp': format_timestamp(micros),
+        'ip_address': addresses[0],
+        'requester_ip': addresses[1],
+        'change_id': change_id,
+    }
+    for name, ref in zip(STRING_FIELDS, refs):
+        values[name] = strings[ref - 1] if ref else None
+    entry = {name: values[name] for name in FIELDS if presence & FIELD_BITS[name]}
+    if length:
+        entry.update(json.loads(payload[offset:offset + length]))
+    return entry
+
+
+def encode_line(line, table):
+    """
+    Encode one NDJSON line (without its newline) as records. Entries that
+    would not convert back to exactly the same line are kept raw.
+    Returns (records, is_raw).
+    """
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        entry = None
+    if isinstance(entry, dict) and json.dumps(entry) == line:
+        payload = encode_entry(entry, table)
+        if json.dumps(decode_entry(payload, table.strings)) == line:
+            return table.take_pending() + encode_record(ENTRY, payload), False
+        table.rollback()
+    return encode_record(RAW, line.encode('utf-8')), True
+
+
+def iter_records(data, offset=len(MAGIC)):
+    """Iterate over (type, payload) of complete records in a compact log buffer."""
+    end = len(data)
+    while offset + RECORD_HEADER.size <= end:
+        length, record_type = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size
+        if start + length > end:
+            break  # Incomplete record at the end of the file
+        yield record_type, data[start:start + length]
+        offset = start + length
+
+
+def iter_lines(data):
+    """Iterate over the NDJSON lines (without newline) a compact log converts back to."""
+    strings = []
+    for record_type, payload in iter_records(data):
+        if record_type == STRING:
+            strings.append(payload.decode('utf-8'))
+        elif record_type == ENTRY:
+            yield json.dumps(decode_entry(payload, strings))
+        elif record_type == RAW:
+            yield payload.decode('utf-8')
+
+
+def read_compact_log(path, factory=None):
+    """
+    Read the entries of a compact log file, as dicts or as built from each
+    dict by `factory`. Raw lines that are not valid JSON objects are
+    skipped, like invalid JSON lines in an NDJSON log.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a compact log")
+    logs = []
+    strings = []
+    for record_type, payload in iter_records(data):
+        if record_type == ENTRY:
+            entry = decode_entry(payload, strings)
+            logs.append(factory(entry) if factory else entry)
+        elif record_type == STRING:
+            strings.append(payload.decode('utf-8'))
+        elif record_type == RAW:
+            try:
+                entry = json.loads(payload.decode('utf-8'))
+            except ValueError:
+                continue
+            if isinstance(entry, dict):
+                logs.append(factory(entry) if factory else entry)
+    return logs
+
+
+def count_entries(f, offset, end):
+    """
+    Count entry records in an open compact log between `offset` and `end`.
+    Returns (count, offset after the last complete record).
+    """
+    f.seek(offset)
+    data = f.read(end - offset)
+    count = position = 0
+    while position + RECORD_HEADER.size <= len(data):
+        length, record_type = RECORD_HEADER.unpack_from(data, position)
+        if position + RECORD_HEADER.size + length > len(data):
+            break  # Incomplete record at the end of the file
+        if record_type != STRING:
+            count += 1
+        position += RECORD_HEADER.size + length
+    return count, offset + position
+
+
+class CompactLogWriter:
+    """
+    Appends entries to a compact log, sharing the file safely with other
+    processes. Like log_writer.AppendWriter it keeps the file open and
+    reopens it when the path is rotated.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+        self._file_id = None
+        self._pid = None
+        self._table = StringTable()
+        self._known_size = 0
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT | os.O_CLOEXEC, 0o666)
+        stat = os.fstat(self._fd)
+        self._file_id = (stat.st_dev, stat.st_ino)
+        self._pid = os.getpid()
+        self._table = StringTable()
+        self._known_size = 0
+
+    def _ensure_open(self):
+        if self._fd is not None and self._pid == os.getpid():
+            try:
+                stat = os.stat(self.path)
+                if (stat.st_dev, stat.st_ino) == self._file_id:
+                    return
+            except FileNotFoundError:
+                pass
+        self._open()
+
+    def _catch_up(self):
+        """Load string table entries appended since our last write (called under flock)."""
+        size = os.fstat(self._fd).st_size
+        if size == 0:
+            os.write(self._fd, MAGIC)
+            self._known_size = len(MAGIC)
+            return
+        if size == self._known_size:
+            return
+        data = os.pread(self._fd, size, 0) if self._known_size == 0 else None
+        if data is not None:
+            if not data.startswith(MAGIC):
+                raise ValueError(f"{self.path} is not a compact log; convert it with compact_log.py to-compact")
+            offset = len(MAGIC)
+        else:
+            data = os.pread(self._fd, size - self._known_size, self._known_size)
+            offset = 0
+        for record_type, payload in iter_records(data, offset):
+            if record_type == STRING:
+                self._table.add(payload.decode('utf-8'))
+        self._known_size = size
+
+    def write(self, entry):
+        """Append one log entry dict."""
+        with self._lock:
+            self._ensure_open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                self._catch_up()
+                try:
+                    data, _ = encode_line(json.dumps(entry), self._table)
+                except Exception:
+                    self._table.rollback()
+                    raise
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(self._fd, view):]
+                self._known_size += len(data)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def sync(self):
+        with self._lock:
+            if self._fd is not None:
+                os.fsync(self._fd)
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_compact_writer(path):
+    """Get the shared compact writer for a log file path."""
+    writer = _writers.get(path)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.setdefault(path, CompactLogWriter(path))
+    return writer
+
+
+def to_compact(source, destination):
+    """Convert an NDJSON log to a compact log. Returns (lines, raw lines)."""
+    table = StringTable()
+    lines = raw = 0
+    with open(source, 'r', encoding='utf-8', newline='') as src, open(destination, 'wb') as dst:
+        dst.write(MAGIC)
+        for line in src:
+            if not line.endswith('\n'):
+                raise ValueError(f"{source}: last line has no newline (incomplete write?)")
+            records, is_raw = encode_line(line[:-1], table)
+            raw += is_raw
+            dst.write(records)
+            lines += 1
+    return lines, raw
+
+
+def to_ndjson(source, destination):
+    """Convert a compact log back to NDJSON. Returns the number of lines."""
+    with open(source, 'rb') as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{source} is not a compact log")
+    lines = 0
+    with open(destination, 'w', encoding='utf-8', newline='') as dst:
+        for line in iter_lines(data):
+            dst.write(line + '\n')
+            lines += 1
+    return lines
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Convert DNS update logs between NDJSON and the compact format')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for command, help_text in (('to-compact', 'NDJSON -> compact'), ('to-ndjson', 'compact -> NDJSON')):
+        sub = subparsers.add_parser(command, help=help_text)
+        sub.add_argument('source')
+        sub.add_argument('destination')
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'to-compact':
+            lines, raw = to_compact(args.source, args.destination)
+            print(f"✅ Converted {lines} lines ({raw} kept verbatim)")
+        else:
+            lines = to_ndjson(args.source, args.destination)
+            print(f"✅ Converted {lines} lines")
+        before, after = os.path.getsize(args.source), os.path.getsize(args.destination)
+        print(f"   {before} -> {after} bytes")
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,43 +1,217 @@
+import importlib.util
+import ipaddress
 import os
 
+def read_config_file(path):
+    """
+    Read KEY=VALUE settings from a file in the same format as the systemd
+    EnvironmentFile (/etc/dns-update/env). Blank lines and comments are ignored.
+    """
+    settings = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('export '):
+                line = line[len('export '):]
+            key, separator, value = line.partition('=')
+            if not separator or not key.strip():
+                raise ValueError(f"{path}:{number}: expected KEY=VALUE")
+            value = value.strip()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in ('"', "'"):
+                value = value[1:-1]
+            settings[key.strip()] = value
+    return settings
+
+def load_environment():
+    """
+    Get the settings source: the process environment, overridden by
+    CONFIG_FILE if it is set.
+    """
+    env = dict(os.environ)
+    config_file = env.get('CONFIG_FILE')
+    if config_file:
+        env.update(read_config_file(config_file))
+    return env
+
+_env = load_environment()
+
 class Config:
     """Configuration class for the DNS Update Service."""
     
     # Flask Configuration
-    FLASK_HOST = os.environ.get('FLASK_HOST', '0.0.0.0')
-    FLASK_PORT = int(os.environ.get('FLASK_PORT', 5000))
-    FLASK_DEBUG = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
+    FLASK_HOST = _env.get('FLASK_HOST', '0.0.0.0')
+    FLASK_PORT = int(_env.get('FLASK_PORT', 5000))
+    FLASK_DEBUG = _env.get('FLASK_DEBUG', 'False').lower() == 'true'
+    FLASK_UNIX_SOCKET = _env.get('FLASK_UNIX_SOCKET', '')  # listen on this Unix socket instead of TCP
+    FLASK_UNIX_SOCKET_MODE = int(_env.get('FLASK_UNIX_SOCKET_MODE', '660'), 8)
+    
+    # Async serving mode (python asgi.py)
+    ASYNC_IO_WORKERS = int(_env.get('ASYNC_IO_WORKERS', 8))  # threads for log I/O and request handling
+    ASYNC_ROUTE53_WORKERS = int(_env.get('ASYNC_ROUTE53_WORKERS', 10))  # concurrent Route53 calls
+    ASYNC_MAX_BODY_SIZE = int(_env.get('ASYNC_MAX_BODY_SIZE', 65536))  # bytes
     
     # AWS Configuration
-    AWS_REGION = os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')
-    AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
-    AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
+    AWS_REGION = _env.get('AWS_DEFAULT_REGION', 'us-east-1')
+    AWS_ACCESS_KEY_ID = _env.get('AWS_ACCESS_KEY_ID')
+    AWS_SECRET_ACCESS_KEY = _env.get('AWS_SECRET_ACCESS_KEY')
+    
+    # Role-based AWS credentials (used when static keys are not set, or to assume a role)
+    AWS_ROLE_ARN = _env.get('AWS_ROLE_ARN')
+    AWS_ROLE_SESSION_NAME = _env.get('AWS_ROLE_SESSION_NAME', 'dns-update')
+    AWS_ROLE_DURATION = int(_env.get('AWS_ROLE_DURATION', 3600))  # seconds
+    AWS_CREDENTIAL_REFRESH_MARGIN = int(_env.get('AWS_CREDENTIAL_REFRESH_MARGIN', 1200))  # seconds before expiry
+    AWS_CREDENTIAL_CHECK_INTERVAL = int(_env.get('AWS_CREDENTIAL_CHECK_INTERVAL', 60))  # seconds
     
+    # Route53 API call scheduling (Route53 allows 5 requests per second per account)
+    ROUTE53_RATE_LIMIT = float(_env.get('ROUTE53_RATE_LIMIT', 5))  # requests per second
+    ROUTE53_BURST = int(_env.get('ROUTE53_BURST', 5))
+    ROUTE53_RETRY_DEADLINE = float(_env.get('ROUTE53_RETRY_DEADLINE', 20))  # seconds
+    ROUTE53_MAX_RETRIES = int(_env.get('ROUTE53_MAX_RETRIES', 5))
+
+    # Route53 connection tuning (botocore client settings)
+    ROUTE53_CONNECT_TIMEOUT = float(_env.get('ROUTE53_CONNECT_TIMEOUT', 5))  # seconds
+    ROUTE53_READ_TIMEOUT = float(_env.get('ROUTE53_READ_TIMEOUT', 15))  # seconds
+    ROUTE53_MAX_POOL_CONNECTIONS = int(_env.get('ROUTE53_MAX_POOL_CONNECTIONS', 10))
+    ROUTE53_TCP_KEEPALIVE = _env.get('ROUTE53_TCP_KEEPALIVE', 'True').lower() == 'true'
+    ROUTE53_RETRY_MODE = _env.get('ROUTE53_RETRY_MODE', 'standard')
+    # Throttling retries are handled by the Route53 scheduler, so botocore makes a single attempt by default
+    ROUTE53_MAX_ATTEMPTS = int(_env.get('ROUTE53_MAX_ATTEMPTS', 1))
+    ROUTE53_PREWARM = _env.get('ROUTE53_PREWARM', 'True').lower() == 'true'
+    ROUTE53_KEEP_WARM_INTERVAL = int(_env.get('ROUTE53_KEEP_WARM_INTERVAL', 0))  # seconds, 0 disables
+    # Override the Route53 endpoint (e.g. benchmarks/fake_route53.py for load testing)
+    ROUTE53_ENDPOINT_URL = _env.get('ROUTE53_ENDPOINT_URL') or None
+
     # DNS Configuration
-    DEFAULT_TTL = int(os.environ.get('DNS_TTL', 300))  # 5 minutes default
-    HOSTED_ZONE_ID = os.environ.get('HOSTED_ZONE_ID')
-    DOMAIN_NAME = os.environ.get('DOMAIN_NAME')
+    DEFAULT_TTL = int(_env.get('DNS_TTL', 300))  # 5 minutes default
+    HOSTED_ZONE_ID = _env.get('HOSTED_ZONE_ID')
+    DOMAIN_NAME = _env.get('DOMAIN_NAME')
     
     # IP Validation Configuration
-    ENABLE_IP_VALIDATION = os.environ.get('ENABLE_IP_VALIDATION', 'True').lower() == 'true'
-    ALLOWED_IPS = os.environ.get('ALLOWED_IPS', '').split(',') if os.environ.get('ALLOWED_IPS') else []
-    ALLOWED_SUBNETS = os.environ.get('ALLOWED_SUBNETS', '').split(',') if os.environ.get('ALLOWED_SUBNETS') else []
+    ENABLE_IP_VALIDATION = _env.get('ENABLE_IP_VALIDATION', 'True').lower() == 'true'
+    ALLOWED_IPS = _env.get('ALLOWED_IPS', '').split(',') if _env.get('ALLOWED_IPS') else []
+    ALLOWED_SUBNETS = _env.get('ALLOWED_SUBNETS', '').split(',') if _env.get('ALLOWED_SUBNETS') else []
+    # Peers whose X-Real-IP / X-Forwarded-For name the client for rate limiting (IPs or CIDRs; empty trusts none)
+    TRUSTED_PROXIES = _env.get('TRUSTED_PROXIES', '127.0.0.1,::1').split(',')
     
     # Password Authentication Configuration
-    ENABLE_PASSWORD_AUTH = os.environ.get('ENABLE_PASSWORD_AUTH', 'True').lower() == 'true'
-    AUTH_PASSWORD = os.environ.get('AUTH_PASSWORD', '')
+    ENABLE_PASSWORD_AUTH = _env.get('ENABLE_PASSWORD_AUTH', 'True').lower() == 'true'
+    AUTH_PASSWORD = _env.get('AUTH_PASSWORD', '')
+    # scrypt hash from `python password_hash.py`; preferred over the plaintext AUTH_PASSWORD
+    AUTH_PASSWORD_HASH = _env.get('AUTH_PASSWORD_HASH', '')
+    AUTH_CACHE_TTL = int(_env.get('AUTH_CACHE_TTL', 300))  # seconds a verified password is remembered
+    AUTH_CACHE_SIZE = int(_env.get('AUTH_CACHE_SIZE', 1024))
+    # Per-client API tokens managed with `python api_tokens.py`
+    API_TOKENS_FILE = _env.get('API_TOKENS_FILE', '')
+    API_TOKENS_CHECK_INTERVAL = int(_env.get('API_TOKENS_CHECK_INTERVAL', 5))  # seconds between file change checks
     
+    # Rate Limiting Configuration (applied in-process to /update-dns and /check)
+    ENABLE_RATE_LIMIT = _env.get('ENABLE_RATE_LIMIT', 'True').lower() == 'true'
+    RATE_LIMIT_PER_IP = float(_env.get('RATE_LIMIT_PER_IP', 10))  # requests per minute
+    RATE_LIMIT_IP_BURST = int(_env.get('RATE_LIMIT_IP_BURST', 20))
+    RATE_LIMIT_PER_CREDENTIAL = float(_env.get('RATE_LIMIT_PER_CREDENTIAL', 30))  # requests per minute
+    RATE_LIMIT_CREDENTIAL_BURST = int(_env.get('RATE_LIMIT_CREDENTIAL_BURST', 60))
+    RATE_LIMIT_MAX_KEYS = int(_env.get('RATE_LIMIT_MAX_KEYS', 10000))
+    # GET /check is meant to be polled, so it has buckets of its own
+    RATE_LIMIT_CHECK_PER_IP = float(_env.get('RATE_LIMIT_CHECK_PER_IP', 60))  # requests per minute
+    RATE_LIMIT_CHECK_IP_BURST = int(_env.get('RATE_LIMIT_CHECK_IP_BURST', 30))
+    RATE_LIMIT_CHECK_PER_CREDENTIAL = float(_env.get('RATE_LIMIT_CHECK_PER_CREDENTIAL', 180))  # requests per minute
+    RATE_LIMIT_CHECK_CREDENTIAL_BURST = int(_env.get('RATE_LIMIT_CHECK_CREDENTIAL_BURST', 90))
+
+    # Prometheus Metrics Configuration
+    ENABLE_METRICS = _env.get('ENABLE_METRICS', 'True').lower() == 'true'
+    # Directory for per-process metric files; set when running several worker processes
+    METRICS_DIR = _env.get('METRICS_DIR') or None
+
+    # Profiling Configuration
+    ENABLE_SERVER_TIMING = _env.get('ENABLE_SERVER_TIMING', 'True').lower() == 'true'
+    PROFILE_SAMPLE_RATE = int(_env.get('PROFILE_SAMPLE_RATE', 0))  # profile 1 in N /update-dns requests, 0 disables
+    PROFILE_DIR = _env.get('PROFILE_DIR', 'profiles')
+
+    # Health Check Configuration
+    HEALTH_PROBE_INTERVAL = int(_env.get('HEALTH_PROBE_INTERVAL', 60))  # seconds between background probes
+    HEALTH_MIN_FREE_MB = int(_env.get('HEALTH_MIN_FREE_MB', 50))  # minimum free space for the log directory
+
+    # Response Caching Configuration
+    API_CACHE_TTL = int(_env.get('API_CACHE_TTL', 5))  # seconds nginx may cache /api/logs and /api/stats, 0 disables
+
+    # Drift Reconciliation Configuration
+    DRIFT_CHECK_INTERVAL = int(_env.get('DRIFT_CHECK_INTERVAL', 600))  # seconds between zone scans, 0 disables
+    DRIFT_REPAIR = _env.get('DRIFT_REPAIR', 'False').lower() == 'true'  # set drifted records back
+
     # Logging Configuration
-    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_LEVEL = _env.get('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = _env.get('LOG_FORMAT', 'json').lower()  # DNS update log format: 'json' (NDJSON) or 'compact'
+    ERROR_LOG_DEDUP_WINDOW = float(_env.get('ERROR_LOG_DEDUP_WINDOW', 60))  # seconds repeated failures are counted in one entry, 0 disables
+    ERROR_LOG_DEDUP_MAX_KEYS = int(_env.get('ERROR_LOG_DEDUP_MAX_KEYS', 10000))  # (requester, error, auth method) keys tracked
     
     # Flask Secret Key for session management
-    FLASK_SECRET_KEY = os.environ.get('FLASK_SECRET_KEY', 'dns-update-secret-key-change-in-production')
+    FLASK_SECRET_KEY = _env.get('FLASK_SECRET_KEY', 'dns-update-secret-key-change-in-production')
+    
+    @staticmethod
+    def uses_static_credentials():
+        """Check whether static access keys are used directly (no role)."""
+        return bool(Config.AWS_ACCESS_KEY_ID and Config.AWS_SECRET_ACCESS_KEY and not Config.AWS_ROLE_ARN)
     
     @staticmethod
     def validate_aws_config():
-        """Validate that AWS credentials are configured."""
-        if not Config.AWS_ACCESS_KEY_ID or not Config.AWS_SECRET_ACCESS_KEY:
+        """
+        Validate the AWS credential configuration.
+        Static keys must be set together. Without them, credentials come from
+        the AWS CLI configuration or an EC2/ECS/assumed role at runtime.
+        """
+        if bool(Config.AWS_ACCESS_KEY_ID) != bool(Config.AWS_SECRET_ACCESS_KEY):
             raise ValueError(
-                "AWS credentials not configured. Please set AWS_ACCESS_KEY_ID and "
-                "AWS_SECRET_ACCESS_KEY environment variables or configure AWS CLI."
-            ) 
\ No newline at end of file
+                "AWS credentials incomplete. Please set both AWS_ACCESS_KEY_ID and "
+                "AWS_SECRET_ACCESS_KEY, or neither to use an IAM role or the AWS CLI configuration."
+            ) 
+    
+    @classmethod
+    def compile(cls, strict=True):
+        """
+        Build the lookup structures used on every request (IP allowlist,
+        subnets and trusted proxies). With strict=True an invalid entry raises ValueError;
+        otherwise it is skipped. Returns the list of problems found.
+        """
+        problems = []
+        networks = []
+        for subnet in cls.ALLOWED_SUBNETS:
+            try:
+                networks.append(ipaddress.ip_network(subnet.strip(), strict=False))
+            except ValueError as e:
+                problems.append(f"Invalid subnet in ALLOWED_SUBNETS: {e}")
+        proxies = []
+        for proxy in cls.TRUSTED_PROXIES:
+            if not proxy.strip():
+                continue
+            try:
+                proxies.append(ipaddress.ip_network(proxy.strip(), strict=False))
+            except ValueError as e:
+                problems.append(f"Invalid address in TRUSTED_PROXIES: {e}")
+        if cls.LOG_FORMAT not in ('json', 'compact'):
+            problems.append(f"Invalid LOG_FORMAT '{cls.LOG_FORMAT}' (use 'json' or 'compact')")
+            cls.LOG_FORMAT = 'json'
+        if problems and strict:
+            raise ValueError('; '.join(problems))
+        cls.ALLOWED_IP_SET = frozenset(ip.strip() for ip in cls.ALLOWED_IPS if ip.strip())
+        cls.ALLOWED_NETWORKS = tuple(networks)
+        cls.TRUSTED_PROXY_NETWORKS = tuple(proxies)
+        return problems
+
+def load_config():
+    """
+    Build a new, compiled Config class from the current environment and
+    CONFIG_FILE without touching the one in use. Raises ValueError if the
+    configuration is invalid.
+    """
+    spec = importlib.util.spec_from_file_location('config_snapshot', __file__)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Invalid configuration: {e}")
+    module.Config.compile(strict=True)
+    return module.Config
+
+Config.compile(strict=False)
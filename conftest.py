@@ -0,0 +1,8 @@
+import pytest
+import app as app_module
+from log_dedup import RepeatedErrors
+
+@pytest.fixture(autouse=True)
+def write_every_error(monkeypatch):
+    """Write every failure, and keep counted repeats from leaking between tests (see test_log_dedup.py)."""
+    monkeypatch.setattr(app_module, 'repeated_errors', RepeatedErrors(app_module.write_log_entry, window=0))
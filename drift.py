@@ -0,0 +1,166 @@
+"""
+Zone-level drift detection for the DNS Update Service.
+
+Records can be changed behind the service's back (e.g. in the AWS console).
+The reconciler compares every managed A record with the last value the
+service successfully applied, reading each hosted zone with one paginated
+ListResourceRecordSets scan per interval instead of one call per record.
+Drifted records are reported and, if repair is enabled, changed records
+are set back. A missing record is only reported: it may have been deleted
+or renamed on purpose, and the service never recreates it.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Largest page ListResourceRecordSets returns
+PAGE_SIZE = '300'
+
+
+def normalize_record_name(name):
+    """Normalize a record name for comparison (lower case, trailing dot, unescaped '*')."""
+    name = name.lower().replace('\\052', '*')
+    return name if name.endswith('.') else name + '.'
+
+
+def get_desired_state(records, zone_id):
+    """
+    Get the managed records of a hosted zone from the last applied state of
+    each record ({record name: {'ip_address', 'hosted_zone_id', ...}}, see
+    RecordState.records). Records logged for another zone, or before the
+    zone was logged, are left out. Returns {zone_id: {record name: ip}}.
+    """
+    desired = {name: record['ip_address'] for name, record in records.items()
+               if record.get('hosted_zone_id') == zone_id and record.get('ip_address')}
+    return {zone_id: desired} if zone_id and desired else {}
+
+
+def scan_zone(client, zone_id, names, call=None):
+    """
+    Page through all record sets of a hosted zone and collect the A records
+    named in `names`. `call` runs each API call (e.g. the Route53 scheduler).
+    Returns ({record name: sorted values}, pages).
+    """
+    call = call or (lambda func, **kwargs: func(**kwargs))
+    found = {}
+    pages = 0
+    kwargs = {'HostedZoneId': zone_id, 'MaxItems': PAGE_SIZE}
+    while True:
+        response = call(client.list_resource_record_sets, **kwargs)
+        pages += 1
+        for record_set in response.get('ResourceRecordSets', []):
+            name = normalize_record_name(record_set['Name'])
+            if record_set['Type'] == 'A' and name in names and 'AliasTarget' not in record_set:
+                values = [r['Value'] for r in record_set.get('ResourceRecords', [])]
+                found[name] = sorted(found.get(name, []) + values)
+        if not response.get('IsTruncated'):
+            return found, pages
+        kwargs = {'HostedZoneId': zone_id, 'MaxItems': PAGE_SIZE,
+                  'StartRecordName': response['NextRecordName'],
+                  'StartRecordType': response['NextRecordType']}
+        if response.get('NextRecordIdentifier'):
+            kwargs['StartRecordIdentifier'] = response['NextRecordIdentifier']
+
+
+class DriftReconciler:
+    """
+    Periodically compares managed records with Route53.
+
+    `get_client` returns the Route53 client (or None), `get_desired` returns
+    {zone_id: {record name: ip}}, `call` wraps each API call and `repair`,
+    if given, is called as repair(zone_id, name, ip) for each changed record.
+    """
+
+    def __init__(self, get_client, get_desired, interval=600, call=None, repair=None, clock=time.time):
+        self.get_client = get_client
+        self.get_desired = get_desired
+        self.interval = interval
+        self.call = call
+        self.repair = repair
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._last = None
+        self._counters = {'runs': 0, 'api_calls': 0, 'repairs': 0, 'failures': 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def run(self):
+        """Check every managed record now. Returns the result dict."""
+        with self._run_lock:
+            started = time.perf_counter()
+            result = {'checked_at': self._clock(), 'zones': 0, 'managed': 0, 'drifted': [], 'error': None}
+            try:
+                desired = self.get_desired()
+                client = self.get_client() if desired else None
+                if desired and client is None:
+                    raise ValueError('AWS Route53 client not available')
+                for zone_id, records in desired.items():
+                    actual, pages = scan_zone(client, zone_id, records, self.call)
+                    self._count('api_calls', pages)
+                    result['zones'] += 1
+                    result['managed'] += len(records)
+                    for name, ip in sorted(records.items()):
+                        values = actual.get(name)
+                        if values == [ip]:
+                            continue
+                        drift = {'zone_id': zone_id, 'name': name, 'expected': ip, 'actual': values,
+                                 'status': 'missing' if values is None else 'changed'}
+                        logger.warning(f"DNS drift: {name} in {zone_id} is {values}, expected {ip}")
+                        if self.repair is not None and values is not None:
+                            self._repair(drift)
+                        result['drifted'].append(drift)
+            except Exception as e:
+                logger.error(f"Drift check failed: {e}")
+                result['error'] = str(e)
+                self._count('failures')
+            result['duration_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            self._count('runs')
+            with self._lock:
+                self._last = result
+            return result
+
+    def _repair(self, drift):
+        try:
+            self.repair(drift['zone_id'], drift['name'], drift['expected'])
+            drift['repaired'] = True
+            self._count('repairs')
+            logger.info(f"DNS drift repaired: {drift['name']} -> {drift['expected']}")
+        except Exception as e:
+            drift['repaired'] = False
+            drift['repair_error'] = str(e)
+            logger.error(f"Failed to repair DNS drift for {drift['name']}: {e}")
+
+    def _loop(self):
+        while not self._stop_event.wait(self.interval):
+            self.run()
+
+    def start(self):
+        """Start the background thread (idempotent). Does nothing if the interval is 0."""
+        with self._lock:
+            if self._thread is not None or self.interval <= 0:
+                return
+            self._thread = threading.Thread(target=self._loop, name='drift-reconciler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def stats(self):
+        """Get counters and the result of the last check."""
+        with self._lock:
+            stats = dict(self._counters)
+            last = dict(self._last) if self._last else None
+        stats['interval'] = self.interval
+        stats['repair'] = self.repair is not None
+        if last is not None:
+            last['age_seconds'] = round(self._clock() - last['checked_at'], 1)
+        stats['last_check'] = last
+        return stats
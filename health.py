@@ -0,0 +1,104 @@
+"""
+Cached dependency probes for the DNS Update Service health checks.
+
+Probes run in a background thread at a fixed interval and their results
+are cached, so /health?deep=1 and /ready only read the cache and never
+make AWS calls or touch the disk themselves.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ProbeError(Exception):
+    """Raised by a probe to report a failure with a readable message."""
+
+
+class HealthProbes:
+    """
+    Runs named probe functions in the background and caches their results.
+    A probe returns a dict of details on success and raises on failure.
+    Results older than `stale_after` seconds are reported as failing.
+    """
+
+    def __init__(self, probes, interval=60, stale_after=None, clock=time.time):
+        self.probes = probes
+        self.interval = interval
+        self.stale_after = stale_after if stale_after is not None else interval * 3
+        self._clock = clock
+        self._results = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def run_probe(self, name):
+        """Run one probe now and cache its result."""
+        started = time.perf_counter()
+        try:
+            detail = self.probes[name]() or {}
+            result = {'status': 'ok', **detail}
+        except Exception as e:
+            result = {'status': 'error', 'error': str(e)}
+            if not isinstance(e, ProbeError):
+                logger.warning(f"Health probe '{name}' failed: {e}")
+        result['duration_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        result['checked_at'] = self._clock()
+        with self._lock:
+            self._results[name] = result
+        return result
+
+    def run_all(self):
+        """Run every probe in order."""
+        for name in self.probes:
+            self.run_probe(name)
+
+    def result(self, name):
+        """Get the cached result of one probe, or None if it has not run yet."""
+        with self._lock:
+            return self._results.get(name)
+
+    def _loop(self):
+        while True:
+            self.run_all()
+            if self._stop_event.wait(self.interval):
+                return
+
+    def start(self):
+        """Start the background thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, name='health-probes', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def snapshot(self):
+        """
+        Get cached results with their age.
+        Returns (healthy, results); healthy is False if any probe is failing,
+        stale or has not run yet.
+        """
+        now = self._clock()
+        with self._lock:
+            cached = dict(self._results)
+        results = {}
+        healthy = True
+        for name in self.probes:
+            result = cached.get(name)
+            if result is None:
+                results[name] = {'status': 'pending'}
+                healthy = False
+                continue
+            result = dict(result)
+            result['age_seconds'] = round(now - result.pop('checked_at'), 1)
+            if result['status'] == 'ok' and result['age_seconds'] > self.stale_after:
+                result['status'] = 'stale'
+            if result['status'] != 'ok':
+                healthy = False
+            results[name] = result
+        return healthy, results
@@ -17,6 +17,7 @@ SERVICE_USER="dns-updater"
 SERVICE_GROUP="dns-updater"
 INSTALL_DIR="/opt/dns-update"
 SERVICE_FILE="/etc/systemd/system/dns-update.service"
+SOCKET_FILE="/etc/systemd/system/dns-update.socket"
 ENV_FILE="/etc/dns-update/env"
 
 echo -e "${GREEN}DNS Update Service Installation${NC}"
@@ -70,6 +71,25 @@ mkdir -p /etc/dns-update
 print_status "Copying application files..."
 cp $SCRIPT_DIR/app.py $INSTALL_DIR/
 cp $SCRIPT_DIR/config.py $INSTALL_DIR/
+cp $SCRIPT_DIR/rate_limit.py $INSTALL_DIR/
+cp $SCRIPT_DIR/route53_scheduler.py $INSTALL_DIR/
+cp $SCRIPT_DIR/aws_credentials.py $INSTALL_DIR/
+cp $SCRIPT_DIR/metrics.py $INSTALL_DIR/
+cp $SCRIPT_DIR/profiling.py $INSTALL_DIR/
+cp $SCRIPT_DIR/password_hash.py $INSTALL_DIR/
+cp $SCRIPT_DIR/api_tokens.py $INSTALL_DIR/
+cp $SCRIPT_DIR/health.py $INSTALL_DIR/
+cp $SCRIPT_DIR/drift.py $INSTALL_DIR/
+cp $SCRIPT_DIR/server.py $INSTALL_DIR/
+cp $SCRIPT_DIR/log_writer.py $INSTALL_DIR/
+cp $SCRIPT_DIR/compact_log.py $INSTALL_DIR/
+cp $SCRIPT_DIR/log_scan.py $INSTALL_DIR/
+cp $SCRIPT_DIR/log_entry.py $INSTALL_DIR/
+cp $SCRIPT_DIR/log_columns.py $INSTALL_DIR/
+cp $SCRIPT_DIR/log_tail.py $INSTALL_DIR/
+cp $SCRIPT_DIR/record_state.py $INSTALL_DIR/
+cp $SCRIPT_DIR/log_dedup.py $INSTALL_DIR/
+cp $SCRIPT_DIR/asgi.py $INSTALL_DIR/
 cp $SCRIPT_DIR/requirements.txt $INSTALL_DIR/
 cp $SCRIPT_DIR/start.py $INSTALL_DIR/
 cp $SCRIPT_DIR/test_dns_update.py $INSTALL_DIR/
@@ -120,6 +140,8 @@ ALLOWED_SUBNETS=
 # Password Authentication Configuration (Optional)
 ENABLE_PASSWORD_AUTH=true
 AUTH_PASSWORD=your_secure_password_here
+# Or store a hash instead (generate with: /opt/dns-update/venv/bin/python /opt/dns-update/password_hash.py)
+#AUTH_PASSWORD_HASH=
 
 # Flask Secret Key (Recommended for production)
 FLASK_SECRET_KEY=your_secure_secret_key_here
@@ -140,9 +162,23 @@ chmod 600 $ENV_FILE
 print_status "Installing systemd service..."
 cp $SCRIPT_DIR/dns-update.service $SERVICE_FILE
 
-# Reload systemd and enable service
+# Install systemd socket unit; nginx connects to the Unix socket, so it gets the nginx group
+print_status "Installing systemd socket..."
+cp $SCRIPT_DIR/dns-update.socket $SOCKET_FILE
+SOCKET_GROUP="www-data"
+if ! getent group www-data > /dev/null 2>&1 && getent group nginx > /dev/null 2>&1; then
+    SOCKET_GROUP="nginx"
+fi
+sed -i "s/^SocketGroup=.*/SocketGroup=$SOCKET_GROUP/" $SOCKET_FILE
+if ! getent group $SOCKET_GROUP > /dev/null 2>&1; then
+    print_warning "Group $SOCKET_GROUP not found; using $SERVICE_GROUP for the Unix socket"
+    sed -i "s/^SocketGroup=.*/SocketGroup=$SERVICE_GROUP/" $SOCKET_FILE
+fi
+
+# Reload systemd and enable the socket and service
 print_status "Reloading systemd and enabling service..."
 systemctl daemon-reload
+systemctl enable dns-update.socket
 systemctl enable dns-update.service
 
 print_status "Installation completed successfully!"
@@ -150,14 +186,15 @@ echo ""
 echo -e "${YELLOW}Next steps:${NC}"
 echo "1. Edit the environment file: sudo nano $ENV_FILE"
 echo "2. Set your AWS credentials and DNS configuration"
-echo "3. Start the service: sudo systemctl start dns-update"
+echo "3. Start the service: sudo systemctl start dns-update.socket dns-update"
 echo "4. Check status: sudo systemctl status dns-update"
 echo "5. View logs: sudo journalctl -u dns-update -f"
 echo ""
 echo -e "${YELLOW}Service commands:${NC}"
 echo "  Start:   sudo systemctl start dns-update"
 echo "  Stop:    sudo systemctl stop dns-update"
-echo "  Restart: sudo systemctl restart dns-update"
+echo "  Restart: sudo systemctl restart dns-update  (connections are queued by dns-update.socket meanwhile)"
+echo "  Socket:  /run/dns-update/dns-update.sock (see $SOCKET_FILE)"
 echo "  Status:  sudo systemctl status dns-update"
 echo "  Logs:    sudo journalctl -u dns-update -f"
 echo ""
@@ -0,0 +1,225 @@
+"""
+Columnar in-memory store of the DNS update log, for statistics.
+
+/api/stats and the counts on every /api/logs page used to decode the
+whole log into dicts and loop over them. LogColumns keeps only what the
+statistics need, one typed column per field, and grows by appends as new
+entries are written:
+
+  timestamps    int64  microseconds since the epoch (NO_TIMESTAMP if
+                       missing, invalid or without a timezone)
+  ips           int64  IPv4 address as its 32-bit value; other addresses
+                       as 2**32 + index into a table; -1 if none
+  statuses      uint8  STATUS_CODES code
+  auth_methods  uint8  index into a table of auth methods
+
+An entry with a repeat count (see log_dedup.py) stands for that many
+requests; the few that have one are kept in a sparse map of row to count
+and weighted in the aggregations, which also take the repeats not written
+yet.
+
+refresh() (see log_tail.py) reads only the entries appended to the log
+file since the last call, and starts over if the file was replaced or
+truncated (logrotate). Aggregations run vectorized with NumPy
+when it is installed, and as loops over the same arrays otherwise.
+"""
+
+import array
+import ipaddress
+from collections import Counter
+from datetime import datetime, timezone
+from log_dedup import entry_count
+from log_tail import LogTail
+
+try:
+    import numpy
+except ImportError:  # optional, aggregations fall back to Python loops
+    numpy = None
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+NO_TIMESTAMP = -(1 << 63)
+NO_IP = -1
+OTHER_IP_BASE = 1 << 32
+
+STATUS_OTHER, STATUS_SUCCESS, STATUS_ERROR = 0, 1, 2
+STATUS_CODES = {'success': STATUS_SUCCESS, 'error': STATUS_ERROR}
+
+# Further auth methods are counted as none
+MAX_AUTH_METHODS = 255
+
+
+def datetime_micros(value):
+    """Microseconds since the epoch for an aware datetime."""
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def timestamp_micros(value):
+    """Microseconds since the epoch for an ISO timestamp with a timezone, else NO_TIMESTAMP."""
+    if not isinstance(value, str):
+        return NO_TIMESTAMP
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return NO_TIMESTAMP
+    if parsed.tzinfo is None:
+        return NO_TIMESTAMP
+    return datetime_micros(parsed)
+
+
+class LogColumns(LogTail):
+    """Typed columns of one log file, kept up to date by refresh()."""
+
+    def __init__(self):
+        self.use_numpy = numpy is not None
+        super().__init__()
+
+    def clear(self):
+        self.timestamps = array.array('q')
+        self.ips = array.array('q')
+        self.statuses = array.array('B')
+        self.auth_methods = array.array('B')
+        self.repeats = {}
+        self._ip_values = {}
+        self._other_ips = []
+        self._auth_codes = {None: 0}
+        self._auth_names = [None]
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def _ip_value(self, ip_address):
+        if not ip_address:
+            return NO_IP
+        try:
+            value = self._ip_values.get(ip_address)
+        except TypeError:
+            return NO_IP  # Unhashable (a list or object in the log)
+        if value is None:
+            if isinstance(ip_address, str):
+                try:
+                    address = ipaddress.IPv4Address(ip_address)
+                    if str(address) == ip_address:
+                        value = int(address)
+                except ValueError:
+                    pass
+            if value is None:
+                value = OTHER_IP_BASE + len(self._other_ips)
+                self._other_ips.append(ip_address)
+            self._ip_values[ip_address] = value
+        return value
+
+    def _format_ip(self, value):
+        if value < OTHER_IP_BASE:
+            return str(ipaddress.IPv4Address(value))
+        return self._other_ips[value - OTHER_IP_BASE]
+
+    def _auth_code(self, auth_method):
+        try:
+            code = self._auth_codes.get(auth_method)
+        except TypeError:
+            return 0
+        if code is None:
+            if len(self._auth_names) > MAX_AUTH_METHODS:
+                return 0
+            code = len(self._auth_names)
+            self._auth_codes[auth_method] = code
+            self._auth_names.append(auth_method)
+        return code
+
+    def _row(self, entry):
+        """The column values of a log entry: (timestamp, ip, status, auth method code)."""
+        status = entry.get('status')
+        return (timestamp_micros(entry.get('timestamp')), self._ip_value(entry.get('ip_address')),
+                STATUS_CODES.get(status, STATUS_OTHER) if isinstance(status, str) else STATUS_OTHER,
+                self._auth_code(entry.get('auth_method')))
+
+    def append(self, entry):
+        """Add one log entry (a dict or LogEntry)."""
+        timestamp, ip, status, auth_code = self._row(entry)
+        self.timestamps.append(timestamp)
+        self.ips.append(ip)
+        self.statuses.append(status)
+        self.auth_methods.append(auth_code)
+        count = entry_count(entry)
+        if count > 1:
+            self.repeats[len(self.timestamps) - 1] = count
+
+    def stats(self, since=None, top=5, pending=()):
+        """
+        Aggregate the columns: total, successful, failed, unique_ips,
+        recent (entries at or after `since`, epoch microseconds), top_ips
+        ([(ip, count)], most frequent first, ties in order of first
+        appearance) and auth_methods ({method: count}). Every count is of
+        requests: entries are weighted by their repeat count, and `pending`
+        adds (entry, count) repeats not in the log yet.
+        """
+        with self._lock:
+            extra = self._extra_rows(pending)
+            if self.use_numpy:
+                stats = self._stats_numpy(since, top, extra)
+            else:
+                stats = self._stats_python(since, top, extra)
+            stats['total'] = len(self.timestamps)
+            auth_counts = Counter(dict(stats['auth_methods']))
+            for timestamp, _, status, auth_code, count in extra:
+                stats['total'] += count
+                if status == STATUS_SUCCESS:
+                    stats['successful'] += count
+                elif status == STATUS_ERROR:
+                    stats['failed'] += count
+                if since is not None and timestamp >= since:
+                    stats['recent'] += count
+                auth_counts[auth_code] += count
+            stats['top_ips'] = [(self._format_ip(value), count) for value, count in stats['top_ips']]
+            stats['auth_methods'] = {self._auth_names[code]: count
+                                     for code, count in sorted(auth_counts.items()) if self._auth_names[code] is not None}
+            return stats
+
+    def _extra_rows(self, pending):
+        """Requests beyond one per row: (timestamp, ip, status, auth method code, count) of repeats."""
+        extra = [(self.timestamps[row], self.ips[row], self.statuses[row], self.auth_methods[row], count - 1)
+                 for row, count in self.repeats.items()]
+        extra.extend(self._row(entry) + (count,) for entry, count in pending)
+        return extra
+
+    def _stats_numpy(self, since, top, extra):
+        timestamps = numpy.frombuffer(self.timestamps, dtype=numpy.int64)
+        ips = numpy.frombuffer(self.ips, dtype=numpy.int64)
+        statuses = numpy.frombuffer(self.statuses, dtype=numpy.uint8)
+        auth_methods = numpy.frombuffer(self.auth_methods, dtype=numpy.uint8)
+
+        values, first, counts = numpy.unique(ips[ips != NO_IP], return_index=True, return_counts=True)
+        extra_ips = numpy.array([(ip, count) for _, ip, _, _, count in extra if ip != NO_IP], dtype=numpy.int64)
+        if len(extra_ips):
+            # Merge in the repeats; an address first seen in them comes after the log's
+            values, inverse = numpy.unique(numpy.concatenate((values, extra_ips[:, 0])), return_inverse=True)
+            counts = numpy.bincount(inverse, weights=numpy.concatenate((counts, extra_ips[:, 1]))).astype(numpy.int64)
+            merged_first = numpy.full(len(values), len(ips) + len(extra_ips), dtype=numpy.int64)
+            numpy.minimum.at(merged_first, inverse,
+                             numpy.concatenate((first, numpy.arange(len(ips), len(ips) + len(extra_ips)))))
+            first = merged_first
+        order = numpy.lexsort((first, -counts))[:top]
+        auth_counts = numpy.bincount(auth_methods, minlength=len(self._auth_names))
+        return {
+            'successful': int(numpy.count_nonzero(statuses == STATUS_SUCCESS)),
+            'failed': int(numpy.count_nonzero(statuses == STATUS_ERROR)),
+            'unique_ips': len(values),
+            'recent': int(numpy.count_nonzero(timestamps >= since)) if since is not None else 0,
+            'top_ips': [(int(values[i]), int(counts[i])) for i in order],
+            'auth_methods': [(code, int(count)) for code, count in enumerate(auth_counts) if count],
+        }
+
+    def _stats_python(self, since, top, extra):
+        ip_counts = Counter(value for value in self.ips if value != NO_IP)
+        for _, ip, _, _, count in extra:
+            if ip != NO_IP:
+                ip_counts[ip] += count
+        return {
+            'successful': self.statuses.count(STATUS_SUCCESS),
+            'failed': self.statuses.count(STATUS_ERROR),
+            'unique_ips': len(ip_counts),
+            'recent': sum(1 for value in self.timestamps if value >= since) if since is not None else 0,
+            'top_ips': sorted(ip_counts.items(), key=lambda x: x[1], reverse=True)[:top],
+            'auth_methods': sorted(Counter(self.auth_methods).items()),
+        }
@@ -0,0 +1,155 @@
+"""
+Aggregation of repeated error entries in the DNS update log.
+
+Every rejected /update-dns request (wrong password, IP mismatch) used to
+append and fsync a full log entry, so a brute-force attempt or a client
+with a stale password turned into sustained synchronous disk writes and
+unbounded log growth. RepeatedErrors writes the first failure for a key
+(client address, error kind, auth method) as before, then only counts the
+same failure for the rest of the window. When the window closes, the
+failures counted in it are written as one entry, the last of them with
+`repeat_count` (how many requests the entry stands for) and
+`repeated_since` (timestamp of the first of them), and a new window
+starts. A key with no failures in a window is forgotten. Once max_keys
+keys are tracked, the failures of further keys are counted together under
+OVERFLOW_KEY, so spraying keys cannot bring back a write per request.
+
+Readers count an entry as entry_count(entry) requests, so totals stay
+exact; failures counted but not yet written are available from pending().
+They are written at exit, and on SIGTERM with install_signal_handler().
+"""
+
+import atexit
+import logging
+import signal
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+REPEAT_FIELD = 'repeat_count'
+
+# Key the failures of new keys are counted under while max_keys keys are tracked
+OVERFLOW_KEY = ('overflow',)
+
+
+def entry_count(entry):
+    """The number of requests a log entry stands for."""
+    count = entry.get(REPEAT_FIELD)
+    return count if type(count) is int and count > 1 else 1
+
+
+class RepeatedErrors:
+    """Counts repeated error entries per key and writes them once per window."""
+
+    def __init__(self, write, window=60.0, max_keys=10000, clock=time.monotonic, background=True):
+        self.write = write
+        self.window = window
+        self.max_keys = max_keys
+        self.clock = clock
+        self.background = background
+        self.counted = 0  # Repeats counted so far; changes whenever pending() does
+        self._keys = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, key, entry):
+        """
+        Count an error entry if its key was logged within the window.
+        Returns True if it was counted (the caller must not write it), False
+        if the caller should write it now.
+        """
+        if self.window <= 0:
+            return False
+        now = self.clock()
+        expired = None
+        with self._lock:
+            if key not in self._keys and len(self._keys) >= self.max_keys:
+                key = OVERFLOW_KEY
+            state = self._keys.get(key)
+            if state is not None and now < state['until']:
+                state['count'] += 1
+                if state['count'] == 1:
+                    state['since'] = entry.get('timestamp')
+                state['entry'] = entry
+                self.counted += 1
+                return True
+            if state is not None:
+                expired = self._pop_summary(key)
+            self._keys[key] = {'until': now + self.window, 'count': 0, 'since': None, 'entry': None}
+            self._start()
+        if expired is not None:
+            self._write(expired)
+        return False
+
+    def _pop_summary(self, key):
+        """Remove a key; returns its summary entry if it has counted failures."""
+        state = self._keys.pop(key)
+        if not state['count']:
+            return None
+        summary = dict(state['entry'])
+        summary.pop('timings', None)
+        summary[REPEAT_FIELD] = state['count']
+        summary['repeated_since'] = state['since']
+        return summary
+
+    def flush(self, force=False):
+        """Write the entries of closed windows (all windows if `force`)."""
+        now = self.clock()
+        summaries = []
+        with self._lock:
+            for key, state in list(self._keys.items()):
+                if not force and now < state['until']:
+                    continue
+                summary = self._pop_summary(key)
+                if summary is not None:
+                    summaries.append(summary)
+                    if not force:
+                        # Still failing: keep counting in a new window instead of logging the next one
+                        self._keys[key] = {'until': now + self.window, 'count': 0, 'since': None, 'entry': None}
+        for summary in summaries:
+            self._write(summary)
+        return len(summaries)
+
+    def _write(self, summary):
+        try:
+            self.write(summary)
+        except Exception as e:
+            logger.error(f"Failed to write repeated error entry: {e}")
+
+    def pending(self):
+        """Counted failures not written yet: a list of (last entry, count)."""
+        with self._lock:
+            return [(state['entry'], state['count']) for state in self._keys.values() if state['count']]
+
+    def install_signal_handler(self, signum=signal.SIGTERM):
+        """
+        Write the counted failures before the process is stopped with
+        `signum` (SIGTERM is how systemd and Docker stop the service, and
+        atexit handlers do not run when a signal ends the process), then
+        hand over to the previous handler, or exit. Must be called from the
+        main thread.
+        """
+        previous = signal.getsignal(signum)
+
+        def handle(signum, frame):
+            self.flush(force=True)
+            if callable(previous):
+                previous(signum, frame)
+            else:
+                sys.exit(0)
+
+        signal.signal(signum, handle)
+
+    def _start(self):
+        if not self.background or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name='repeated-errors', daemon=True)
+        self._thread.start()
+        atexit.register(self.flush, force=True)
+
+    def _loop(self):
+        while True:
+            time.sleep(max(0.1, self.window / 4))
+            self.flush()
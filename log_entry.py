@@ -0,0 +1,148 @@
+"""
+Compact in-memory form of a DNS update log entry.
+
+A decoded JSON line is a dict holding its own copy of every key and value:
+on the order of a kilobyte per entry, for every entry of the history and
+every request reading it. LogEntry keeps the known fields in slots, shares
+the values that repeat between entries (status, domain, addresses, user
+agent) through sys.intern, and keeps any other fields in a small dict. A
+plain dict is built only when an entry is serialized.
+
+LogEntry supports the read-only dict operations the readers use (get, [],
+in, keys, items), and compares equal to the dict it was built from.
+"""
+
+import gc
+from contextlib import contextmanager
+from sys import intern
+
+FIELDS = ('timestamp', 'ip_address', 'requester_ip', 'domain_name', 'status', 'change_id',
+          'error_message', 'auth_method', 'token_id', 'user_agent')
+
+# Fields with few distinct values, shared between entries
+INTERNED_FIELDS = frozenset(('ip_address', 'requester_ip', 'domain_name', 'status', 'auth_method',
+                             'token_id', 'user_agent'))
+
+_FIELD_SET = frozenset(FIELDS)
+_FIELD_COUNT = len(FIELDS)
+
+
+class LogEntry:
+    """One log entry; unset slots are fields the entry does not have."""
+
+    __slots__ = FIELDS + ('_extra',)
+
+    __hash__ = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build an entry from a decoded log line."""
+        keys = tuple(data)
+        if keys[:_FIELD_COUNT] == FIELDS:
+            # Written by log_dns_update: all fields, in order, then any extras
+            values = tuple(data.values())
+            (timestamp, ip_address, requester_ip, domain_name, status, change_id,
+             error_message, auth_method, token_id, user_agent) = values[:_FIELD_COUNT]
+            try:
+                entry = object.__new__(cls)
+                entry.timestamp = timestamp
+                entry.ip_address = ip_address if ip_address is None else intern(ip_address)
+                entry.requester_ip = requester_ip if requester_ip is None else intern(requester_ip)
+                entry.domain_name = domain_name if domain_name is None else intern(domain_name)
+                entry.status = status if status is None else intern(status)
+                entry.change_id = change_id
+                entry.error_message = error_message
+                entry.auth_method = auth_method if auth_method is None else intern(auth_method)
+                entry.token_id = token_id if token_id is None else intern(token_id)
+                entry.user_agent = user_agent if user_agent is None else intern(user_agent)
+                if len(keys) > _FIELD_COUNT:
+                    entry._extra = dict(zip(keys[_FIELD_COUNT:], values[_FIELD_COUNT:]))
+                else:
+                    entry._extra = None
+                return entry
+            except TypeError:
+                pass  # A value that is not a string; take the general path
+
+        entry = object.__new__(cls)
+        extra = None
+        for key, value in data.items():
+            if key in _FIELD_SET:
+                if key in INTERNED_FIELDS and type(value) is str:
+                    value = intern(value)
+                _SETTERS[key](entry, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        entry._extra = extra
+        return entry
+
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            return getattr(self, key, default)
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def items(self):
+        return self.to_dict().items()
+
+    def __len__(self):
+        return len(self.to_dict())
+
+    def __iter__(self):
+        return iter(self.to_dict())
+
+    def to_dict(self):
+        """The entry as a dict, e.g. for JSON serialization."""
+        data = {}
+        for key in FIELDS:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                data[key] = value
+        if self._extra is not None:
+            data.update(self._extra)
+        return data
+
+    def __eq__(self, other):
+        if isinstance(other, LogEntry):
+            other = other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"LogEntry({self.to_dict()!r})"
+
+
+_MISSING = object()
+_SETTERS = {key: getattr(LogEntry, key).__set__ for key in FIELDS}
+
+
+@contextmanager
+def gc_paused():
+    """
+    Pause the cyclic garbage collector while reading many entries. Entries
+    hold no reference cycles, so the collections that their allocations
+    trigger would only rescan the growing list of entries.
+    """
+    if not gc.isenabled():
+        yield
+        return
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
@@ -0,0 +1,117 @@
+"""
+Prefiltered reading of a JSON-lines DNS update log.
+
+Filtered queries (a status filter, a search) usually keep a small share of
+the entries, so decoding every line just to drop most of them wastes time
+in the JSON parser. The log file is memory-mapped and searched for the
+bytes a matching entry must contain; only lines with a hit are decoded,
+and the caller's predicate is then applied to the decoded entry as before.
+
+A prefilter must find every line whose entry could satisfy the predicate,
+so results are the same as decoding every line. Lines a byte search cannot
+judge are always decoded: lines with JSON escapes ("\\u0065rror") and, for
+case-insensitive searches, lines with non-ASCII text.
+"""
+
+import json
+import mmap
+import os
+import re
+
+# Entry fields matched by the /api/logs search
+SEARCH_FIELDS = ('ip_address', 'requester_ip', 'domain_name', 'error_message')
+
+# Bytes scanned at a time (extended to the end of a line)
+CHUNK_SIZE = 1 << 20
+
+_NON_ASCII = re.compile(rb'[\x80-\xff]')
+
+
+class BytePrefilter:
+    """Finds the lines containing any of `needles` (bytes)."""
+
+    def __init__(self, needles, ignore_case=False):
+        self.needles = [needle.lower() for needle in needles] if ignore_case else list(needles)
+        self.ignore_case = ignore_case
+
+    def line_starts(self, chunk):
+        """Sorted offsets of the lines in `chunk` that may match."""
+        haystack = chunk.lower() if self.ignore_case else chunk
+        starts = set()
+        for needle in self.needles:
+            position = haystack.find(needle)
+            while position != -1:
+                starts.add(haystack.rfind(b'\n', 0, position) + 1)
+                end = haystack.find(b'\n', position)
+                if end == -1:
+                    break
+                position = haystack.find(needle, end + 1)
+        # str.lower() folds some non-ASCII characters to ASCII (KELVIN SIGN -> 'k'),
+        # which bytes.lower() does not, so such lines are decoded too
+        if self.ignore_case and not chunk.isascii():
+            for match in _NON_ASCII.finditer(chunk):
+                starts.add(chunk.rfind(b'\n', 0, match.start()) + 1)
+        return sorted(starts)
+
+
+def status_prefilter(status):
+    """Prefilter for entries with this status."""
+    return BytePrefilter([f'"{status}"'.encode('utf-8'), b'\\'])
+
+
+def search_prefilter(search):
+    """
+    Prefilter for entries with a string field containing `search`, ignoring
+    case. Returns None if no prefilter can rule lines out.
+    """
+    needle = search.lower()
+    if not needle or not needle.isascii():
+        return None
+    return BytePrefilter([needle.encode('ascii'), b'\\'], ignore_case=True)
+
+
+def iter_chunks(data, size=CHUNK_SIZE):
+    """Yield `data` (bytes or mmap) in pieces of about `size` bytes that end at line ends."""
+    start = 0
+    while start < len(data):
+        end = data.find(b'\n', start + size)
+        end = len(data) if end == -1 else end + 1
+        yield data[start:end]
+        start = end
+
+
+def iter_candidate_lines(data, prefilter):
+    """Yield each line of `data` (bytes or mmap) the prefilter may match, in order."""
+    for chunk in iter_chunks(data):
+        for start in prefilter.line_starts(chunk):
+            end = chunk.find(b'\n', start)
+            yield chunk[start:] if end == -1 else chunk[start:end]
+
+
+def read_matching(path, prefilter, predicate):
+    """
+    Read the entries of a JSON-lines log for which predicate(entry) is true.
+    Only lines found by the prefilter are decoded (every line if it is
+    None). Lines that are not valid UTF-8 or JSON (e.g. torn by a crash)
+    and non-object values are skipped.
+    """
+    entries = []
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return entries
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            lines = iter(data.readline, b'') if prefilter is None else iter_candidate_lines(data, prefilter)
+            for line in lines:
+                try:
+                    text = line.decode('utf-8')
+                except UnicodeDecodeError:
+                    continue
+                # A lone CR also ends a line for text-mode readers
+                for part in text.split('\r') if '\r' in text else (text,):
+                    try:
+                        entry = json.loads(part)
+                    except json.JSONDecodeError:
+                        continue
+                    if isinstance(entry, dict) and predicate(entry):
+                        entries.append(entry)
+    return entries
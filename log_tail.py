@@ -0,0 +1,124 @@
+"""
+Incremental reading of the DNS update log.
+
+LogTail is the base of the in-memory views of the log (LogColumns,
+RecordState): refresh() reads only the bytes appended to the log file
+since the last call, as JSON lines or compact records, and hands each new
+entry to append(). If the file was replaced or truncated (logrotate), the
+view is cleared and the file is read from the start. The file is read in
+chunks, so a large log is never held in memory at once.
+"""
+
+import json
+import os
+import threading
+from compact_log import MAGIC, RECORD_HEADER, ENTRY, STRING, RAW, decode_entry, iter_records
+
+CHUNK_SIZE = 1 << 22
+
+
+class LogTail:
+    """A view of one log file, kept up to date by refresh()."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._file_id = None
+        self._offset = 0
+        self._compact = None
+        self._strings = []
+        self.clear()
+
+    def clear(self):
+        """Drop the entries read so far."""
+        raise NotImplementedError
+
+    def append(self, entry):
+        """Add one log entry (a dict)."""
+        raise NotImplementedError
+
+    def _append_line(self, line):
+        """Add the entries of one JSON line, read like read_logs_from_single_file does."""
+        try:
+            text = line.decode('utf-8')
+        except UnicodeDecodeError:
+            return
+        # A lone CR also ends a line for text-mode readers
+        for part in text.split('\r') if '\r' in text else (text,):
+            try:
+                entry = json.loads(part)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(entry, dict):
+                self.append(entry)
+
+    def _ingest_lines(self, data, at_end):
+        """Add the JSON lines in `data`. Returns the number of bytes consumed."""
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].split(b'\n')[:-1]:
+            self._append_line(line)
+        tail = data[end:]
+        if tail:
+            if not at_end:
+                return end  # Continued in the next chunk
+            # A last line without a newline is taken once it is complete JSON
+            try:
+                json.loads(tail)
+            except ValueError:
+                return end
+            self._append_line(tail)
+        return len(data)
+
+    def _ingest_records(self, data, at_end):
+        """Add the compact log records in `data`. Returns the number of bytes consumed."""
+        consumed = 0
+        for record_type, payload in iter_records(data, 0):
+            consumed += RECORD_HEADER.size + len(payload)
+            if record_type == STRING:
+                self._strings.append(payload.decode('utf-8'))
+            elif record_type == ENTRY:
+                self.append(decode_entry(payload, self._strings))
+            elif record_type == RAW:
+                try:
+                    entry = json.loads(payload.decode('utf-8'))
+                except ValueError:
+                    continue
+                if isinstance(entry, dict):
+                    self.append(entry)
+        return consumed
+
+    def refresh(self, path):
+        """Add the entries appended to the log file at `path` since the last call."""
+        with self._lock:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self._reset()
+                return self
+            if (stat.st_dev, stat.st_ino) != self._file_id or stat.st_size < self._offset:
+                self._reset()
+                self._file_id = (stat.st_dev, stat.st_ino)
+            if stat.st_size <= self._offset:
+                return self
+            with open(path, 'rb') as f:
+                if self._compact is None:
+                    head = f.read(len(MAGIC))
+                    if head != MAGIC and MAGIC.startswith(head):
+                        return self  # Too short to tell the format yet
+                    self._compact = head == MAGIC
+                    self._offset = len(MAGIC) if self._compact else 0
+                ingest = self._ingest_records if self._compact else self._ingest_lines
+                size = CHUNK_SIZE
+                while self._offset < stat.st_size:
+                    f.seek(self._offset)
+                    data = f.read(min(size, stat.st_size - self._offset))
+                    at_end = self._offset + len(data) >= stat.st_size
+                    consumed = ingest(data, at_end)
+                    self._offset += consumed
+                    if at_end:
+                        break
+                    # A line or record longer than the chunk needs a larger read
+                    size = CHUNK_SIZE if consumed else size * 2
+        return self
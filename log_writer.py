@@ -0,0 +1,110 @@
+"""
+Append-only writer for the DNS update log.
+
+Each process keeps one O_APPEND descriptor per log file instead of opening
+the file for every entry. An entry is written with a single write() call,
+which the kernel appends atomically, so entries from several workers never
+interleave; entries larger than ATOMIC_WRITE_SIZE also take an exclusive
+flock, which other writers of large entries respect. Before each write the
+path is checked against the open descriptor, so after logrotate moves or
+deletes the file the next entry goes to a new file instead of the old one.
+"""
+
+import fcntl
+import os
+import threading
+
+# Entries up to this size are written without a lock
+ATOMIC_WRITE_SIZE = 4096
+
+
+class AppendWriter:
+    """Persistent, multi-process-safe appender for one log file."""
+
+    def __init__(self, path, atomic_size=ATOMIC_WRITE_SIZE):
+        self.path = path
+        self.atomic_size = atomic_size
+        self._fd = None
+        self._file_id = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.reopens = 0
+
+    def _open(self):
+        if self._fd is not None:
+            self._close()
+            self.reopens += 1
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_CLOEXEC, 0o666)
+        stat = os.fstat(fd)
+        self._fd = fd
+        self._file_id = (stat.st_dev, stat.st_ino)
+        self._pid = os.getpid()
+
+    def _close(self):
+        try:
+            os.close(self._fd)
+        except OSError:
+            pass
+        self._fd = None
+        self._file_id = None
+
+    def _ensure_open(self):
+        """Open the file, or reopen it if it was rotated, removed or this is a forked child."""
+        if self._fd is not None and self._pid != os.getpid():
+            self._close()
+        if self._fd is None:
+            self._open()
+            return
+        try:
+            stat = os.stat(self.path)
+            current = (stat.st_dev, stat.st_ino)
+        except FileNotFoundError:
+            current = None
+        if current != self._file_id:
+            self._open()
+
+    def write(self, data):
+        """Append one entry (str or bytes) with a single write."""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        with self._lock:
+            self._ensure_open()
+            if len(data) <= self.atomic_size:
+                written = os.write(self._fd, data)
+                if written < len(data):
+                    self._write_locked(data[written:])
+            else:
+                self._write_locked(data)
+
+    def _write_locked(self, data):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(self._fd, view):]
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def sync(self):
+        """Force written entries to disk."""
+        with self._lock:
+            if self._fd is not None:
+                os.fsync(self._fd)
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                self._close()
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(path):
+    """Get the shared writer for a log file path."""
+    writer = _writers.get(path)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.setdefault(path, AppendWriter(path))
+    return writer
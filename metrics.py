@@ -0,0 +1,467 @@
+"""
+Prometheus metrics for the DNS Update Service.
+
+A small, dependency-free implementation of counters, gauges and histograms
+with the Prometheus text exposition format. Values live in memory, or, when
+a metrics directory is configured, in a per-process memory-mapped file so
+that /metrics on any worker reports totals across all worker processes.
+Updates only take a per-process lock; no cross-process locking is needed
+because each process writes to its own file.
+"""
+
+import bisect
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+from compact_log import MAGIC as COMPACT_MAGIC, count_entries
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+IO_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MemoryValueStore:
+    """Values for a single process, held in a dict."""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc_many(self, updates):
+        with self._lock:
+            for key, amount in updates:
+                self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, key, value):
+        with self._lock:
+            self._values[key] = value
+
+    def items(self):
+        with self._lock:
+            return list(self._values.items())
+
+    def close(self):
+        pass
+
+
+class MmapValueStore:
+    """
+    Values for a single process, held in a memory-mapped file.
+
+    Layout: a 4-byte "used bytes" header followed by entries of
+    (4-byte key length, key padded to 8-byte alignment, 8-byte double).
+    Entries are only ever appended and values updated in place, so other
+    processes can read the file at any time without locking.
+    """
+
+    INITIAL_SIZE = 1 << 16
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(self.INITIAL_SIZE)
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        self._positions = {}
+        self._used = struct.unpack_from('i', self._map, 0)[0]
+        if self._used == 0:
+            self._used = 8
+            struct.pack_into('i', self._map, 0, self._used)
+        for key, _, position in self._read_entries(self._map, self._used):
+            self._positions[key] = position
+
+    @staticmethod
+    def _read_entries(data, used):
+        position = 8
+        while position < used:
+            key_length = struct.unpack_from('i', data, position)[0]
+            padded_length = key_length + (8 - (key_length + 4) % 8)
+            key = bytes(data[position + 4:position + 4 + key_length]).decode('utf-8')
+            value_position = position + 4 + padded_length
+            value = struct.unpack_from('d', data, value_position)[0]
+            yield key, value, value_position
+            position = value_position + 8
+
+    @classmethod
+    def read_file(cls, path):
+        """Read all (key, value) pairs from a store file written by any process."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < 8:
+            return []
+        used = struct.unpack_from('i', data, 0)[0]
+        return [(key, value) for key, value, _ in cls._read_entries(data, min(used, len(data)))]
+
+    def _grow(self, needed):
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        self._map.close()
+        self._file.truncate(capacity)
+        self._capacity = capacity
+        self._map = mmap.mmap(self._file.fileno(), capacity)
+
+    def _position(self, key):
+        position = self._positions.get(key)
+        if position is None:
+            encoded = key.encode('utf-8')
+            padded = encoded + b' ' * (8 - (len(encoded) + 4) % 8)
+            entry = struct.pack(f'i{len(padded)}sd', len(encoded), padded, 0.0)
+            if self._used + len(entry) > self._capacity:
+                self._grow(self._used + len(entry))
+            self._map[self._used:self._used + len(entry)] = entry
+            position = self._used + 4 + len(padded)
+            self._used += len(entry)
+            # Publish the entry only after it is fully written
+            struct.pack_into('i', self._map, 0, self._used)
+            self._positions[key] = position
+        return position
+
+    def inc_many(self, updates):
+        with self._lock:
+            for key, amount in updates:
+                position = self._position(key)
+                value = struct.unpack_from('d', self._map, position)[0]
+                struct.pack_into('d', self._map, position, value + amount)
+
+    def set(self, key, value):
+        with self._lock:
+            struct.pack_into('d', self._map, self._position(key), value)
+
+    def items(self):
+        with self._lock:
+            return [(key, value) for key, value, _ in self._read_entries(self._map, self._used)]
+
+    def close(self):
+        with self._lock:
+            self._map.close()
+            self._file.close()
+
+
+def _sample_key(sample_name, labels):
+    return json.dumps([sample_name, labels], separators=(',', ':'))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def labels(self, *values):
+        """Get the child metric for a set of label values."""
+        values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._make_child(list(zip(self.labelnames, values))))
+        return child
+
+    def _make_child(self, labels):
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ('_registry', '_key')
+
+    def __init__(self, registry, name, labels):
+        self._registry = registry
+        self._key = _sample_key(name, labels)
+
+    def inc(self, amount=1.0):
+        self._registry.store.inc_many(((self._key, amount),))
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter. Summed across processes."""
+
+    type_name = 'counter'
+
+    def _make_child(self, labels):
+        return _CounterChild(self.registry, self.name, labels)
+
+    def inc(self, amount=1.0):
+        self.labels().inc(amount)
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount=1.0):
+        self.inc(-amount)
+
+    def set(self, value):
+        self._registry.store.set(self._key, value)
+
+
+class Gauge(_Metric):
+    """
+    Gauge. Across processes, values from processes that are still running
+    are summed (e.g. in-flight requests).
+    """
+
+    type_name = 'gauge'
+
+    def _make_child(self, labels):
+        return _GaugeChild(self.registry, self.name, labels)
+
+    def inc(self, amount=1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount=1.0):
+        self.labels().dec(amount)
+
+    def set(self, value):
+        self.labels().set(value)
+
+
+class _HistogramChild:
+    __slots__ = ('_registry', '_buckets', '_bucket_keys', '_sum_key', '_count_key')
+
+    def __init__(self, registry, name, labels, buckets):
+        self._registry = registry
+        self._buckets = buckets
+        self._bucket_keys = [
+            _sample_key(name + '_bucket', labels + [('le', _format_value(bound))])
+            for bound in buckets + (float('inf'),)
+        ]
+        self._sum_key = _sample_key(name + '_sum', labels)
+        self._count_key = _sample_key(name + '_count', labels)
+
+    def observe(self, value):
+        # Buckets are stored non-cumulatively and accumulated at exposition time
+        index = bisect.bisect_left(self._buckets, value)
+        self._registry.store.inc_many((
+            (self._bucket_keys[index], 1.0),
+            (self._sum_key, value),
+            (self._count_key, 1.0),
+        ))
+
+
+class Histogram(_Metric):
+    """Histogram with fixed buckets. Summed across processes."""
+
+    type_name = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(registry, name, documentation, labelnames)
+
+    def _make_child(self, labels):
+        return _HistogramChild(self.registry, self.name, labels, self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+
+class Registry:
+    """
+    Collection of metrics and the value store backing them.
+    If `directory` is set, values are shared across processes through
+    per-process files in that directory.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._metrics = []
+        self._callbacks = []
+        self._store = None
+        self._store_pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        pid = os.getpid()
+        if self._store_pid != pid:
+            # First use, or we are a freshly forked worker
+            with self._lock:
+                if self._store_pid != pid:
+                    if self.directory:
+                        os.makedirs(self.directory, exist_ok=True)
+                        path = os.path.join(self.directory, f'metrics_{pid}.db')
+                        # A file already there was left by an earlier process with the same pid
+                        # (always pid 1 in a container); its values are not ours to continue
+                        try:
+                            os.unlink(path)
+                        except FileNotFoundError:
+                            pass
+                        self._store = MmapValueStore(path)
+                    else:
+                        self._store = MemoryValueStore()
+                    self._store_pid = pid
+        return self._store
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+    def register_callback(self, callback):
+        """
+        Register a function called at scrape time. It returns a list of
+        (name, type, documentation, [(labels, value), ...]) families.
+        """
+        self._callbacks.append(callback)
+
+    def _collect_values(self):
+        """Merge values from every process. Returns (summed values, live-only values)."""
+        if not self.directory:
+            values = dict(self.store.items())
+            return values, values
+
+        self.store  # make sure this process has a file
+        summed = {}
+        live = {}
+        for path in glob.glob(os.path.join(self.directory, 'metrics_*.db')):
+            try:
+                pid = int(os.path.basename(path)[len('metrics_'):-len('.db')])
+                entries = MmapValueStore.read_file(path)
+            except (ValueError, OSError, struct.error):
+                continue
+            alive = _pid_alive(pid)
+            for key, value in entries:
+                summed[key] = summed.get(key, 0.0) + value
+                if alive:
+                    live[key] = live.get(key, 0.0) + value
+        return summed, live
+
+    def generate_latest(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        summed, live = self._collect_values()
+        samples_by_name = {}
+        for values, kind in ((summed, 'summed'), (live, 'live')):
+            for key, value in values.items():
+                sample_name, labels = json.loads(key)
+                samples_by_name.setdefault((kind, sample_name), []).append((labels, value))
+
+        lines = []
+        for metric in self._metrics:
+            kind = 'live' if metric.type_name == 'gauge' else 'summed'
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type_name}')
+            if metric.type_name == 'histogram':
+                lines.extend(self._render_histogram(metric, samples_by_name))
+                continue
+            for labels, value in sorted(samples_by_name.get((kind, metric.name), [])):
+                lines.append(f'{metric.name}{_format_labels(labels)} {_format_value(value)}')
+
+        for callback in self._callbacks:
+            for name, type_name, documentation, samples in callback():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {type_name}')
+                for labels, value in samples:
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _render_histogram(metric, samples_by_name):
+        buckets_by_labels = {}
+        for labels, value in samples_by_name.get(('summed', metric.name + '_bucket'), []):
+            le = labels[-1][1]
+            buckets_by_labels.setdefault(tuple(map(tuple, labels[:-1])), {})[le] = value
+        sums = {tuple(map(tuple, labels)): value
+                for labels, value in samples_by_name.get(('summed', metric.name + '_sum'), [])}
+        counts = {tuple(map(tuple, labels)): value
+                  for labels, value in samples_by_name.get(('summed', metric.name + '_count'), [])}
+
+        lines = []
+        bounds = [_format_value(bound) for bound in metric.buckets + (float('inf'),)]
+        for labels in sorted(counts):
+            cumulative = 0.0
+            bucket_values = buckets_by_labels.get(labels, {})
+            for bound in bounds:
+                cumulative += bucket_values.get(bound, 0.0)
+                lines.append(f'{metric.name}_bucket{_format_labels(list(labels) + [("le", bound)])} '
+                             f'{_format_value(cumulative)}')
+            lines.append(f'{metric.name}_sum{_format_labels(list(labels))} {_format_value(sums.get(labels, 0.0))}')
+            lines.append(f'{metric.name}_count{_format_labels(list(labels))} {_format_value(counts[labels])}')
+        return lines
+
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class LogFileStats:
+    """
+    Cheap log file size and entry count for scrape-time gauges.
+    Only newly appended bytes are scanned for newlines (or compact log
+    records) on each call; the whole file is recounted if it was replaced
+    or truncated (logrotate).
+    """
+
+    def __init__(self):
+        self._inode = None
+        self._size = 0
+        self._count = 0
+        self._compact = False
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Return (size_bytes, entry_count) for the log file at `path`."""
+        with self._lock:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self._inode, self._size, self._count = None, 0, 0
+                return 0, 0
+            if stat.st_ino != self._inode or stat.st_size < self._size:
+                self._inode, self._size, self._count = stat.st_ino, 0, 0
+            if stat.st_size > self._size:
+                with open(path, 'rb') as f:
+                    if self._size == 0:
+                        self._compact = f.read(len(COMPACT_MAGIC)) == COMPACT_MAGIC
+                        if self._compact:
+                            self._size = len(COMPACT_MAGIC)
+                    if self._compact:
+                        count, self._size = count_entries(f, self._size, stat.st_size)
+                        self._count += count
+                        return stat.st_size, self._count
+                    f.seek(self._size)
+                    remaining = stat.st_size - self._size
+                    while remaining > 0:
+                        chunk = f.read(min(remaining, 1 << 20))
+                        if not chunk:
+                            break
+                        self._count += chunk.count(b'\n')
+                        remaining -= len(chunk)
+                self._size = stat.st_size - remaining
+            return self._size, self._count
@@ -109,6 +109,23 @@ install_nginx() {
     print_status "Nginx installed successfully"
 }
 
+# Function to create the response cache directory (proxy_cache_path in dns-update.conf)
+setup_cache_dir() {
+    print_status "Setting up response cache..."
+    
+    # nginx worker user differs between distributions
+    NGINX_USER=$(grep -E '^\s*user\s' "$NGINX_CONF_DIR/nginx.conf" 2>/dev/null | awk '{print $2}' | tr -d ';')
+    if [ -z "$NGINX_USER" ]; then
+        NGINX_USER="www-data"
+    fi
+    
+    mkdir -p /var/cache/nginx/dns-update
+    chown "$NGINX_USER" /var/cache/nginx/dns-update
+    chmod 700 /var/cache/nginx/dns-update
+    
+    print_status "Response cache directory created: /var/cache/nginx/dns-update (owner: $NGINX_USER)"
+}
+
 # Function to configure nginx
 configure_nginx() {
     print_status "Configuring nginx..."
@@ -325,6 +342,7 @@ EOF
         echo "  - Protocol Mode: $SSL_MODE"
         echo "  - Nginx Config: $SITES_AVAILABLE/dns-update"
         echo "  - Logs: /var/log/nginx/dns-update-*.log"
+        echo "  - Response cache: /var/cache/nginx/dns-update (/api/logs and /api/stats)"
         echo ""
         echo "Service Management:"
         echo "  - Start nginx: sudo systemctl start nginx"
@@ -347,7 +365,7 @@ EOF
         echo "  - GET /api/stats - API for DNS update statistics"
         echo ""
         echo -e "${YELLOW}Important:${NC}"
-        echo "1. Ensure your DNS service is running on port 5000"
+        echo "1. Ensure your DNS service is running (nginx connects to /run/dns-update/dns-update.sock)"
         echo "2. Update your domain's DNS A record to point to this server"
         echo "3. The logs and stats endpoints are protected by IP whitelist (see nginx config)"
         case $PROTOCOL_MODE in
@@ -384,6 +402,9 @@ main() {
     # Install nginx
     install_nginx
     
+    # Create the cache directory before the config referencing it is tested
+    setup_cache_dir
+    
     # Configure nginx based on protocol choice
     case $PROTOCOL_MODE in
         "lets_encrypt")
@@ -126,6 +126,18 @@ remove_nginx_logs() {
     fi
 }
 
+# Function to remove the response cache
+remove_nginx_cache() {
+    print_status "Removing nginx response cache..."
+    
+    if [ -d "/var/cache/nginx/dns-update" ]; then
+        rm -rf "/var/cache/nginx/dns-update"
+        print_status "Removed /var/cache/nginx/dns-update"
+    else
+        print_warning "Response cache directory not found"
+    fi
+}
+
 # Function to uninstall nginx (optional)
 uninstall_nginx() {
     echo ""
@@ -207,6 +219,9 @@ main() {
     # Remove nginx logs
     remove_nginx_logs
     
+    # Remove response cache
+    remove_nginx_cache
+    
     # Optionally uninstall nginx
     uninstall_nginx
     
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Password hashing for the DNS Update Service.
+
+Passwords are stored as salted scrypt hashes. Because scrypt deliberately
+costs tens of milliseconds per check, recently verified passwords are
+remembered for a short time, keyed by an HMAC of the presented secret, so
+clients that update every minute do not pay for the KDF each time. Failed
+checks are never cached, so guessing stays expensive. A plaintext password
+is compared in constant time instead: hashing it in memory would protect
+nothing, and would let a flood of wrong guesses cost a scrypt run each.
+
+Usage:
+  python password_hash.py          - Prompt for a password and print its hash
+"""
+
+import base64
+import getpass
+import hashlib
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+SCHEME = 'scrypt'
+# n=2^14, r=8 uses 16 MB of memory per check
+DEFAULT_N = 2 ** 14
+DEFAULT_R = 8
+DEFAULT_P = 1
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r + (1 << 20), dklen=KEY_BYTES)
+
+
+def hash_password(password, n=DEFAULT_N, r=DEFAULT_R, p=DEFAULT_P, salt=None):
+    """
+    Hash a password. Returns 'scrypt:n:r:p:salt:hash' (no '$', so the value
+    can go in env files and docker-compose without escaping).
+    """
+    salt = salt or os.urandom(SALT_BYTES)
+    derived = _scrypt(password, salt, n, r, p)
+    return f'{SCHEME}:{n}:{r}:{p}:{_b64encode(salt)}:{_b64encode(derived)}'
+
+
+def is_password_hash(value):
+    """Check whether a value looks like a hash made by hash_password()."""
+    return bool(value) and value.startswith(SCHEME + ':') and value.count(':') == 5
+
+
+def verify_password_hash(password, encoded):
+    """
+    Check a password against a hash from hash_password().
+    Raises ValueError if the hash is malformed.
+    """
+    try:
+        scheme, n, r, p, salt, expected = encoded.split(':')
+        if scheme != SCHEME:
+            raise ValueError(f"Unsupported password hash scheme: {scheme}")
+        derived = _scrypt(password, _b64decode(salt), int(n), int(r), int(p))
+        return hmac.compare_digest(derived, _b64decode(expected))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid password hash: {e}")
+
+
+class VerifiedCache:
+    """
+    Bounded, TTL'd set of recently verified credentials.
+    Entries are keyed by HMAC(process secret, stored hash + presented secret),
+    so raw secrets are never held and changing the stored hash invalidates
+    every entry.
+    """
+
+    def __init__(self, ttl=300, max_entries=1024, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._secret = os.urandom(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, stored_hash, password):
+        return hmac.new(self._secret, f'{stored_hash}\0{password}'.encode('utf-8'), hashlib.sha256).digest()
+
+    def contains(self, stored_hash, password):
+        """Check whether this credential was verified within the TTL."""
+        if self.ttl <= 0:
+            return False
+        key = self._key(stored_hash, password)
+        with self._lock:
+            expires = self._entries.get(key)
+            if expires is None:
+                return False
+            if expires <= self._clock():
+                del self._entries[key]
+                return False
+            return True
+
+    def add(self, stored_hash, password):
+        """Remember a successfully verified credential."""
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        key = self._key(stored_hash, password)
+        with self._lock:
+            self._entries[key] = self._clock() + self.ttl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class PasswordVerifier:
+    """
+    Verifies presented passwords against a stored scrypt hash, consulting
+    the verified-credential cache first, or against a plaintext password.
+    """
+
+    def __init__(self, cache_ttl=300, cache_size=1024):
+        self.cache = VerifiedCache(ttl=cache_ttl, max_entries=cache_size)
+        self.cache_hits = 0
+        self.kdf_checks = 0
+        self.plaintext_checks = 0
+
+    def verify(self, password, password_hash=None, plaintext=None):
+        """Check a presented password. Returns False if none is configured."""
+        if not password or not (password_hash or plaintext):
+            return False
+        if not password_hash:
+            # Compare digests so the time taken does not depend on the length either
+            self.plaintext_checks += 1
+            return hmac.compare_digest(hashlib.sha256(password.encode('utf-8')).digest(),
+                                       hashlib.sha256(plaintext.encode('utf-8')).digest())
+        stored = password_hash
+        if self.cache.contains(stored, password):
+            self.cache_hits += 1
+            return True
+        self.kdf_checks += 1
+        if not verify_password_hash(password, stored):
+            return False
+        self.cache.add(stored, password)
+        return True
+
+    def stats(self):
+        return {
+            'cache_entries': len(self.cache),
+            'cache_hits': self.cache_hits,
+            'kdf_checks': self.kdf_checks,
+            'plaintext_checks': self.plaintext_checks,
+        }
+
+
+def main():
+    """Prompt for a password and print its hash for AUTH_PASSWORD_HASH."""
+    password = getpass.getpass('Password: ')
+    if not password:
+        print("❌ Password must not be empty", file=sys.stderr)
+        sys.exit(1)
+    if getpass.getpass('Repeat password: ') != password:
+        print("❌ Passwords do not match", file=sys.stderr)
+        sys.exit(1)
+    print(hash_password(password))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Request profiling for the DNS Update Service.
+
+StageTimer breaks a request down into sequential stages for the
+Server-Timing header and the log entry. SamplingProfiler runs cProfile on
+1 in N requests and writes the results to a directory for offline
+analysis with pstats or snakeviz.
+"""
+
+import cProfile
+import functools
+import itertools
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class StageTimer:
+    """
+    Records the time spent in consecutive stages of a request.
+    Each mark() closes the stage that started at the previous mark.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self.start = self._last = clock()
+        self.stages = {}
+
+    def mark(self, name):
+        """End the current stage and attribute its time to `name`."""
+        now = self._clock()
+        self.stages[name] = self.stages.get(name, 0.0) + (now - self._last)
+        self._last = now
+
+    def as_dict(self):
+        """Stage durations in milliseconds, in the order they happened."""
+        return {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()}
+
+    def server_timing(self):
+        """Format the stages and the total so far as a Server-Timing header value."""
+        metrics = [f'{name};dur={seconds * 1000:.3f}' for name, seconds in self.stages.items()]
+        metrics.append(f'total;dur={(self._clock() - self.start) * 1000:.3f}')
+        return ', '.join(metrics)
+
+
+class SamplingProfiler:
+    """
+    Profiles 1 in `sample_rate` calls with cProfile (0 disables sampling).
+    Only one call is profiled at a time; samples that arrive while another
+    is being profiled are skipped.
+    """
+
+    def __init__(self, directory, sample_rate=0):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.samples_written = 0
+        self.samples_skipped = 0
+        self._counter = itertools.count(1)
+        self._busy = threading.Lock()
+
+    def configure(self, sample_rate=None, directory=None):
+        """Change the sample rate and/or output directory at runtime."""
+        if sample_rate is not None:
+            if sample_rate < 0:
+                raise ValueError("sample_rate must be 0 or a positive integer")
+            self.sample_rate = sample_rate
+        if directory is not None:
+            self.directory = directory
+
+    def should_sample(self):
+        """Decide whether the next call is profiled."""
+        rate = self.sample_rate
+        return rate > 0 and next(self._counter) % rate == 0
+
+    def start(self, name):
+        """
+        Start profiling a call made in steps, possibly on different threads,
+        if this call is sampled. Returns a ProfileSample, or None.
+        """
+        if not self.should_sample():
+            return None
+        if not self._busy.acquire(blocking=False):
+            self.samples_skipped += 1
+            return None
+        return ProfileSample(self, name)
+
+    def run(self, name, func, *args, **kwargs):
+        """Call func, profiling it if this call is sampled."""
+        sample = self.start(name)
+        if sample is None:
+            return func(*args, **kwargs)
+        try:
+            return sample.run(func, *args, **kwargs)
+        finally:
+            sample.finish()
+
+    def _write(self, profiler, name):
+        timestamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime())
+        path = os.path.join(self.directory, f'{name}-{timestamp}-{os.getpid()}-{self.samples_written + 1}.prof')
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            profiler.dump_stats(path)
+            self.samples_written += 1
+        except OSError as e:
+            logger.warning(f"Failed to write profile to {path}: {e}")
+
+    def wrap(self, name):
+        """Decorator that samples calls to the decorated function."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                return self.run(name, func, *args, **kwargs)
+            return wrapper
+        return decorator
+
+    def stats(self):
+        """Current settings and counters."""
+        return {
+            'sample_rate': self.sample_rate,
+            'directory': self.directory,
+            'samples_written': self.samples_written,
+            'samples_skipped': self.samples_skipped,
+        }
+
+
+class ProfileSample:
+    """One sampled call, profiled one step at a time with run() until finish()."""
+
+    def __init__(self, owner, name):
+        self._owner = owner
+        self._name = name
+        self._profile = cProfile.Profile()
+        self._profiled = False
+
+    def run(self, func, *args, **kwargs):
+        """Call func with profiling enabled on the calling thread."""
+        try:
+            self._profile.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) is already active
+            return func(*args, **kwargs)
+        self._profiled = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._profile.disable()
+
+    def finish(self):
+        """Write the profile and let the next sample start."""
+        try:
+            if self._profiled:
+                self._owner._write(self._profile, self._name)
+            else:
+                self._owner.samples_skipped += 1
+        finally:
+            self._owner._busy.release()
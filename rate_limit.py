@@ -0,0 +1,106 @@
+"""
+Token bucket rate limiting for the DNS Update Service.
+Buckets are kept in a size-bounded LRU so memory stays flat no matter
+how many distinct keys (requester IPs, credentials) are seen.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    """
+    A single token bucket refilled continuously at `rate` tokens per second
+    up to `capacity` tokens.
+    """
+
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, capacity, now):
+        self.tokens = float(capacity)
+        self.updated = now
+
+    def refill(self, capacity, rate, now):
+        """Add the tokens accrued since the last update."""
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(float(capacity), self.tokens + elapsed * rate)
+            self.updated = now
+
+    def take(self, capacity, rate, now, cost=1.0):
+        """
+        Try to remove `cost` tokens.
+        Returns 0 on success, otherwise the number of seconds until enough
+        tokens will be available.
+        """
+        self.refill(capacity, rate, now)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        if rate <= 0:
+            return math.inf
+        return (cost - self.tokens) / rate
+
+    def give_back(self, capacity, cost=1.0):
+        """Return `cost` tokens taken for a request that was not served after all."""
+        self.tokens = min(float(capacity), self.tokens + cost)
+
+
+class RateLimiter:
+    """
+    Keyed token bucket rate limiter backed by a bounded LRU.
+
+    When more than `max_keys` keys are tracked, the least recently used
+    bucket is dropped. A dropped key starts again with a full bucket, which
+    is the price paid for constant memory under key spraying.
+    """
+
+    def __init__(self, rate_per_minute, burst, max_keys=10000, clock=time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, int(burst))
+        self.max_keys = max(1, int(max_keys))
+        self.clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, cost=1.0):
+        """
+        Consume `cost` tokens for `key`.
+        Returns 0 if the request is allowed, otherwise the number of seconds
+        the caller should wait before retrying.
+        """
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.capacity, now)
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket.take(self.capacity, self.rate, now, cost)
+
+    def refund(self, key, cost=1.0):
+        """Give back `cost` tokens consumed by hit() for a request that was then rejected elsewhere."""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.give_back(self.capacity, cost)
+
+    def clear(self):
+        """Forget all tracked buckets."""
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+def retry_after_seconds(wait):
+    """Convert a wait time into a whole-second Retry-After value."""
+    if math.isinf(wait):
+        return 3600
+    return max(1, int(math.ceil(wait)))
@@ -0,0 +1,71 @@
+"""
+In-memory state of the records the service manages.
+
+GET /check and the dashboard's "last updated IP" login both need the value
+each record was last set to. RecordState keeps it in memory, built from the
+successful updates in the DNS update log: refresh() (see log_tail.py) reads
+only what was appended since the last call, whoever wrote it (this or
+another worker process), and starts over if the log file was replaced.
+Other entries are skipped without being decoded, so a flood of failed
+updates costs a byte search of the new lines, never a read of the log.
+"""
+
+from drift import normalize_record_name
+from log_tail import LogTail
+
+# Bytes a successful update's JSON line must contain (a JSON escape could hide it)
+SUCCESS_NEEDLES = (b'"success"', b'\\')
+
+
+class RecordState(LogTail):
+    """Last value applied to each record: {name: {'ip_address', 'updated_at', 'change_id', 'hosted_zone_id'}}."""
+
+    def clear(self):
+        self._records = {}
+        self._last = None
+        self._entries = 0
+
+    def __len__(self):
+        """The number of log entries read, successful or not."""
+        return self._entries
+
+    def _append_line(self, line):
+        if any(needle in line for needle in SUCCESS_NEEDLES):
+            super()._append_line(line)
+        else:
+            self._entries += 1
+
+    def append(self, entry):
+        self._entries += 1
+        if entry.get('status') != 'success':
+            return
+        self._last = {'ip_address': entry.get('ip_address'), 'updated_at': entry.get('timestamp'),
+                      'change_id': entry.get('change_id'), 'hosted_zone_id': entry.get('hosted_zone_id')}
+        if entry.get('domain_name') and entry.get('ip_address'):
+            self._records[normalize_record_name(entry['domain_name'])] = self._last
+
+    def get(self, domain_name):
+        """The last applied state of a record, or None."""
+        with self._lock:
+            record = self._records.get(normalize_record_name(domain_name))
+            return dict(record) if record else None
+
+    def records(self):
+        """The last applied state of every record: {record name: state}."""
+        with self._lock:
+            return {name: dict(record) for name, record in self._records.items()}
+
+    def last_updated(self):
+        """The state applied by the most recent successful update of any record, or None."""
+        with self._lock:
+            return dict(self._last) if self._last else None
+
+    def set(self, domain_name, ip_address, updated_at, change_id, hosted_zone_id=None):
+        """
+        Record a successful update this process has just made, in case its
+        log write failed; refresh() reads the entry again if it was written.
+        """
+        with self._lock:
+            self._last = {'ip_address': ip_address, 'updated_at': updated_at, 'change_id': change_id,
+                          'hosted_zone_id': hosted_zone_id}
+            self._records[normalize_record_name(domain_name)] = self._last
@@ -0,0 +1,141 @@
+"""
+Client-side scheduling of Route53 API calls.
+Route53 enforces a per-account request rate, so every call goes through a
+shared token bucket and throttling errors are retried with jittered
+exponential backoff inside a deadline.
+"""
+
+import random
+import sys
+import threading
+import time
+from rate_limit import TokenBucket
+
+# Error codes that mean "slow down and try again"
+RETRYABLE_ERROR_CODES = frozenset([
+    'Throttling',
+    'ThrottlingException',
+    'PriorRequestNotComplete',
+])
+
+
+def is_aws_client_error(error):
+    """
+    Check whether an exception is a botocore ClientError.
+    botocore is only imported once a Route53 client exists, so if it has not
+    been loaded the error cannot be a ClientError.
+    """
+    botocore_exceptions = sys.modules.get('botocore.exceptions')
+    return botocore_exceptions is not None and isinstance(error, botocore_exceptions.ClientError)
+
+
+def get_error_code(error):
+    """Get the AWS error code from a ClientError."""
+    return getattr(error, 'response', {}).get('Error', {}).get('Code')
+
+
+def client_throttled_error(operation_name):
+    """Build the ClientError raised when the client-side rate limit cannot admit a call in time."""
+    from botocore.exceptions import ClientError
+    return ClientError(
+        {'Error': {'Code': 'Throttling',
+                   'Message': 'Route53 call rate limit exceeded (client-side)'}},
+        operation_name
+    )
+
+
+class Route53Scheduler:
+    """
+    Shared Route53 call scheduler.
+
+    Calls are admitted by a token bucket sized to the account limit. The
+    admission rate adapts: it is halved whenever AWS throttles us and
+    recovers gradually after successful calls.
+    """
+
+    def __init__(self, rate_per_second=5.0, burst=5, deadline=20.0, max_retries=5,
+                 base_delay=0.2, max_delay=5.0, clock=time.monotonic, sleep=time.sleep):
+        self.max_rate = float(rate_per_second)
+        self.min_rate = self.max_rate / 16
+        self.rate = self.max_rate
+        self.capacity = max(1, int(burst))
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.sleep = sleep
+        self._bucket = TokenBucket(self.capacity, clock())
+        self._lock = threading.Lock()
+        self._counters = {
+            'calls': 0,
+            'throttles': 0,
+            'retries': 0,
+            'failures': 0,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _acquire(self, give_up_at):
+        """Wait for a token. Returns False if the deadline would be exceeded."""
+        while True:
+            with self._lock:
+                now = self.clock()
+                wait = self._bucket.take(self.capacity, self.rate, now)
+            if not wait:
+                return True
+            if now + wait > give_up_at:
+                return False
+            self.sleep(wait)
+
+    def _on_throttle(self):
+        with self._lock:
+            self._counters['throttles'] += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def _on_success(self):
+        with self._lock:
+            self._counters['calls'] += 1
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff delay for a retry attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call a Route53 client method through the scheduler.
+        Raises the last ClientError if the call cannot succeed before the deadline.
+        """
+        give_up_at = self.clock() + self.deadline
+        attempt = 0
+        while True:
+            if not self._acquire(give_up_at):
+                self._count('failures')
+                raise client_throttled_error(getattr(func, '__name__', 'Route53Call'))
+            try:
+                response = func(*args, **kwargs)
+            except Exception as e:
+                if not is_aws_client_error(e) or get_error_code(e) not in RETRYABLE_ERROR_CODES:
+                    self._count('failures')
+                    raise
+                self._on_throttle()
+                delay = self.backoff(attempt)
+                attempt += 1
+                if attempt > self.max_retries or self.clock() + delay > give_up_at:
+                    self._count('failures')
+                    raise
+                self._count('retries')
+                self.sleep(delay)
+                continue
+            self._on_success()
+            return response
+
+    def stats(self):
+        """Get a snapshot of the scheduler counters."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['current_rate'] = round(self.rate, 3)
+        return stats
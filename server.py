@@ -0,0 +1,96 @@
+"""
+Listening sockets for the DNS Update Service.
+
+The service listens on TCP (FLASK_HOST/FLASK_PORT), on a Unix domain
+socket (FLASK_UNIX_SOCKET) for a local reverse proxy, or on sockets passed
+in by systemd socket activation (dns-update.socket). With socket
+activation systemd owns the listening sockets, so connections arriving
+while the service restarts wait in the backlog instead of being refused.
+"""
+
+import logging
+import os
+import socket
+import threading
+from werkzeug.serving import make_server
+
+logger = logging.getLogger(__name__)
+
+# First file descriptor passed by systemd (sd_listen_fds)
+SD_LISTEN_FDS_START = 3
+
+
+def get_systemd_listen_fds():
+    """
+    Get the listening sockets passed by systemd socket activation.
+    The variables are removed so child processes do not pick them up.
+    Returns a list of file descriptors (empty if not socket-activated).
+    """
+    if os.environ.get('LISTEN_PID') != str(os.getpid()):
+        return []
+    count = int(os.environ.get('LISTEN_FDS') or 0)
+    for name in ('LISTEN_PID', 'LISTEN_FDS', 'LISTEN_FDNAMES'):
+        os.environ.pop(name, None)
+    return list(range(SD_LISTEN_FDS_START, SD_LISTEN_FDS_START + count))
+
+
+def get_socket_address(fd):
+    """Get the werkzeug (host, port) for an already listening socket."""
+    sock = socket.socket(fileno=fd)
+    try:
+        family, address = sock.family, sock.getsockname()
+    finally:
+        sock.detach()
+    if family == socket.AF_UNIX:
+        return f"unix://{address}", 0
+    return address[0], address[1]
+
+
+def bind_unix_socket(path, mode=0o660, backlog=128):
+    """Create a listening Unix domain socket at `path`, replacing a stale socket file."""
+    if os.path.exists(path):
+        os.unlink(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    os.chmod(path, mode)
+    sock.listen(backlog)
+    return sock
+
+
+def make_servers(app, host, port, unix_socket=None, unix_socket_mode=0o660):
+    """
+    Create the WSGI servers to run: one per socket passed by systemd, else
+    one on `unix_socket` if set. Returns an empty list for plain TCP.
+    """
+    fds = get_systemd_listen_fds()
+    if fds:
+        servers = []
+        for fd in fds:
+            fd_host, fd_port = get_socket_address(fd)
+            servers.append(make_server(fd_host, fd_port, app, threaded=True, fd=fd))
+            logger.info(f"Listening on {fd_host}{':' + str(fd_port) if fd_port else ''} (systemd socket)")
+        return servers
+
+    if unix_socket:
+        server = make_server(f"unix://{unix_socket}", 0, app, threaded=True)
+        os.chmod(unix_socket, unix_socket_mode)
+        logger.info(f"Listening on unix://{unix_socket}")
+        return [server]
+
+    return []
+
+
+def run_server(app, host, port, unix_socket=None, unix_socket_mode=0o660, debug=False):
+    """Serve the app until interrupted."""
+    servers = make_servers(app, host, port, unix_socket, unix_socket_mode)
+    if not servers:
+        app.run(host=host, port=port, debug=debug)
+        return
+
+    for server in servers[1:]:
+        threading.Thread(target=server.serve_forever, name='http-server', daemon=True).start()
+    try:
+        servers[0].serve_forever()
+    finally:
+        for server in servers:
+            server.server_close()
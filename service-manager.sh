@@ -198,7 +198,12 @@ test_service() {
     
     print_status "Testing health endpoint..."
     if command -v curl > /dev/null 2>&1; then
-        response=$(curl -s -w "%{http_code}" http://localhost:5000/health)
+        # Socket-activated installs listen on the Unix socket only
+        if [ -S /run/dns-update/dns-update.sock ]; then
+            response=$(curl -s -w "%{http_code}" --unix-socket /run/dns-update/dns-update.sock http://localhost/health)
+        else
+            response=$(curl -s -w "%{http_code}" http://localhost:5000/health)
+        fi
         http_code="${response: -3}"
         body="${response%???}"
         
@@ -52,8 +52,9 @@ def check_aws_credentials():
         print("Please configure AWS credentials using one of these methods:")
         print("1. Set environment variables: AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY")
         print("2. Use AWS CLI: aws configure")
-        print("3. Use IAM role (if running on EC2)")
-        print("\nThe service will start but DNS updates will fail without credentials.")
+        print("3. Use IAM role (if running on EC2/ECS) or set AWS_ROLE_ARN to assume a role")
+        print("\nRole-based credentials will be refreshed in the background.")
+        print("DNS updates will fail if no credentials can be found.")
     else:
         print("✅ AWS credentials found in environment variables.")
 
@@ -103,16 +104,27 @@ def main():
     
     # Import and run the Flask app
     try:
-        from app import app, Config
+        from app import (app, Config, start_route53_warmup, health_probes, drift_reconciler,
+                         install_reload_signal_handler, install_shutdown_signal_handler)
+        from server import run_server
         host = Config.FLASK_HOST
         port = Config.FLASK_PORT
         debug = Config.FLASK_DEBUG
         
-        print(f"Starting server on {host}:{port}")
+        if Config.FLASK_UNIX_SOCKET:
+            print(f"Starting server on unix://{Config.FLASK_UNIX_SOCKET}")
+        else:
+            print(f"Starting server on {host}:{port}")
         print(f"Debug mode: {debug}")
         print("Press Ctrl+C to stop the server")
         
-        app.run(host=host, port=port, debug=debug)
+        start_route53_warmup()
+        health_probes.start()
+        drift_reconciler.start()
+        install_reload_signal_handler()
+        install_shutdown_signal_handler()
+        run_server(app, host, port, unix_socket=Config.FLASK_UNIX_SOCKET,
+                   unix_socket_mode=Config.FLASK_UNIX_SOCKET_MODE, debug=debug)
         
     except Exception as e:
         print(f"Error starting application: {e}")
@@ -0,0 +1,121 @@
+import json
+import os
+import pytest
+from app import app, Config
+import app as app_module
+from api_tokens import TokenStore, generate_token, token_digest, parse_tokens, write_token_file
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def token_entry(token_id, token, scopes=('update',), domains=(), revoked=False):
+    return {'id': token_id, 'digest': token_digest(token), 'scopes': list(scopes),
+            'domains': list(domains), 'revoked': revoked}
+
+def test_scopes_and_domains():
+    """Test that tokens only grant their scopes and domains."""
+    update_token = generate_token()
+    read_token = generate_token()
+    by_digest = parse_tokens({'tokens': [
+        token_entry('router', update_token, domains=['home.example.com']),
+        token_entry('dashboard', read_token, scopes=['read']),
+    ]})
+    router = by_digest[token_digest(update_token)]
+    assert router.allows('update', 'home.example.com')
+    assert router.allows('update', 'HOME.example.com.')
+    assert not router.allows('update', 'other.example.com')
+    assert not router.allows('read')
+    dashboard = by_digest[token_digest(read_token)]
+    assert dashboard.allows('read')
+    assert not dashboard.allows('update', 'home.example.com')
+
+def test_invalid_documents():
+    """Test that invalid token files are rejected."""
+    token = generate_token()
+    with pytest.raises(ValueError):
+        parse_tokens({'tokens': [{'id': 'a'}]})
+    with pytest.raises(ValueError):
+        parse_tokens({'tokens': [token_entry('a', token, scopes=['superuser'])]})
+    with pytest.raises(ValueError):
+        parse_tokens({'tokens': [token_entry('a', token), token_entry('a', generate_token())]})
+
+def test_store_reloads_and_revokes(tmp_path):
+    """Test reload on file change, revocation and keeping old tokens on a bad file."""
+    path = str(tmp_path / 'tokens.json')
+    first, second = generate_token(), generate_token()
+    write_token_file(path, {'tokens': [token_entry('first', first), token_entry('second', second)]})
+    clock = FakeClock()
+    store = TokenStore(path, check_interval=5, clock=clock)
+
+    assert store.authenticate(first).id == 'first'
+    assert store.authenticate('dnsu_unknown') is None
+    assert store.authenticate('') is None
+
+    write_token_file(path, {'tokens': [token_entry('first', first, revoked=True), token_entry('second', second)]})
+    # Not checked again until the interval passes
+    assert store.authenticate(first) is not None
+    clock.now += 5
+    assert store.authenticate(first) is None
+    assert store.authenticate(second).id == 'second'
+
+    with open(path, 'w') as f:
+        f.write('{not json')
+    clock.now += 5
+    assert store.authenticate(second).id == 'second'
+    assert store.stats()['last_error']
+
+    # Deleting the file revokes every token; recreating it brings them back
+    os.unlink(path)
+    clock.now += 5
+    assert store.authenticate(second) is None and len(store) == 0
+    write_token_file(path, {'tokens': [token_entry('second', second)]})
+    clock.now += 5
+    assert store.authenticate(second).id == 'second'
+
+def test_many_tokens(tmp_path):
+    """Test a store with thousands of tokens."""
+    path = str(tmp_path / 'tokens.json')
+    tokens = [generate_token() for _ in range(5000)]
+    write_token_file(path, {'tokens': [token_entry(f'router-{i}', t) for i, t in enumerate(tokens)]})
+    store = TokenStore(path)
+    assert store.authenticate(tokens[4321]).id == 'router-4321'
+    assert len(store) == 5000
+
+def test_update_dns_with_token(monkeypatch, tmp_path):
+    """Test that /update-dns accepts scoped tokens and logs the token id."""
+    log_file = tmp_path / 'dns_updates.log'
+    path = str(tmp_path / 'tokens.json')
+    good, other_domain, read_only = generate_token(), generate_token(), generate_token()
+    write_token_file(path, {'tokens': [
+        token_entry('router-home', good, domains=['home.example.com']),
+        token_entry('router-office', other_domain, domains=['office.example.com']),
+        token_entry('dashboard', read_only, scopes=['read']),
+    ]})
+    monkeypatch.setenv('DNS_LOG_FILE', str(log_file))
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', True)
+    monkeypatch.setattr(Config, 'AUTH_PASSWORD', '')
+    monkeypatch.setattr(Config, 'API_TOKENS_FILE', path)
+    monkeypatch.setattr(Config, 'ENABLE_RATE_LIMIT', False)
+    monkeypatch.setattr(Config, 'ENABLE_IP_VALIDATION', False)
+    monkeypatch.setattr(Config, 'DOMAIN_NAME', 'home.example.com')
+    monkeypatch.setattr(Config, 'HOSTED_ZONE_ID', 'Z123')
+    monkeypatch.setattr(app_module, 'api_token_store', TokenStore(path))
+    monkeypatch.setattr(app_module, 'get_route53_client', lambda: None)
+
+    with app.test_client() as client:
+        for token in (other_domain, read_only, 'wrong'):
+            response = client.post('/update-dns', data='192.168.1.1', headers={'Authorization': f'Bearer {token}'})
+            assert response.status_code == 401
+        # Authenticated; stopped later because there is no Route53 client
+        response = client.post('/update-dns', data='192.168.1.1', headers={'Authorization': f'Bearer {good}'})
+        assert response.status_code == 500
+
+        assert client.get('/api/stats', headers={'X-Auth-Password': good}).status_code == 401
+        assert client.get('/api/stats', headers={'X-Auth-Password': read_only}).status_code == 200
+
+    entries = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert [entry['token_id'] for entry in entries] == ['router-office', 'dashboard', None, 'router-home']
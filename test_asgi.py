@@ -0,0 +1,172 @@
+import asyncio
+import json
+import socket
+import sys
+import threading
+import types
+import pytest
+import app as app_module
+import asgi
+import server as server_module
+from app import app, Config
+from asgi import ASGIApp
+from profiling import SamplingProfiler
+from route53_scheduler import Route53Scheduler
+
+CLIENT_IP = '203.0.113.7'
+
+class SlowRoute53:
+    """Route53 stand-in whose changes block until released."""
+    def __init__(self):
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+
+    def change_resource_record_sets(self, **kwargs):
+        with self.lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            self.release.wait(5)
+        finally:
+            with self.lock:
+                self.active -= 1
+        return {'ChangeInfo': {'Id': f'/change/C{self.calls}', 'Status': 'PENDING'}}
+
+async def call(application, method, path, body=b'', headers=(), chunk_size=None):
+    """Send one request to an ASGI app. Returns the status, headers and body."""
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)] if chunk_size and body else [body]
+    messages = [{'type': 'http.request', 'body': chunk, 'more_body': i < len(chunks) - 1}
+                for i, chunk in enumerate(chunks)]
+    sent = []
+
+    async def receive():
+        if messages:
+            await asyncio.sleep(0)  # A slow client: one chunk per loop iteration
+            return messages.pop(0)
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    path, _, query = path.partition('?')
+    scope = {'type': 'http', 'http_version': '1.1', 'method': method, 'scheme': 'http', 'path': path,
+             'root_path': '', 'query_string': query.encode(), 'server': ('testserver', 80),
+             'client': (CLIENT_IP, 50000), 'headers': [(name.lower().encode(), value.encode()) for name, value in headers]}
+    await application(scope, receive, send)
+    return sent[0]['status'], dict(sent[0]['headers']), b''.join(m.get('body', b'') for m in sent[1:])
+
+@pytest.fixture
+def service(monkeypatch, tmp_path):
+    """Configure the app for updates against a slow Route53 stand-in."""
+    log_file = tmp_path / 'dns_updates.log'
+    route53 = SlowRoute53()
+    monkeypatch.setenv('DNS_LOG_FILE', str(log_file))
+    monkeypatch.setattr(Config, 'HOSTED_ZONE_ID', 'Z123')
+    monkeypatch.setattr(Config, 'DOMAIN_NAME', 'home.example.com')
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', True)
+    monkeypatch.setattr(Config, 'AUTH_PASSWORD', 'secret')
+    monkeypatch.setattr(Config, 'ENABLE_RATE_LIMIT', False)
+    monkeypatch.setattr(app_module, 'route53_client', route53)
+    monkeypatch.setattr(app_module, 'route53_scheduler', Route53Scheduler(rate_per_second=1000, burst=1000))
+    route53.log_file = log_file
+    yield route53
+    route53.release.set()
+
+def test_update_dns_caps_route53_calls(service):
+    """Test that updates wait for Route53 without blocking other requests, at most N calls at a time."""
+    application = ASGIApp(app, io_workers=2, route53_workers=2)
+
+    async def scenario():
+        updates = [asyncio.ensure_future(call(application, 'POST', '/update-dns', CLIENT_IP.encode(),
+                                               headers=[('X-Auth-Password', 'secret')]))
+                   for _ in range(6)]
+        while service.active < 2:
+            await asyncio.sleep(0.01)
+        # Both Route53 threads are busy; the I/O pool still serves other requests
+        status, _, body = await call(application, 'GET', '/health')
+        assert status == 200 and json.loads(body)['status'] == 'healthy'
+        service.release.set()
+        return await asyncio.gather(*updates)
+
+    results = asyncio.run(scenario())
+    assert [status for status, _, _ in results] == [200] * 6
+    assert service.max_active == 2 and service.calls == 6
+    assert json.loads(results[0][2])['message'] == f'A record for home.example.com updated to {CLIENT_IP}'
+    assert results[0][1][b'content-type'] == b'application/json'
+    entries = [json.loads(line) for line in service.log_file.read_text().splitlines()]
+    assert [entry['status'] for entry in entries] == ['success'] * 6
+    assert entries[0]['requester_ip'] == CLIENT_IP and entries[0]['auth_method'] == 'header'
+
+def test_update_dns_matches_flask_responses(service):
+    """Test that rejected updates get the same responses as from the WSGI app, and are logged."""
+    application = ASGIApp(app, io_workers=2, route53_workers=2)
+    service.release.set()
+    cases = [(b'', []), (b'not-an-ip', [('X-Auth-Password', 'secret')]),
+             (CLIENT_IP.encode(), [('X-Auth-Password', 'wrong')]),
+             (b'198.51.100.1 secret', [])]
+    for body, headers in cases:
+        status, _, data = asyncio.run(call(application, 'POST', '/update-dns', body, headers, chunk_size=3))
+        with app.test_client() as client:
+            expected = client.post('/update-dns', data=body, headers=dict(headers),
+                                   environ_base={'REMOTE_ADDR': CLIENT_IP})
+        assert (status, json.loads(data)) == (expected.status_code, expected.get_json())
+    assert service.calls == 0
+    entries = [json.loads(line) for line in service.log_file.read_text().splitlines()]
+    assert [entry['error_message'] for entry in entries[::2]] == [
+        'Authentication failed', f'IP address mismatch. Requested: 198.51.100.1, Requester: {CLIENT_IP}']
+
+def test_update_dns_profiled_and_timed(service, monkeypatch, tmp_path):
+    """Test that async updates are sampled by the request profiler and report their stages."""
+    profiler = SamplingProfiler(str(tmp_path / 'profiles'), sample_rate=1)
+    monkeypatch.setattr(app_module, 'request_profiler', profiler)
+    application = ASGIApp(app, io_workers=2, route53_workers=2)
+    service.release.set()
+    status, headers, _ = asyncio.run(call(application, 'POST', '/update-dns', CLIENT_IP.encode(),
+                                          headers=[('X-Auth-Password', 'secret')]))
+    assert status == 200
+    stages = [part.split(';')[0] for part in headers[b'server-timing'].decode().split(', ')]
+    assert stages == ['parse', 'rate_limit', 'auth', 'ip_check', 'aws_client', 'route53', 'log_write', 'log_fsync', 'total']
+    assert profiler.stats()['samples_written'] == 1
+    assert len(list((tmp_path / 'profiles').iterdir())) == 1
+
+def test_other_routes_and_body_limit(service):
+    """Test that other routes are served by the Flask app and oversized bodies are refused."""
+    application = ASGIApp(app, io_workers=2, route53_workers=2, max_body_size=64)
+    status, headers, _ = asyncio.run(call(application, 'GET', '/api/logs?page=1'))
+    assert status == 401 and b'content-type' in headers
+    status, _, _ = asyncio.run(call(application, 'GET', '/no-such-page'))
+    assert status == 404
+    status, _, body = asyncio.run(call(application, 'POST', '/update-dns', b'1' * 100, chunk_size=10))
+    assert status == 413 and json.loads(body) == {'error': 'Request body too large'}
+
+def test_main_serves_every_systemd_socket(monkeypatch, tmp_path):
+    """Test that the async mode serves all the sockets passed by systemd, not just the first."""
+    served = []
+
+    class Server:
+        def __init__(self, config):
+            self.config = config
+
+        def run(self, sockets=None):
+            served.extend(sock.getsockname() for sock in sockets)
+
+    uvicorn = types.SimpleNamespace(Config=lambda *args, **kwargs: (args, kwargs), Server=Server)
+    monkeypatch.setitem(sys.modules, 'uvicorn', uvicorn)
+    for name in ('start_route53_warmup', 'install_reload_signal_handler', 'install_shutdown_signal_handler'):
+        monkeypatch.setattr(app_module, name, lambda: None)
+    monkeypatch.setattr(app_module.health_probes, 'start', lambda: None)
+    monkeypatch.setattr(app_module.drift_reconciler, 'start', lambda: None)
+
+    fds = []
+    for name in ('a.sock', 'b.sock'):
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(str(tmp_path / name))
+        listener.listen(1)
+        fds.append(listener.detach())  # Owned by main() from here on, as systemd's sockets are
+    monkeypatch.setattr(server_module, 'get_systemd_listen_fds', lambda: fds)
+    asgi.main()
+    assert served == [str(tmp_path / 'a.sock'), str(tmp_path / 'b.sock')]
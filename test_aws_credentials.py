@@ -0,0 +1,111 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from botocore.credentials import RefreshableCredentials
+import app as app_module
+from app import Config
+from aws_credentials import CredentialRefresher
+
+class FakeClock:
+    """Manually advanced wall clock."""
+    def __init__(self):
+        self.now = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+
+    def __call__(self):
+        return self.now
+
+def make_fetch(clock, lifetime=3600):
+    """Return a fetch function handing out numbered credentials that expire after `lifetime` seconds."""
+    calls = []
+    def fetch():
+        calls.append(clock())
+        return {
+            'access_key': f'AKID{len(calls)}',
+            'secret_key': 'secret',
+            'token': 'token',
+            'expiry_time': datetime.fromtimestamp(clock() + lifetime, timezone.utc),
+            'method': 'test',
+        }
+    fetch.calls = calls
+    return fetch
+
+def test_refresh_caches_credentials():
+    """Test that get_metadata only fetches once while credentials are fresh."""
+    clock = FakeClock()
+    fetch = make_fetch(clock)
+    refresher = CredentialRefresher(fetch, refresh_margin=1200, clock=clock)
+    assert refresher.get_metadata()['access_key'] == 'AKID1'
+    assert refresher.get_metadata()['access_key'] == 'AKID1'
+    assert len(fetch.calls) == 1
+
+def test_needs_refresh_inside_margin():
+    """Test that credentials are due for refresh once inside the margin."""
+    clock = FakeClock()
+    refresher = CredentialRefresher(make_fetch(clock), refresh_margin=1200, clock=clock)
+    refresher.refresh()
+    assert not refresher.needs_refresh()
+    clock.now += 3600 - 1100
+    assert refresher.needs_refresh()
+
+def test_botocore_reads_cache_without_fetching():
+    """Test that botocore's refresh only reads the cache kept fresh by the background refresher."""
+    clock = FakeClock()
+    fetch = make_fetch(clock)
+    refresher = CredentialRefresher(fetch, clock=clock)
+    credentials = refresher.botocore_credentials()
+    assert isinstance(credentials, RefreshableCredentials)
+
+    # Background refresh happens, then botocore asks for a refresh
+    refresher.refresh()
+    assert credentials._refresh_using()['access_key'] == 'AKID2'
+    assert len(fetch.calls) == 2
+
+def test_static_credentials_are_not_refreshed():
+    """Test that non-expiring credentials do not start a refresh thread."""
+    refresher = CredentialRefresher(lambda: {'access_key': 'a', 'secret_key': 'b', 'token': None,
+                                             'expiry_time': None, 'method': 'env'})
+    refresher.refresh()
+    assert not refresher.refreshable
+    assert not refresher.needs_refresh()
+    refresher.start()
+    assert refresher._thread is None
+
+def test_failures_are_recorded():
+    """Test that refresh failures are visible in stats."""
+    def fetch():
+        raise RuntimeError('IMDS unreachable')
+    refresher = CredentialRefresher(fetch)
+    with pytest.raises(RuntimeError):
+        refresher.refresh()
+    stats = refresher.stats()
+    assert stats['refresh_failures'] == 1
+    assert 'IMDS' in stats['last_error']
+
+def test_stats_report_expiry_and_latency():
+    """Test that stats expose expiry and refresh latency."""
+    clock = FakeClock()
+    refresher = CredentialRefresher(make_fetch(clock, lifetime=900), clock=clock)
+    refresher.refresh()
+    stats = refresher.stats()
+    assert stats['expires_in_seconds'] == 900
+    assert stats['last_refresh_ms'] is not None
+    assert stats['refreshes'] == 1
+
+def test_role_credentials_create_client(monkeypatch):
+    """Test that without static keys the client is built from the background refresher."""
+    clock = FakeClock()
+    clock.now = datetime.now(timezone.utc).timestamp()
+    monkeypatch.setattr(Config, 'AWS_ACCESS_KEY_ID', None)
+    monkeypatch.setattr(Config, 'AWS_SECRET_ACCESS_KEY', None)
+    monkeypatch.setattr(app_module, 'route53_client', None)
+    monkeypatch.setattr(app_module, 'credential_refresher', None)
+    monkeypatch.setattr(app_module, '_route53_client_attempted', False)
+    monkeypatch.setattr(app_module, 'create_credential_refresher',
+                        lambda: CredentialRefresher(make_fetch(clock), check_interval=3600))
+
+    client = app_module.get_route53_client()
+    assert client is not None
+    assert client._request_signer._credentials.access_key == 'AKID1'
+    stats = app_module.get_credential_stats()
+    assert stats['source'] == 'provider-chain'
+    assert stats['expires_in_seconds'] > 3000
+    app_module.credential_refresher.stop()
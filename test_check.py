@@ -0,0 +1,116 @@
+import json
+import app as app_module
+from app import app, Config
+from route53_scheduler import Route53Scheduler
+from rate_limit import RateLimiter
+from record_state import RecordState
+
+CLIENT_IP = '203.0.113.7'
+
+class StubRoute53:
+    def __init__(self):
+        self.calls = 0
+
+    def change_resource_record_sets(self, **kwargs):
+        self.calls += 1
+        return {'ChangeInfo': {'Id': f'/change/C{self.calls}'}}
+
+def configure(monkeypatch, tmp_path):
+    log_file = tmp_path / 'dns_updates.log'
+    route53 = StubRoute53()
+    monkeypatch.setenv('DNS_LOG_FILE', str(log_file))
+    monkeypatch.setattr(Config, 'HOSTED_ZONE_ID', 'Z123')
+    monkeypatch.setattr(Config, 'DOMAIN_NAME', 'home.example.com')
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', True)
+    monkeypatch.setattr(Config, 'AUTH_PASSWORD', 'secret')
+    monkeypatch.setattr(Config, 'ENABLE_RATE_LIMIT', False)
+    monkeypatch.setattr(app_module, 'route53_client', route53)
+    monkeypatch.setattr(app_module, 'route53_scheduler', Route53Scheduler(rate_per_second=1000, burst=1000))
+    monkeypatch.setattr(app_module, '_record_states', {})
+    return log_file, route53
+
+def test_check_answers_from_memory(monkeypatch, tmp_path):
+    """Test /check before and after an update, without log writes, log reads or Route53 calls."""
+    log_file, route53 = configure(monkeypatch, tmp_path)
+    reads = []
+    read_logs = app_module.read_logs_from_file
+    monkeypatch.setattr(app_module, 'read_logs_from_file', lambda: reads.append(1) or read_logs())
+    environ = {'REMOTE_ADDR': CLIENT_IP}
+
+    with app.test_client() as client:
+        response = client.get('/check', environ_base=environ)
+        assert response.status_code == 401 and not log_file.exists()
+
+        assert client.get('/check', headers={'X-Auth-Password': 'secret'}, environ_base=environ).get_json() == {
+            'requester_ip': CLIENT_IP, 'domain_name': 'home.example.com', 'record_ip': None,
+            'updated_at': None, 'update_needed': True}
+
+        response = client.post('/update-dns', data=CLIENT_IP, headers={'X-Auth-Password': 'secret'},
+                               environ_base=environ)
+        assert response.status_code == 200
+        size = log_file.stat().st_size
+        for _ in range(3):
+            data = client.get('/check?password=secret', environ_base=environ).get_json()
+            assert data['record_ip'] == CLIENT_IP and data['update_needed'] is False
+        entry = json.loads(log_file.read_text())
+        assert data['updated_at'] == entry['timestamp']
+
+        data = client.get('/check', headers={'X-Auth-Password': 'secret'},
+                          environ_base={'REMOTE_ADDR': '198.51.100.1'}).get_json()
+        assert data['requester_ip'] == '198.51.100.1' and data['update_needed'] is True
+
+    assert log_file.stat().st_size == size and route53.calls == 1
+    assert reads == []  # Only the log tail is read, never the whole log
+
+def test_check_sees_other_writers(monkeypatch, tmp_path):
+    """Test that updates logged by another process are picked up."""
+    log_file, _ = configure(monkeypatch, tmp_path)
+    headers = {'X-Auth-Password': 'secret'}
+    with app.test_client() as client:
+        assert client.get('/check', headers=headers).get_json()['record_ip'] is None
+        with open(log_file, 'a') as f:
+            f.write(json.dumps({'timestamp': '2024-01-01T00:00:00+00:00', 'ip_address': '198.51.100.9',
+                                'domain_name': 'Home.Example.com.', 'status': 'success'}) + '\n')
+        data = client.get('/check', headers=headers).get_json()
+        assert data['record_ip'] == '198.51.100.9' and data['updated_at'] == '2024-01-01T00:00:00+00:00'
+
+def test_failed_updates_read_once_and_skipped(monkeypatch, tmp_path):
+    """Test that failed updates between /check calls are read once, and never decoded."""
+    log_file, _ = configure(monkeypatch, tmp_path)
+    read_bytes = []
+    decoded = []
+    ingest_lines = RecordState._ingest_lines
+    monkeypatch.setattr(RecordState, '_ingest_lines',
+                        lambda self, data, at_end: read_bytes.append(len(data)) or ingest_lines(self, data, at_end))
+    append = RecordState.append
+    monkeypatch.setattr(RecordState, 'append', lambda self, entry: decoded.append(entry) or append(self, entry))
+    environ = {'REMOTE_ADDR': CLIENT_IP}
+
+    with app.test_client() as client:
+        for _ in range(5):
+            response = client.post('/update-dns', data=CLIENT_IP, headers={'X-Auth-Password': 'wrong'},
+                                   environ_base=environ)
+            assert response.status_code == 401
+            data = client.get('/check', headers={'X-Auth-Password': 'secret'}, environ_base=environ).get_json()
+            assert data['record_ip'] is None
+    assert sum(read_bytes) == log_file.stat().st_size and len(log_file.read_text().splitlines()) == 5
+    assert decoded == []
+
+def test_polling_keeps_the_update_budget(monkeypatch, tmp_path):
+    """Test that /check is limited from its own buckets, so polling never blocks the update."""
+    configure(monkeypatch, tmp_path)
+    monkeypatch.setattr(Config, 'ENABLE_RATE_LIMIT', True)
+    for name in ('ip_rate_limiter', 'credential_rate_limiter'):
+        monkeypatch.setattr(app_module, name, RateLimiter(1, 1))
+    for name in ('check_ip_rate_limiter', 'check_credential_rate_limiter'):
+        monkeypatch.setattr(app_module, name, RateLimiter(1, 3))
+    headers = {'X-Auth-Password': 'secret'}
+    environ = {'REMOTE_ADDR': CLIENT_IP}
+
+    with app.test_client() as client:
+        statuses = [client.get('/check', headers=headers, environ_base=environ).status_code for _ in range(4)]
+        assert statuses == [200, 200, 200, 429]
+        response = client.post('/update-dns', data=CLIENT_IP, headers=headers, environ_base=environ)
+        assert response.status_code == 200
+        response = client.post('/update-dns', data=CLIENT_IP, headers=headers, environ_base=environ)
+        assert response.status_code == 429
@@ -0,0 +1,92 @@
+import json
+import os
+import sys
+import app as app_module
+import view_logs
+from app import app, Config
+from compact_log import (CompactLogWriter, StringTable, decode_entry, encode_entry, is_compact_log,
+                         read_compact_log, to_compact, to_ndjson)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+from generate_logs import generate_logs
+
+ODD_LINES = [
+    'not json',
+    '[1, 2, 3]',
+    '{"timestamp": "2024-01-01T00:00:00Z", "ip_address": "010.0.0.1", "status": 1}',
+    '{"status":"success"}',
+    '{"ip_address": "2001:db8::7", "requester_ip": null, "timestamp": "2024-01-01T00:00:00+00:00"}',
+]
+
+def test_entry_round_trip():
+    """Test that known fields are packed and everything else survives in extras."""
+    entry = {'timestamp': '2024-01-15T10:30:00.123456+00:00', 'ip_address': '203.0.113.7',
+             'requester_ip': '2001:db8::1', 'domain_name': 'home.example.com', 'status': 'success',
+             'change_id': '/change/C1', 'error_message': None, 'auth_method': 'header', 'token_id': None,
+             'user_agent': 'curl/8.0', 'timings': {'parse': 0.041}}
+    table = StringTable()
+    payload = encode_entry(entry, table)
+    assert decode_entry(payload, table.strings) == entry
+    assert len(payload) < len(json.dumps(entry)) / 2
+    assert table.pending == ['home.example.com', 'success', 'header', 'curl/8.0']
+
+def test_ndjson_conversion_is_lossless(tmp_path):
+    """Test NDJSON -> compact -> NDJSON reproduces the file byte for byte."""
+    source = str(tmp_path / 'dns_updates.log')
+    generate_logs(source, 2000)
+    with open(source, 'a') as f:
+        f.write('\n'.join(ODD_LINES) + '\n')
+    compact = str(tmp_path / 'dns_updates.clog')
+    back = str(tmp_path / 'back.log')
+
+    lines, raw = to_compact(source, compact)
+    assert lines == 2005
+    # Unparseable, non-object, non-canonical spacing and non-canonical key order
+    assert raw == 4
+    assert to_ndjson(compact, back) == 2005
+    with open(source, 'rb') as a, open(back, 'rb') as b:
+        assert a.read() == b.read()
+    assert os.path.getsize(compact) < os.path.getsize(source) / 2
+
+    # Readers see the same entries as the NDJSON reader
+    assert is_compact_log(compact) and not is_compact_log(source)
+    expected = app_module.read_logs_from_single_file(source)
+    assert read_compact_log(compact) == expected
+
+def test_writers_share_a_file(tmp_path):
+    """Test two writers (as in two processes) with separate string tables, and rotation."""
+    path = str(tmp_path / 'dns_updates.clog')
+    first, second = CompactLogWriter(path), CompactLogWriter(path)
+    entries = []
+    for i in range(20):
+        entry = {'timestamp': f'2024-01-01T00:00:{i:02d}+00:00', 'ip_address': f'192.0.2.{i}',
+                 'status': 'success', 'user_agent': f'agent-{i % 3}', 'domain_name': 'home.example.com'}
+        (first if i % 2 else second).write(entry)
+        entries.append(entry)
+    assert read_compact_log(path) == entries
+
+    os.rename(path, path + '.1')
+    first.write(entries[0])
+    first.sync()
+    assert read_compact_log(path) == [entries[0]]
+
+def test_service_with_compact_log(monkeypatch, tmp_path):
+    """Test logging, the APIs, metrics and view_logs.py with LOG_FORMAT=compact."""
+    log_file = str(tmp_path / 'dns_updates.log')
+    monkeypatch.setenv('DNS_LOG_FILE', log_file)
+    monkeypatch.setattr(Config, 'LOG_FORMAT', 'compact')
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', False)
+    monkeypatch.setattr(Config, 'ENABLE_RATE_LIMIT', False)
+    monkeypatch.setattr(Config, 'ENABLE_IP_VALIDATION', False)
+    monkeypatch.setattr(Config, 'HOSTED_ZONE_ID', None)
+
+    with app.test_client() as client:
+        for _ in range(3):
+            assert client.post('/update-dns', data='192.168.1.1').status_code == 500
+        logs = client.get('/api/logs').get_json()['logs']
+        assert len(logs) == 3
+        assert logs[0]['ip_address'] == '192.168.1.1'
+        assert 'dns_update_log_entries 3\n' in client.get('/metrics').get_data(as_text=True)
+
+    assert is_compact_log(log_file)
+    assert len(view_logs.load_logs()) == 3
@@ -0,0 +1,92 @@
+import pytest
+import config as config_module
+import app as app_module
+from app import app
+from config import read_config_file
+
+@pytest.fixture
+def config_file(monkeypatch, tmp_path):
+    """Point CONFIG_FILE at a temporary file and undo any reload after the test."""
+    path = tmp_path / 'env'
+    path.write_text('ALLOWED_SUBNETS=10.0.0.0/8\n')
+    monkeypatch.setenv('CONFIG_FILE', str(path))
+    monkeypatch.setenv('DNS_LOG_FILE', str(tmp_path / 'dns_updates.log'))
+    monkeypatch.setattr(app_module, 'Config', app_module.Config)
+    monkeypatch.setattr(config_module, 'Config', config_module.Config)
+    monkeypatch.setattr(app_module, 'api_token_store', app_module.api_token_store)
+    return path
+
+def test_read_config_file(tmp_path):
+    """Test parsing of KEY=VALUE files."""
+    path = tmp_path / 'env'
+    path.write_text('# comment\n\nexport DOMAIN_NAME="home.example.com"\nALLOWED_IPS=1.2.3.4, 5.6.7.8\nEMPTY=\n')
+    assert read_config_file(str(path)) == {'DOMAIN_NAME': 'home.example.com',
+                                           'ALLOWED_IPS': '1.2.3.4, 5.6.7.8', 'EMPTY': ''}
+    path.write_text('not a setting\n')
+    with pytest.raises(ValueError):
+        read_config_file(str(path))
+
+def test_reload_swaps_compiled_config(config_file):
+    """Test that a reload applies new allowlists and reports changed settings."""
+    app_module.reload_config()
+    assert app_module.Config.ALLOWED_NETWORKS[0].with_prefixlen == '10.0.0.0/8'
+
+    config_file.write_text('ENABLE_IP_VALIDATION=true\nALLOWED_IPS=1.2.3.4\nALLOWED_SUBNETS=192.168.0.0/16\n')
+    changed, restart_required = app_module.reload_config()
+    assert 'ALLOWED_SUBNETS' in changed
+    assert restart_required == []
+    assert config_module.Config is app_module.Config
+    assert app_module.is_ip_match_allowed('8.8.8.8', '192.168.1.20')
+    assert app_module.is_ip_match_allowed('8.8.8.8', '1.2.3.4')
+    assert not app_module.is_ip_match_allowed('8.8.8.8', '10.1.1.1')
+
+    config_file.write_text('ALLOWED_SUBNETS=192.168.0.0/16\nFLASK_PORT=6000\n')
+    assert app_module.reload_config()[1] == ['FLASK_PORT']
+
+def test_invalid_reload_keeps_old_config(config_file, tmp_path):
+    """Test that an invalid configuration is rejected without changing anything."""
+    app_module.reload_config()
+    current = app_module.Config
+
+    config_file.write_text('ALLOWED_SUBNETS=10.0.0.0/33\n')
+    with pytest.raises(ValueError):
+        app_module.reload_config()
+    config_file.write_text(f"API_TOKENS_FILE={tmp_path / 'missing.json'}\n")
+    with pytest.raises(ValueError):
+        app_module.reload_config()
+    config_file.write_text('AUTH_PASSWORD_HASH=plaintext\n')
+    with pytest.raises(ValueError):
+        app_module.reload_config()
+    assert app_module.Config is current
+
+def test_in_flight_request_keeps_its_config(config_file):
+    """Test that a request keeps the configuration it started with."""
+    app_module.reload_config()
+    with app.test_request_context('/update-dns'):
+        pinned = app_module.get_config()
+        config_file.write_text('ALLOWED_SUBNETS=172.16.0.0/12\n')
+        app_module.reload_config()
+        assert app_module.get_config() is pinned
+        assert app_module.Config is not pinned
+    assert app_module.get_config().ALLOWED_SUBNETS == ['172.16.0.0/12']
+
+def test_reload_endpoint(config_file, monkeypatch):
+    """Test the authenticated /admin/reload-config endpoint."""
+    monkeypatch.setattr(app_module.Config, 'ENABLE_PASSWORD_AUTH', True)
+    monkeypatch.setattr(app_module.Config, 'AUTH_PASSWORD', 'secret')
+    config_file.write_text('ENABLE_PASSWORD_AUTH=true\nAUTH_PASSWORD=secret\nALLOWED_SUBNETS=bad\n')
+
+    with app.test_client() as client:
+        assert client.post('/admin/reload-config').status_code == 401
+        # The dashboard's last-updated-IP login is not enough
+        monkeypatch.setattr(app_module, 'get_last_successful_dns_ip', lambda: '198.51.100.7')
+        response = client.post('/admin/reload-config', headers={'X-Forwarded-For': '198.51.100.7'})
+        assert response.status_code == 401
+        response = client.post('/admin/reload-config', headers={'X-Auth-Password': 'secret'})
+        assert response.status_code == 400
+        assert 'Invalid' in response.get_json()['error']
+
+        config_file.write_text('ENABLE_PASSWORD_AUTH=true\nAUTH_PASSWORD=secret\nALLOWED_SUBNETS=10.0.0.0/8\n')
+        response = client.post('/admin/reload-config', headers={'X-Auth-Password': 'secret'})
+        assert response.status_code == 200
+        assert response.get_json()['success']
@@ -0,0 +1,98 @@
+import json
+import os
+import sys
+import pytest
+import app as app_module
+from app import app, Config
+from drift import DriftReconciler, get_desired_state, normalize_record_name, scan_zone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+from fake_route53 import FakeRoute53, start_server
+
+@pytest.fixture
+def fake_route53(monkeypatch):
+    """Run a fake Route53 endpoint with a large zone and point a fresh client at it."""
+    route53 = FakeRoute53()
+    for i in range(700):
+        route53.records[('Z123', f'host{i}.example.com.', 'A')] = {'ttl': 300, 'values': [f'10.0.{i // 256}.{i % 256}']}
+    server, endpoint_url = start_server(route53)
+    monkeypatch.setattr(Config, 'ROUTE53_ENDPOINT_URL', endpoint_url)
+    monkeypatch.setattr(Config, 'AWS_ACCESS_KEY_ID', 'test')
+    monkeypatch.setattr(Config, 'AWS_SECRET_ACCESS_KEY', 'test')
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'test')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'test')
+    monkeypatch.setattr(app_module, 'route53_client', None)
+    monkeypatch.setattr(app_module, '_route53_client_attempted', False)
+    yield route53
+    server.shutdown()
+
+def test_desired_state_from_record_state(monkeypatch, tmp_path):
+    """Test that the managed records are the last successful update of each record logged for the zone."""
+    log_file = tmp_path / 'dns_updates.log'
+    monkeypatch.setenv('DNS_LOG_FILE', str(log_file))
+    monkeypatch.setattr(Config, 'HOSTED_ZONE_ID', 'Z123')
+    monkeypatch.setattr(app_module, '_record_states', {})
+    entries = [
+        {'timestamp': '2024-01-01T00:00:00+00:00', 'domain_name': 'home.example.com', 'ip_address': '1.1.1.1',
+         'status': 'success', 'hosted_zone_id': 'Z123'},
+        {'timestamp': '2024-01-02T00:00:00+00:00', 'domain_name': 'Home.example.com', 'ip_address': '1.1.1.2',
+         'status': 'success', 'hosted_zone_id': 'Z123'},
+        {'timestamp': '2024-01-03T00:00:00+00:00', 'domain_name': 'home.example.com', 'ip_address': '1.1.1.3',
+         'status': 'error'},
+        {'timestamp': '2024-01-01T00:00:00+00:00', 'domain_name': 'old.example.com', 'ip_address': '1.1.1.4',
+         'status': 'success', 'hosted_zone_id': 'ZOLD'},
+        {'timestamp': '2024-01-01T00:00:00+00:00', 'domain_name': 'unknown.example.com', 'ip_address': '1.1.1.5',
+         'status': 'success'},
+    ]
+    log_file.write_text(''.join(json.dumps(entry) + '\n' for entry in entries))
+    assert app_module.get_managed_records() == {'Z123': {'home.example.com.': '1.1.1.2'}}
+    assert get_desired_state(app_module.get_record_state().records(), None) == {}
+    assert normalize_record_name('\\052.Example.com.') == '*.example.com.'
+
+def test_scan_zone_pages(fake_route53):
+    """Test that a zone scan pages through every record set."""
+    client = app_module.get_route53_client()
+    names = {'host0.example.com.', 'host699.example.com.', 'absent.example.com.'}
+    found, pages = scan_zone(client, 'Z123', names)
+    assert pages == 3
+    assert fake_route53.counters['list_calls'] == 3
+    assert found == {'host0.example.com.': ['10.0.0.0'], 'host699.example.com.': ['10.0.2.187']}
+
+def test_reconciler_reports_and_repairs(fake_route53):
+    """Test drift detection with one zone scan per run, and repair."""
+    desired = {'Z123': {f'host{i}.example.com.': f'10.0.{i // 256}.{i % 256}' for i in range(700)}}
+    desired['Z123']['host5.example.com.'] = '192.0.2.5'
+    desired['Z123']['new.example.com.'] = '192.0.2.9'
+    reconciler = DriftReconciler(app_module.get_route53_client, lambda: desired,
+                                 call=app_module.route53_scheduler.call)
+
+    result = reconciler.run()
+    assert result['error'] is None
+    assert result['managed'] == 701
+    assert [(d['name'], d['status']) for d in result['drifted']] == [
+        ('host5.example.com.', 'changed'), ('new.example.com.', 'missing')]
+    assert fake_route53.counters['list_calls'] == 3
+    assert reconciler.stats()['api_calls'] == 3
+
+    # Changed records are set back; a missing one is only reported, never recreated
+    reconciler.repair = app_module.update_a_record
+    result = reconciler.run()
+    assert [d.get('repaired') for d in result['drifted']] == [True, None]
+    assert fake_route53.records[('Z123', 'host5.example.com.', 'A')]['values'] == ['192.0.2.5']
+    assert ('Z123', 'new.example.com.', 'A') not in fake_route53.records
+    assert [d['name'] for d in reconciler.run()['drifted']] == ['new.example.com.']
+    assert fake_route53.counters['list_calls'] == 9
+
+def test_drift_in_stats(monkeypatch, tmp_path):
+    """Test that /api/stats reports the last drift check and failures."""
+    monkeypatch.setenv('DNS_LOG_FILE', str(tmp_path / 'dns_updates.log'))
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', False)
+    reconciler = DriftReconciler(lambda: None, lambda: {'Z123': {'home.example.com.': '1.1.1.1'}})
+    monkeypatch.setattr(app_module, 'drift_reconciler', reconciler)
+
+    with app.test_client() as client:
+        assert client.get('/api/stats').get_json()['drift']['last_check'] is None
+        reconciler.run()
+        drift = client.get('/api/stats').get_json()['drift']
+    assert drift['failures'] == 1
+    assert 'not available' in drift['last_check']['error']
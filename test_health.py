@@ -0,0 +1,105 @@
+from botocore.exceptions import ClientError
+import app as app_module
+from app import app, Config
+from health import HealthProbes, ProbeError
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class StubRoute53:
+    """Route53 stand-in that counts calls and optionally fails."""
+    def __init__(self, error_code=None):
+        self.error_code = error_code
+        self.calls = 0
+
+    def get_hosted_zone_count(self):
+        self.calls += 1
+        if self.error_code:
+            raise ClientError({'Error': {'Code': self.error_code, 'Message': 'nope'}}, 'GetHostedZoneCount')
+        return {'HostedZoneCount': 1}
+
+def failing_probe():
+    raise ProbeError('disk full')
+
+def test_probe_results_are_cached_with_age():
+    """Test pending, ok, failing and stale probe results."""
+    clock = FakeClock()
+    probes = HealthProbes({'ok': lambda: {'detail': 1}, 'bad': failing_probe}, interval=10, clock=clock)
+
+    healthy, results = probes.snapshot()
+    assert not healthy
+    assert results['ok']['status'] == 'pending'
+
+    probes.run_all()
+    clock.now += 5
+    healthy, results = probes.snapshot()
+    assert not healthy
+    assert results['ok'] == {'status': 'ok', 'detail': 1, 'duration_ms': results['ok']['duration_ms'],
+                             'age_seconds': 5.0}
+    assert results['bad']['status'] == 'error'
+    assert results['bad']['error'] == 'disk full'
+
+    probes.probes = {'ok': probes.probes['ok']}
+    assert probes.snapshot()[0]
+    clock.now += 31
+    healthy, results = probes.snapshot()
+    assert not healthy
+    assert results['ok']['status'] == 'stale'
+
+def setup_route53(monkeypatch, stub):
+    monkeypatch.setattr(app_module, 'route53_client', stub)
+    monkeypatch.setattr(app_module, '_route53_client_attempted', True)
+    monkeypatch.setattr(app_module, 'credential_refresher', None)
+    monkeypatch.setattr(Config, 'AWS_ACCESS_KEY_ID', 'test')
+    monkeypatch.setattr(Config, 'AWS_SECRET_ACCESS_KEY', 'test')
+    monkeypatch.setattr(Config, 'AWS_ROLE_ARN', None)
+
+def test_rejected_credentials(monkeypatch):
+    """Test that a credential error is reported without a second AWS call."""
+    stub = StubRoute53(error_code='InvalidClientTokenId')
+    setup_route53(monkeypatch, stub)
+    probes = HealthProbes({'route53': app_module.probe_route53, 'credentials': app_module.probe_credentials})
+    monkeypatch.setattr(app_module, 'health_probes', probes)
+
+    probes.run_all()
+    healthy, results = probes.snapshot()
+    assert stub.calls == 1
+    assert not healthy
+    assert results['route53']['status'] == 'ok'
+    assert results['route53']['error_code'] == 'InvalidClientTokenId'
+    assert results['credentials']['status'] == 'error'
+
+def test_log_writer_probe(monkeypatch, tmp_path):
+    """Test the log writer probe for a writable directory and a full disk."""
+    monkeypatch.setenv('DNS_LOG_FILE', str(tmp_path / 'dns_updates.log'))
+    assert app_module.probe_log_writer()['path'].endswith('dns_updates.log')
+
+    monkeypatch.setattr(Config, 'HEALTH_MIN_FREE_MB', 10 ** 12)
+    probes = HealthProbes({'log_writer': app_module.probe_log_writer})
+    probes.run_all()
+    assert 'MB free' in probes.snapshot()[1]['log_writer']['error']
+
+def test_deep_health_is_served_from_cache(monkeypatch, tmp_path):
+    """Test /health?deep=1 and /ready read cached results without calling AWS."""
+    monkeypatch.setenv('DNS_LOG_FILE', str(tmp_path / 'dns_updates.log'))
+    stub = StubRoute53()
+    setup_route53(monkeypatch, stub)
+    probes = HealthProbes({'route53': app_module.probe_route53, 'credentials': app_module.probe_credentials,
+                           'log_writer': app_module.probe_log_writer})
+    monkeypatch.setattr(probes, 'start', lambda: None)
+    monkeypatch.setattr(app_module, 'health_probes', probes)
+
+    with app.test_client() as client:
+        assert client.get('/ready').status_code == 503
+        probes.run_all()
+        assert stub.calls == 1
+        for _ in range(5):
+            response = client.get('/health?deep=1')
+            assert response.status_code == 200
+        assert client.get('/ready').get_json()['checks']['credentials']['source'] == 'static'
+        assert client.get('/health').get_json() == {'status': 'healthy', 'service': 'DNS Update Service'}
+    assert stub.calls == 1
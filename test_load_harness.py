@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+import pytest
+import app as app_module
+from app import app, Config
+from route53_scheduler import Route53Scheduler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+from fake_route53 import FakeRoute53, start_server
+from load_test import percentile, load_replay_entries, parse_mix
+
+@pytest.fixture
+def fake_route53(monkeypatch):
+    """Run a fake Route53 endpoint and point a fresh client at it."""
+    route53 = FakeRoute53()
+    server, endpoint_url = start_server(route53)
+    monkeypatch.setattr(Config, 'ROUTE53_ENDPOINT_URL', endpoint_url)
+    monkeypatch.setattr(Config, 'AWS_ACCESS_KEY_ID', 'test')
+    monkeypatch.setattr(Config, 'AWS_SECRET_ACCESS_KEY', 'test')
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'test')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'test')
+    monkeypatch.setattr(app_module, 'route53_client', None)
+    monkeypatch.setattr(app_module, '_route53_client_attempted', False)
+    yield route53
+    server.shutdown()
+
+def test_fake_route53_change_and_get_change(fake_route53):
+    """Test that boto3 can submit a change to the fake endpoint and poll it."""
+    client = app_module.get_route53_client()
+    response = app_module.update_a_record('Z123', 'home.example.com', '203.0.113.7')
+    change_id = response['ChangeInfo']['Id']
+    assert change_id.startswith('/change/C')
+    assert client.get_change(Id=change_id)['ChangeInfo']['Status'] == 'INSYNC'
+    assert fake_route53.records[('Z123', 'home.example.com.', 'A')]['values'] == ['203.0.113.7']
+
+def test_fake_route53_throttling_is_retried(fake_route53, monkeypatch):
+    """Test that throttling from the fake endpoint is retried by the scheduler."""
+    fake_route53.throttle_probability = 1.0
+    monkeypatch.setattr(app_module, 'route53_scheduler', Route53Scheduler(max_retries=3, base_delay=0.01))
+    app_module.get_route53_client()
+    with pytest.raises(Exception) as excinfo:
+        app_module.route53_scheduler.call(app_module.route53_client.get_hosted_zone_count)
+    assert 'Throttling' in str(excinfo.value)
+    assert fake_route53.counters['throttled'] > 1
+
+def test_update_dns_end_to_end(fake_route53, monkeypatch, tmp_path):
+    """Test a full /update-dns request against the fake endpoint."""
+    monkeypatch.setenv('DNS_LOG_FILE', str(tmp_path / 'dns_updates.log'))
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', False)
+    monkeypatch.setattr(Config, 'ENABLE_RATE_LIMIT', False)
+    monkeypatch.setattr(Config, 'HOSTED_ZONE_ID', 'Z123')
+    monkeypatch.setattr(Config, 'DOMAIN_NAME', 'home.example.com')
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        response = client.post('/update-dns', data='203.0.113.9', content_type='text/plain',
+                               headers={'X-Forwarded-For': '203.0.113.9'})
+    assert response.status_code == 200
+    assert json.loads(response.data)['success'] is True
+    assert fake_route53.counters['changes'] == 1
+
+def test_percentile():
+    """Test nearest-rank percentiles."""
+    values = list(range(1, 1001))
+    assert percentile(values, 0.50) == 500
+    assert percentile(values, 0.99) == 990
+    assert percentile(values, 0.999) == 999
+    assert percentile([5], 0.999) == 5
+    assert percentile([], 0.5) is None
+
+def test_parse_mix():
+    """Test endpoint mix parsing."""
+    assert parse_mix('update=8,stats=2') == (['update', 'stats'], [8.0, 2.0])
+    with pytest.raises(ValueError):
+        parse_mix('bogus=1')
+
+def test_replay_entries_are_ordered(tmp_path):
+    """Test that replay reads valid entries oldest first and skips junk."""
+    log_file = tmp_path / 'dns_updates.log'
+    log_file.write_text(
+        json.dumps({'timestamp': '2024-01-02T00:00:00+00:00', 'ip_address': '203.0.113.2'}) + '\n'
+        + 'not json\n'
+        + json.dumps({'timestamp': '2024-01-01T00:00:00+00:00', 'ip_address': '203.0.113.1'}) + '\n'
+    )
+    entries = load_replay_entries(str(log_file))
+    assert [entry['ip_address'] for _, entry in entries] == ['203.0.113.1', '203.0.113.2']
@@ -0,0 +1,42 @@
+import json
+import os
+import sys
+from collections import Counter
+from datetime import datetime
+import app as app_module
+from app import app
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+from generate_logs import generate_entries, generate_logs
+
+def test_generated_entries_match_log_format(monkeypatch, tmp_path):
+    """Test that synthetic entries have exactly the fields log_dns_update writes."""
+    log_file = tmp_path / 'real.log'
+    monkeypatch.setenv('DNS_LOG_FILE', str(log_file))
+    with app.test_request_context('/update-dns', method='POST'):
+        app_module.log_dns_update('203.0.113.1', '203.0.113.1', 'home.example.com', 'success')
+    real_entry = json.loads(log_file.read_text().splitlines()[0])
+
+    entry = next(generate_entries(1))
+    assert list(entry.keys()) == list(real_entry.keys())
+    datetime.fromisoformat(entry['timestamp'])
+
+def test_generated_entries_are_chronological_and_skewed():
+    """Test ordering and the success/failure and host distributions."""
+    entries = list(generate_entries(5000, seed=1))
+    timestamps = [entry['timestamp'] for entry in entries]
+    assert timestamps == sorted(timestamps)
+
+    statuses = Counter(entry['status'] for entry in entries)
+    assert 0.85 < statuses['success'] / len(entries) < 0.97
+
+    # A handful of hosts dominate the updates
+    top_ip_count = Counter(entry['ip_address'] for entry in entries).most_common(1)[0][1]
+    assert top_ip_count > len(entries) / 20
+
+def test_generated_log_is_readable(monkeypatch, tmp_path):
+    """Test that the app reads back every generated entry."""
+    log_file = tmp_path / 'dns_updates.log'
+    generate_logs(str(log_file), 1000)
+    monkeypatch.setenv('DNS_LOG_FILE', str(log_file))
+    assert len(app_module.read_logs_from_file()) == 1000
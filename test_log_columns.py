@@ -0,0 +1,125 @@
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+import pytest
+import app as app_module
+from app import app, Config
+from compact_log import to_compact
+import log_tail
+from log_columns import LogColumns, datetime_micros, numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+from generate_logs import generate_logs
+
+EXTRA_LINES = [
+    '{"timestamp": "2024-01-01T00:00:00+00:00", "ip_address": "2001:db8::1", "status": "success"}',
+    '{"timestamp": "2024-01-01T00:00:00+02:00", "ip_address": "010.0.0.1", "status": "error"}',
+    '{"timestamp": "2024-01-01T00:00:00+00:00", "ip_address": 12345, "auth_method": "token"}',
+    '{"timestamp": "2024-01-01T00:00:00+00:00", "ip_address": "", "status": null}',
+    'not json',
+]
+
+def expected_stats(logs, since):
+    """The statistics as /api/stats computed them from the decoded entries."""
+    ip_counts = {}
+    for log in logs:
+        if log.get('ip_address'):
+            ip_counts[log['ip_address']] = ip_counts.get(log['ip_address'], 0) + 1
+    auth_methods = {}
+    for log in logs:
+        if log.get('auth_method') is not None:
+            auth_methods[log['auth_method']] = auth_methods.get(log['auth_method'], 0) + 1
+    return {
+        'total': len(logs),
+        'successful': sum(1 for log in logs if log.get('status') == 'success'),
+        'failed': sum(1 for log in logs if log.get('status') == 'error'),
+        'unique_ips': len(ip_counts),
+        'recent': sum(1 for log in logs if datetime.fromisoformat(log['timestamp']) >= since),
+        'top_ips': sorted(ip_counts.items(), key=lambda x: x[1], reverse=True)[:5],
+        'auth_methods': auth_methods,
+    }
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = str(tmp_path / 'dns_updates.log')
+    generate_logs(path, 5000, days=30)
+    with open(path, 'a') as f:
+        f.write('\n'.join(EXTRA_LINES) + '\n')
+    return path
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_stats_match_entries(log_file, use_numpy):
+    """Test the aggregations against the same computation over decoded entries."""
+    if use_numpy and numpy is None:
+        pytest.skip('NumPy is not installed')
+    since = datetime.now(timezone.utc) - timedelta(days=7)
+    expected = expected_stats(app_module.read_logs_from_single_file(log_file), since)
+
+    columns = LogColumns()
+    columns.use_numpy = use_numpy
+    assert columns.refresh(log_file).stats(since=datetime_micros(since)) == expected
+
+    # A compact log gives the same columns
+    compact = log_file + '.compact'
+    to_compact(log_file, compact)
+    columns = LogColumns()
+    columns.use_numpy = use_numpy
+    assert columns.refresh(compact).stats(since=datetime_micros(since)) == expected
+
+def test_refresh_reads_appended_entries(tmp_path):
+    """Test that only appended entries are read, and a rotated file is read from the start."""
+    path = str(tmp_path / 'dns_updates.log')
+    entry = {'timestamp': '2024-01-01T00:00:00+00:00', 'ip_address': '192.0.2.1', 'status': 'success'}
+    with open(path, 'w') as f:
+        f.write(json.dumps(entry) + '\n')
+    columns = LogColumns()
+    assert len(columns.refresh(path)) == 1
+
+    # A partly written line is read once it is complete
+    line = json.dumps(dict(entry, status='error'))
+    with open(path, 'a') as f:
+        f.write(line[:20])
+    assert len(columns.refresh(path)) == 1
+    with open(path, 'a') as f:
+        f.write(line[20:] + '\n')
+    assert columns.refresh(path).stats()['failed'] == 1
+    assert len(columns) == 2
+
+    os.rename(path, path + '.1')
+    with open(path, 'w') as f:
+        f.write(json.dumps(entry) + '\n')
+    assert columns.refresh(path).stats()['total'] == 1
+    os.unlink(path)
+    assert len(columns.refresh(path)) == 0
+
+def test_refresh_in_chunks(monkeypatch, log_file):
+    """Test that reading in chunks smaller than a line or record gives the same columns."""
+    expected = LogColumns().refresh(log_file).stats()
+    compact = log_file + '.compact'
+    to_compact(log_file, compact)
+    monkeypatch.setattr(log_tail, 'CHUNK_SIZE', 64)
+    assert LogColumns().refresh(log_file).stats() == expected
+    assert LogColumns().refresh(compact).stats() == expected
+
+def test_api_stats(monkeypatch, log_file):
+    """Test /api/stats and the /api/logs counts from the columnar store."""
+    monkeypatch.setenv('DNS_LOG_FILE', log_file)
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', False)
+    monkeypatch.setattr(Config, 'ENABLE_RATE_LIMIT', False)
+    logs = app_module.read_logs_from_single_file(log_file)
+    expected = expected_stats(logs, datetime.now(timezone.utc) - timedelta(days=1))
+
+    with app.test_client() as client:
+        stats = client.get('/api/stats').get_json()['stats']
+        assert stats['total'] == expected['total'] and stats['recent_updates'] == expected['recent']
+        assert stats['top_ips'] == [{'ip': ip, 'count': count} for ip, count in expected['top_ips']]
+        assert stats['auth_methods'] == expected['auth_methods']
+        assert client.get('/api/logs').get_json()['stats'] == {
+            key: expected[key] for key in ('total', 'successful', 'failed', 'unique_ips')}
+
+        with open(log_file, 'a') as f:
+            f.write(json.dumps({'timestamp': datetime.now(timezone.utc).isoformat(), 'status': 'error'}) + '\n')
+        stats = client.get('/api/stats').get_json()['stats']
+        assert stats['total'] == expected['total'] + 1 and stats['failed'] == expected['failed'] + 1
+        assert stats['recent_updates'] == expected['recent'] + 1
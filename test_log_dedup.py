@@ -0,0 +1,154 @@
+import json
+import os
+import signal
+import pytest
+import app as app_module
+from app import app, Config
+from log_columns import LogColumns
+from log_dedup import RepeatedErrors, entry_count
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def error(n, requester_ip='192.0.2.1'):
+    return {'timestamp': f'2024-01-01T00:00:{n:02d}+00:00', 'ip_address': requester_ip,
+            'requester_ip': requester_ip, 'status': 'error', 'auth_method': 'password', 'timings': {'auth': 1.0}}
+
+def summary(n, count, since):
+    """The entry written for `count` failures counted from error(since) to error(n)."""
+    entry = dict(error(n), repeat_count=count, repeated_since=error(since)['timestamp'])
+    del entry['timings']
+    return entry
+
+def test_repeats_written_once_per_window():
+    """Test that the first failure is written, the rest counted, and written as one entry per window."""
+    written = []
+    clock = FakeClock()
+    repeated = RepeatedErrors(written.append, window=60, clock=clock, background=False)
+    key = ('192.0.2.1', 'auth_failed', 'password')
+
+    assert repeated.add(key, error(0)) is False
+    assert all(repeated.add(key, error(n)) for n in range(1, 5))
+    assert not repeated.add(('192.0.2.2', 'auth_failed', 'password'), error(0, '192.0.2.2'))
+    assert repeated.pending() == [(error(4), 4)] and repeated.counted == 4
+    assert repeated.flush() == 0 and written == []
+
+    clock.now += 60
+    assert repeated.flush() == 1
+    assert written == [summary(4, 4, since=1)]
+    assert entry_count(written[0]) == 4 and repeated.pending() == []
+
+    # Still failing: counted in a new window; a quiet key is then forgotten
+    assert repeated.add(key, error(5))
+    clock.now += 60
+    assert repeated.flush() == 1 and written[-1]['repeat_count'] == 1
+    clock.now += 60
+    assert repeated.flush() == 0
+    assert repeated.add(key, error(6)) is False
+
+    # Counted failures are written on shutdown
+    assert repeated.add(key, error(7))
+    assert repeated.flush(force=True) == 1 and repeated.pending() == []
+
+def test_limits():
+    """Test the disabled window, an expired window seen by add(), and the overflow key past max_keys."""
+    written = []
+    clock = FakeClock()
+    assert RepeatedErrors(written.append, window=0, clock=clock, background=False).add('key', error(0)) is False
+
+    repeated = RepeatedErrors(written.append, window=60, max_keys=1, clock=clock, background=False)
+    repeated.add('a', error(0))
+    assert repeated.add('a', error(1))
+    clock.now += 61
+    assert repeated.add('a', error(2)) is False
+    assert written == [summary(1, 1, since=1)]
+    assert not repeated.add('b', error(3))
+    assert repeated.add('c', error(4)) and repeated.add('d', error(5))
+    assert repeated.pending() == [(error(5), 2)]
+    assert repeated.flush(force=True) == 1 and written[-1] == summary(5, 2, since=4)
+
+def test_columns_weight_repeats():
+    """Test that repeated and pending entries count as the requests they stand for."""
+    columns = LogColumns()
+    columns.use_numpy = False
+    columns.append({'timestamp': '2024-01-01T00:00:00+00:00', 'ip_address': '192.0.2.1', 'status': 'success'})
+    columns.append(dict(error(1), repeat_count=5))
+    stats = columns.stats(pending=[(error(2, '192.0.2.9'), 3)])
+    assert stats == {'total': 9, 'successful': 1, 'failed': 8, 'unique_ips': 2, 'recent': 0,
+                     'top_ips': [('192.0.2.1', 6), ('192.0.2.9', 3)], 'auth_methods': {'password': 8}}
+
+def test_repeated_auth_failures(monkeypatch, tmp_path):
+    """Test that repeated auth failures are written once and the dashboard counts stay exact."""
+    log_file = tmp_path / 'dns_updates.log'
+    monkeypatch.setenv('DNS_LOG_FILE', str(log_file))
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', True)
+    monkeypatch.setattr(Config, 'AUTH_PASSWORD', 'secret')
+    monkeypatch.setattr(Config, 'ENABLE_RATE_LIMIT', False)
+    clock = FakeClock()
+    repeated = RepeatedErrors(app_module.write_log_entry, window=60, clock=clock, background=False)
+    monkeypatch.setattr(app_module, 'repeated_errors', repeated)
+    environ = {'REMOTE_ADDR': '192.0.2.1'}
+
+    with app.test_client() as client:
+        for _ in range(10):
+            response = client.post('/update-dns', data='192.0.2.1', headers={'X-Auth-Password': 'wrong'},
+                                   environ_base=environ)
+            assert response.status_code == 401
+        assert len(log_file.read_text().splitlines()) == 1
+
+        monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', False)
+        stats = client.get('/api/stats').get_json()['stats']
+        assert stats['total'] == 10 and stats['failed'] == 10
+        assert stats['top_ips'] == [{'ip': '192.0.2.1', 'count': 10}]
+
+        clock.now += 60
+        repeated.flush()
+        lines = [json.loads(line) for line in log_file.read_text().splitlines()]
+        assert [entry_count(entry) for entry in lines] == [1, 9]
+        assert client.get('/api/logs').get_json()['stats'] == {
+            'total': 10, 'successful': 0, 'failed': 10, 'unique_ips': 1}
+
+def test_repeats_keyed_on_peer(monkeypatch, tmp_path):
+    """Test that rotating the posted address or the proxy headers does not start new keys."""
+    log_file = tmp_path / 'dns_updates.log'
+    monkeypatch.setenv('DNS_LOG_FILE', str(log_file))
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', True)
+    monkeypatch.setattr(Config, 'AUTH_PASSWORD', 'secret')
+    monkeypatch.setattr(Config, 'ENABLE_RATE_LIMIT', False)
+    repeated = RepeatedErrors(app_module.write_log_entry, window=60, clock=FakeClock(), background=False)
+    monkeypatch.setattr(app_module, 'repeated_errors', repeated)
+    environ = {'REMOTE_ADDR': '203.0.113.5'}
+
+    with app.test_client() as client:
+        for n in range(1, 11):
+            client.post('/update-dns', data=f'198.51.100.{n}', headers={'X-Auth-Password': 'wrong'},
+                        environ_base=environ)
+        for n in range(1, 11):
+            client.post('/update-dns', data='198.51.100.1',
+                        headers={'X-Auth-Password': 'wrong', 'X-Forwarded-For': f'192.0.2.{n}'},
+                        environ_base=environ)
+        assert len(log_file.read_text().splitlines()) == 1 and repeated.counted == 19
+
+        monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', False)
+        stats = client.get('/api/stats').get_json()['stats']
+        assert stats['total'] == 20 and stats['failed'] == 20
+
+def test_sigterm_flushes_repeats():
+    """Test that counted failures are written when the process is stopped with SIGTERM."""
+    written = []
+    repeated = RepeatedErrors(written.append, window=60, clock=FakeClock(), background=False)
+    repeated.add('key', error(0))
+    repeated.add('key', error(1))
+    previous = signal.getsignal(signal.SIGTERM)
+    try:
+        repeated.install_signal_handler(signal.SIGTERM)
+        with pytest.raises(SystemExit) as exited:
+            os.kill(os.getpid(), signal.SIGTERM)
+        assert exited.value.code == 0
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+    assert written == [summary(1, 1, since=1)]
@@ -0,0 +1,51 @@
+import json
+import pytest
+import app as app_module
+from app import app, Config
+from log_entry import LogEntry
+
+ENTRY = {'timestamp': '2024-01-15T10:30:00+00:00', 'ip_address': '203.0.113.7', 'requester_ip': '203.0.113.7',
+         'domain_name': 'home.example.com', 'status': 'success', 'change_id': '/change/C1',
+         'error_message': None, 'auth_method': 'header', 'token_id': None, 'user_agent': 'curl/8.0'}
+
+def test_dict_operations():
+    """Test that a LogEntry reads and compares like the dict it was built from."""
+    for data in [ENTRY, dict(ENTRY, timings={'parse': 0.04}),
+                 {'status': 'error', 'timestamp': '2024-01-15T10:30:00+00:00', 'extra': [1]},
+                 dict(ENTRY, ip_address=12345)]:
+        entry = LogEntry.from_dict(json.loads(json.dumps(data)))
+        assert entry == data and entry.to_dict() == data
+        assert dict(entry.items()) == data and set(entry.keys()) == set(data) and len(entry) == len(data)
+        for key, value in data.items():
+            assert entry[key] == value and entry.get(key) == value and key in entry
+
+    entry = LogEntry.from_dict({'status': 'error'})
+    assert entry.get('user_agent') is None and entry.get('timestamp', '') == ''
+    assert 'user_agent' not in entry and 'timings' not in entry
+    with pytest.raises(KeyError):
+        entry['ip_address']
+    assert entry != LogEntry.from_dict({'status': 'success'})
+
+def test_values_are_shared():
+    """Test that repeated low-cardinality values are stored once."""
+    first = LogEntry.from_dict(json.loads(json.dumps(ENTRY)))
+    second = LogEntry.from_dict(json.loads(json.dumps(ENTRY)))
+    for key in ('ip_address', 'requester_ip', 'domain_name', 'status', 'auth_method', 'user_agent'):
+        assert first[key] is second[key]
+    assert first['ip_address'] is first['requester_ip']
+
+def test_api_logs_serializes_entries(monkeypatch, tmp_path):
+    """Test that /api/logs returns the logged entries unchanged."""
+    log_file = str(tmp_path / 'dns_updates.log')
+    entries = [dict(ENTRY, timestamp=f'2024-01-15T10:30:{i:02d}+00:00') for i in range(3)]
+    entries.append({'timestamp': '2024-01-15T10:31:00+00:00', 'status': 'error', 'timings': {'parse': 0.1}})
+    with open(log_file, 'w') as f:
+        f.writelines(json.dumps(entry) + '\n' for entry in entries)
+    monkeypatch.setenv('DNS_LOG_FILE', log_file)
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', False)
+    monkeypatch.setattr(Config, 'ENABLE_RATE_LIMIT', False)
+
+    assert all(isinstance(log, LogEntry) for log in app_module.read_logs_from_file())
+    with app.test_client() as client:
+        assert client.get('/api/logs').get_json()['logs'] == entries[::-1]
+        assert client.get('/api/logs?filter=error').get_json()['logs'] == entries[3:]
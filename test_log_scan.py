@@ -0,0 +1,122 @@
+import json
+import os
+import sys
+import pytest
+import app as app_module
+import view_logs
+from app import app, Config
+from log_scan import read_matching, search_prefilter, status_prefilter, SEARCH_FIELDS
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+from generate_logs import generate_logs
+
+# Lines a naive byte search would get wrong
+TRICKY_LINES = [
+    '{"status": "\\u0065rror", "ip_address": "198.51.100.9"}',
+    '{"status":"error","domain_name":"HOME.Example.com"}',
+    '{"status": "error", "status": "success", "ip_address": "198.51.100.10"}',
+    '{"status": "success", "error_message": "\\"error\\""}',
+    '{"status": "error", "domain_name": "\u212aelvin.example.com"}',
+    '{"status": "error", "ip_address": 12345, "requester_ip": 1e5}',
+    '{"status": "error", "error_message": ["x", {"y": true}]}',
+    '{"status": "error"}\r{"status": "error", "ip_address": "198.51.100.11"}',
+    '["error"]',
+    '{"status": "error", "ip_address": "198.51.100.12"',
+    '',
+]
+
+SEARCHES = ['203.', '198.51.100.1', 'example', 'HOME', 'k', 'timeout', '100000', "'x'", 'true', 'none',
+            '"error"', 'é', '2001:db8']
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = str(tmp_path / 'dns_updates.log')
+    generate_logs(path, 3000)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('\n'.join(TRICKY_LINES))
+    return path
+
+def search_predicate(search):
+    def predicate(log):
+        return any(isinstance(log.get(field), str) and search.lower() in log[field].lower() for field in SEARCH_FIELDS)
+    return predicate
+
+def test_prefilter_matches_full_parse(log_file):
+    """Test that prefiltered reads return exactly what decoding every line returns."""
+    logs = app_module.read_logs_from_single_file(log_file)
+    for status in ('error', 'success'):
+        def predicate(log):
+            return log.get('status') == status
+        result = read_matching(log_file, status_prefilter(status), predicate)
+        assert result == [log for log in logs if predicate(log)]
+    for search in SEARCHES:
+        predicate = search_predicate(search)
+        assert read_matching(log_file, search_prefilter(search), predicate) == [log for log in logs if predicate(log)]
+    assert read_matching(log_file, None, lambda log: True) == logs
+
+def test_prefilters():
+    """Test which lines the prefilters pick out."""
+    chunk = (b'{"status": "success", "error_message": null}\n'
+             b'{"status": "error", "domain_name": "Home.example.com"}\n'
+             b'{"status": "\\u0065rror"}\n'
+             b'{"domain_name": "\xe2\x84\xaaelvin.example.com"}\n')
+    starts = [0, 45, 100, 125]
+    assert status_prefilter('error').line_starts(chunk) == starts[1:3]
+    assert search_prefilter('HOME').line_starts(chunk) == starts[1:]
+    assert search_prefilter('kelvin').line_starts(chunk) == starts[2:]
+    # Non-ASCII needles may match differently cased text
+    assert search_prefilter('é') is None
+    assert search_prefilter('') is None
+
+def test_api_logs_filters(monkeypatch, log_file):
+    """Test that filtered /api/logs pages and counts match the unfiltered read."""
+    monkeypatch.setenv('DNS_LOG_FILE', log_file)
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', False)
+    monkeypatch.setattr(Config, 'ENABLE_RATE_LIMIT', False)
+    logs = app_module.read_logs_from_single_file(log_file)
+
+    prefiltered = []
+    read_matching_logs = app_module.read_matching_logs
+    monkeypatch.setattr(app_module, 'read_matching_logs',
+                        lambda *args: prefiltered.append(args[1]) or read_matching_logs(*args))
+
+    with app.test_client() as client:
+        stats = client.get('/api/logs').get_json()['stats']
+        for query, expected in [('filter=error', [log for log in logs if log.get('status') == 'error']),
+                                ('search=198.51.100', [log for log in logs if search_predicate('198.51.100')(log)]),
+                                ('filter=success&search=home', [log for log in logs if log.get('status') == 'success'
+                                                                and search_predicate('home')(log)])]:
+            data = client.get(f'/api/logs?{query}').get_json()
+            assert data['stats'] == stats
+            assert data['total_count'] == len(expected)
+            expected.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+            assert data['logs'] == expected[:50]
+        assert len(prefiltered) == 3 and None not in prefiltered
+
+        # New entries show up in both the page and the counts
+        with open(log_file, 'a') as f:
+            f.write('\n' + json.dumps({'timestamp': '2099-01-01T00:00:00+00:00', 'status': 'error'}) + '\n')
+        data = client.get('/api/logs?filter=error').get_json()
+        assert data['logs'][0]['timestamp'] == '2099-01-01T00:00:00+00:00'
+        assert data['stats']['failed'] == stats['failed'] + 1
+
+def test_torn_lines_skipped(monkeypatch, log_file):
+    """Test that a line that is not valid UTF-8 (a torn write) is skipped rather than failing the read."""
+    monkeypatch.setenv('DNS_LOG_FILE', log_file)
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', False)
+    monkeypatch.setattr(Config, 'ENABLE_RATE_LIMIT', False)
+    expected = read_matching(log_file, status_prefilter('error'), lambda log: log.get('status') == 'error')
+    with open(log_file, 'ab') as f:
+        f.write(b'\n{"status": "error", "domain_name": "\xe2\x84\n')
+    assert read_matching(log_file, status_prefilter('error'), lambda log: log.get('status') == 'error') == expected
+    assert read_matching(log_file, None, lambda log: log.get('status') == 'error') == expected
+
+    with app.test_client() as client:
+        response = client.get('/api/logs?filter=error')
+    assert response.status_code == 200 and response.get_json()['total_count'] == len(expected)
+
+def test_view_logs_failed(monkeypatch, log_file):
+    """Test that view_logs.py reads the same failed entries with the prefilter."""
+    monkeypatch.setenv('DNS_LOG_FILE', log_file)
+    logs = app_module.read_logs_from_single_file(log_file)
+    assert view_logs.load_logs('error') == [log for log in logs if log.get('status') == 'error']
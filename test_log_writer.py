@@ -0,0 +1,82 @@
+import json
+import multiprocessing
+import os
+import time
+from log_writer import AppendWriter, get_writer
+
+PROCESSES = 8
+LINES_PER_PROCESS = 400
+
+def write_lines(path, worker, start_event):
+    """Write numbered JSON lines of varying size, some above the atomic size."""
+    writer = AppendWriter(path)
+    start_event.wait()
+    for number in range(LINES_PER_PROCESS):
+        padding = 'x' * (10000 if number % 50 == 0 else (number * 37) % 900)
+        writer.write(json.dumps({'worker': worker, 'number': number, 'padding': padding}) + '\n')
+    writer.close()
+
+def read_entries(*paths):
+    entries = []
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                entries.extend(json.loads(line) for line in f)
+    return entries
+
+def test_reopens_after_rotation(tmp_path):
+    """Test that the writer follows the path after a rename or delete."""
+    path = str(tmp_path / 'dns_updates.log')
+    writer = AppendWriter(path)
+    writer.write('one\n')
+    os.rename(path, path + '.1')
+    writer.write('two\n')
+    os.unlink(path)
+    writer.write('three\n')
+    writer.sync()
+    writer.close()
+
+    with open(path + '.1') as f:
+        assert f.read() == 'one\n'
+    with open(path) as f:
+        assert f.read() == 'three\n'
+    assert writer.reopens == 2
+
+def test_shared_writer_per_path(tmp_path):
+    """Test that one writer (one descriptor) is kept per path."""
+    path = str(tmp_path / 'dns_updates.log')
+    assert get_writer(path) is get_writer(path)
+    assert get_writer(path) is not get_writer(path + '.other')
+
+def test_concurrent_processes_with_rotation(tmp_path):
+    """Test that many processes appending at once lose and corrupt no lines, across a rotation."""
+    path = str(tmp_path / 'dns_updates.log')
+    context = multiprocessing.get_context('spawn')
+    start_event = context.Event()
+    processes = [context.Process(target=write_lines, args=(path, worker, start_event))
+                 for worker in range(PROCESSES)]
+    for process in processes:
+        process.start()
+    start_event.set()
+
+    # Rotate like logrotate (rename, then the writers create a new file)
+    while not os.path.exists(path) or os.path.getsize(path) < 200000:
+        if not any(process.is_alive() for process in processes):
+            break
+        time.sleep(0.001)
+    os.rename(path, path + '.1')
+
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    # Both the rotated and the new file received entries
+    assert read_entries(path + '.1') and read_entries(path)
+    entries = read_entries(path + '.1', path)
+    assert len(entries) == PROCESSES * LINES_PER_PROCESS
+    seen = {(entry['worker'], entry['number']) for entry in entries}
+    assert len(seen) == PROCESSES * LINES_PER_PROCESS
+    # Each worker's lines stay in order
+    for worker in range(PROCESSES):
+        numbers = [entry['number'] for entry in entries if entry['worker'] == worker]
+        assert numbers == sorted(numbers)
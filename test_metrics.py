@@ -0,0 +1,135 @@
+import multiprocessing
+import os
+from app import app, Config
+from metrics import Registry, Counter, Gauge, Histogram, LogFileStats, MmapValueStore
+
+def sample_value(text, sample):
+    """Get the value of one sample line from exposition text."""
+    for line in text.splitlines():
+        if line.startswith(sample + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+def test_reused_pid_starts_from_zero(tmp_path):
+    """Test that a file left by an earlier process with this pid is not reported as live values."""
+    stale = MmapValueStore(str(tmp_path / f'metrics_{os.getpid()}.db'))
+    stale.inc_many([('["hits_total",[]]', 41.0), ('["in_flight",[]]', 3.0)])
+    stale.close()
+
+    registry = Registry(str(tmp_path))
+    Counter(registry, 'hits_total', 'Hits').inc()
+    Gauge(registry, 'in_flight', 'In flight')
+    text = registry.generate_latest()
+    assert sample_value(text, 'hits_total') == 1
+    assert sample_value(text, 'in_flight') is None
+
+def test_counter_and_histogram_exposition():
+    """Test counters and cumulative histogram buckets in the text format."""
+    registry = Registry()
+    requests = Counter(registry, 'requests_total', 'Requests', ('status',))
+    latency = Histogram(registry, 'latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    requests.labels(200).inc()
+    requests.labels(200).inc(2)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    text = registry.generate_latest()
+    assert '# TYPE requests_total counter' in text
+    assert sample_value(text, 'requests_total{status="200"}') == 3
+    assert sample_value(text, 'latency_seconds_bucket{le="0.1"}') == 1
+    assert sample_value(text, 'latency_seconds_bucket{le="1"}') == 2
+    assert sample_value(text, 'latency_seconds_bucket{le="+Inf"}') == 3
+    assert sample_value(text, 'latency_seconds_count') == 3
+    assert sample_value(text, 'latency_seconds_sum') == 5.55
+
+def _worker(directory, count):
+    registry = Registry(directory)
+    counter = Counter(registry, 'hits_total', 'Hits')
+    histogram = Histogram(registry, 'work_seconds', 'Work', buckets=(1.0,))
+    for _ in range(count):
+        counter.inc()
+        histogram.observe(0.5)
+
+def test_values_are_summed_across_processes(tmp_path):
+    """Test that /metrics in one process reports totals from every worker process."""
+    processes = [multiprocessing.Process(target=_worker, args=(str(tmp_path), 500)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    registry = Registry(str(tmp_path))
+    Counter(registry, 'hits_total', 'Hits')
+    Histogram(registry, 'work_seconds', 'Work', buckets=(1.0,))
+    in_flight = Gauge(registry, 'in_flight', 'In flight')
+    in_flight.inc()
+
+    text = registry.generate_latest()
+    assert sample_value(text, 'hits_total') == 2000
+    assert sample_value(text, 'work_seconds_bucket{le="1"}') == 2000
+    assert sample_value(text, 'work_seconds_sum') == 1000
+    # Gauges only count processes that are still running
+    assert sample_value(text, 'in_flight') == 1
+
+def test_mmap_store_grows(tmp_path):
+    """Test that the per-process file grows when many series are created."""
+    registry = Registry(str(tmp_path))
+    counter = Counter(registry, 'series_total', 'Series', ('name',))
+    for i in range(3000):
+        counter.labels(f'series-{i:05d}').inc()
+    text = registry.generate_latest()
+    assert sample_value(text, 'series_total{name="series-02999"}') == 1
+
+def test_log_file_stats_is_incremental(tmp_path):
+    """Test that log size and entry count follow appends and rotation."""
+    log_file = tmp_path / 'dns_updates.log'
+    stats = LogFileStats()
+    assert stats.get(str(log_file)) == (0, 0)
+
+    log_file.write_text('{"a": 1}\n{"a": 2}\n')
+    assert stats.get(str(log_file)) == (18, 2)
+    with open(log_file, 'a') as f:
+        f.write('{"a": 3}\n')
+    assert stats.get(str(log_file)) == (27, 3)
+
+    # Rotated (replaced with a smaller file)
+    os.unlink(log_file)
+    log_file.write_text('{"a": 4}\n')
+    assert stats.get(str(log_file)) == (9, 1)
+
+def test_metrics_endpoint(monkeypatch, tmp_path):
+    """Test request, auth failure and log write metrics on /metrics."""
+    log_file = tmp_path / 'dns_updates.log'
+    monkeypatch.setenv('DNS_LOG_FILE', str(log_file))
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', True)
+    monkeypatch.setattr(Config, 'AUTH_PASSWORD', 'secret')
+    monkeypatch.setattr(Config, 'ENABLE_RATE_LIMIT', False)
+    samples = [
+        'dns_update_http_requests_total{route="/update-dns",method="POST",status="401"}',
+        'dns_update_http_requests_total{route="/health",method="GET",status="200"}',
+        'dns_update_auth_failures_total{method="header"}',
+        'dns_update_log_write_duration_seconds_count',
+        'dns_update_log_fsync_duration_seconds_count',
+    ]
+
+    with app.test_client() as client:
+        before = client.get('/metrics').get_data(as_text=True)
+        client.post('/update-dns', data='192.168.1.1', headers={'X-Auth-Password': 'wrong'})
+        client.get('/health')
+        response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+    for sample in samples:
+        assert sample_value(text, sample) == (sample_value(before, sample) or 0) + 1, sample
+    assert sample_value(text, 'dns_update_log_entries') == 1
+    assert sample_value(text, 'dns_update_log_file_size_bytes') == log_file.stat().st_size
+
+def test_metrics_can_be_disabled(monkeypatch):
+    """Test that /metrics returns 404 when metrics are disabled."""
+    monkeypatch.setattr(Config, 'ENABLE_METRICS', False)
+    with app.test_client() as client:
+        response = client.get('/metrics')
+    assert response.status_code == 404
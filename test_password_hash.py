@@ -0,0 +1,106 @@
+import pytest
+import app as app_module
+import password_hash
+from app import app, Config
+from password_hash import hash_password, verify_password_hash, is_password_hash, VerifiedCache, PasswordVerifier
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_hash_and_verify():
+    """Test that hashes are salted and verify only the right password."""
+    first = hash_password('secret', n=2 ** 4)
+    second = hash_password('secret', n=2 ** 4)
+    assert first != second
+    assert is_password_hash(first)
+    assert '$' not in first
+    assert verify_password_hash('secret', first)
+    assert not verify_password_hash('Secret', first)
+
+def test_malformed_hash():
+    """Test that a malformed hash raises ValueError."""
+    with pytest.raises(ValueError):
+        verify_password_hash('secret', 'scrypt:16384:8:1:not-enough-fields')
+    with pytest.raises(ValueError):
+        verify_password_hash('secret', 'bcrypt:1:2:3:4:5')
+
+def test_verified_cache_expires_and_is_bounded():
+    """Test cache TTL, size bound and that entries depend on the stored hash."""
+    clock = FakeClock()
+    cache = VerifiedCache(ttl=60, max_entries=2, clock=clock)
+    cache.add('hash-a', 'one')
+    assert cache.contains('hash-a', 'one')
+    assert not cache.contains('hash-b', 'one')
+
+    clock.now += 61
+    assert not cache.contains('hash-a', 'one')
+
+    for password in ('one', 'two', 'three'):
+        cache.add('hash-a', password)
+    assert len(cache) == 2
+    assert not cache.contains('hash-a', 'one')
+    assert cache.contains('hash-a', 'three')
+
+def test_verifier_caches_successes_only():
+    """Test that repeated good passwords skip the KDF but bad ones never do."""
+    verifier = PasswordVerifier(cache_ttl=300)
+    stored = hash_password('secret', n=2 ** 4)
+
+    assert verifier.verify('secret', stored)
+    assert verifier.verify('secret', stored)
+    assert verifier.stats()['kdf_checks'] == 1
+    assert verifier.stats()['cache_hits'] == 1
+
+    assert not verifier.verify('wrong', stored)
+    assert not verifier.verify('wrong', stored)
+    assert verifier.stats()['kdf_checks'] == 3
+
+def test_plaintext_password_skips_the_kdf(monkeypatch):
+    """Test that a plaintext password is compared directly, so wrong guesses never run scrypt."""
+    monkeypatch.setattr(password_hash, '_scrypt', lambda *args: pytest.fail('scrypt ran'))
+    verifier = PasswordVerifier(cache_ttl=300)
+    assert verifier.verify('secret', plaintext='secret')
+    assert not verifier.verify('wrong', plaintext='secret')
+    assert not verifier.verify('secret-longer', plaintext='secret')
+    assert not verifier.verify('secret')
+    assert verifier.stats() == {'cache_entries': 0, 'cache_hits': 0, 'kdf_checks': 0, 'plaintext_checks': 3}
+
+def test_update_dns_with_password_hash(monkeypatch, tmp_path):
+    """Test /update-dns authentication against AUTH_PASSWORD_HASH."""
+    monkeypatch.setenv('DNS_LOG_FILE', str(tmp_path / 'dns_updates.log'))
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', True)
+    monkeypatch.setattr(Config, 'AUTH_PASSWORD', '')
+    monkeypatch.setattr(Config, 'AUTH_PASSWORD_HASH', hash_password('secret', n=2 ** 4))
+    monkeypatch.setattr(Config, 'ENABLE_RATE_LIMIT', False)
+    monkeypatch.setattr(Config, 'ENABLE_IP_VALIDATION', False)
+    monkeypatch.setattr(Config, 'HOSTED_ZONE_ID', None)
+
+    with app.test_client() as client:
+        response = client.post('/update-dns', data='192.168.1.1', headers={'X-Auth-Password': 'wrong'})
+        assert response.status_code == 401
+        # Past authentication, stopped by the missing zone configuration
+        response = client.post('/update-dns', data='192.168.1.1', headers={'X-Auth-Password': 'secret'})
+        assert response.status_code == 500
+
+def test_auth_cookie_does_not_contain_password(monkeypatch, tmp_path):
+    """Test that the login cookie holds no password and dies with a password change."""
+    monkeypatch.setenv('DNS_LOG_FILE', str(tmp_path / 'dns_updates.log'))
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', True)
+    monkeypatch.setattr(Config, 'AUTH_PASSWORD', 'secret')
+    monkeypatch.setattr(Config, 'AUTH_PASSWORD_HASH', '')
+
+    with app.test_client() as client:
+        response = client.post('/login', data={'password': 'secret'})
+        assert response.status_code == 302
+        cookie = client.get_cookie('dns_auth').value
+        assert 'secret' not in cookie
+        assert app_module.validate_auth_cookie(cookie)
+        assert client.get('/api/stats').status_code == 200
+
+        monkeypatch.setattr(Config, 'AUTH_PASSWORD', 'changed')
+        assert not app_module.validate_auth_cookie(cookie)
+        assert client.get('/api/stats').status_code == 401
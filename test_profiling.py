@@ -0,0 +1,118 @@
+import json
+import os
+import pstats
+import app as app_module
+from app import app, Config
+from profiling import StageTimer, SamplingProfiler
+from api_tokens import TokenStore, generate_token, token_digest, write_token_file
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_stage_timer():
+    """Test that stages are measured between marks and repeated stages add up."""
+    clock = FakeClock()
+    timer = StageTimer(clock=clock)
+    clock.now = 0.002
+    timer.mark('parse')
+    clock.now = 0.012
+    timer.mark('route53')
+    clock.now = 0.013
+    timer.mark('parse')
+
+    assert timer.as_dict() == {'parse': 3.0, 'route53': 10.0}
+    assert timer.server_timing() == 'parse;dur=3.000, route53;dur=10.000, total;dur=13.000'
+
+def test_profiler_samples_one_in_n(tmp_path):
+    """Test that 1 in N calls are profiled and written as pstats files."""
+    profiler = SamplingProfiler(str(tmp_path), sample_rate=3)
+    results = [profiler.run('work', sum, range(100)) for _ in range(7)]
+
+    assert results == [4950] * 7
+    files = sorted(os.listdir(tmp_path))
+    assert len(files) == 2
+    assert profiler.stats()['samples_written'] == 2
+    pstats.Stats(os.path.join(tmp_path, files[0]))
+
+def test_profiler_disabled_by_default(tmp_path):
+    """Test that nothing is profiled with a sample rate of 0."""
+    profiler = SamplingProfiler(str(tmp_path / 'profiles'))
+    for _ in range(10):
+        profiler.run('work', sum, range(10))
+    assert not os.path.exists(tmp_path / 'profiles')
+
+def test_update_dns_server_timing(monkeypatch, tmp_path):
+    """Test that /update-dns returns a Server-Timing header and logs stage timings."""
+    log_file = tmp_path / 'dns_updates.log'
+    monkeypatch.setenv('DNS_LOG_FILE', str(log_file))
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', True)
+    monkeypatch.setattr(Config, 'AUTH_PASSWORD', 'secret')
+    monkeypatch.setattr(Config, 'ENABLE_RATE_LIMIT', False)
+
+    with app.test_client() as client:
+        response = client.post('/update-dns', data='192.168.1.1', headers={'X-Auth-Password': 'wrong'})
+
+    assert response.status_code == 401
+    stages = [part.split(';')[0] for part in response.headers['Server-Timing'].split(', ')]
+    assert stages == ['parse', 'rate_limit', 'auth', 'log_write', 'log_fsync', 'total']
+
+    entry = json.loads(log_file.read_text().splitlines()[-1])
+    assert list(entry['timings']) == ['parse', 'rate_limit', 'auth']
+
+def test_server_timing_can_be_disabled(monkeypatch, tmp_path):
+    """Test that ENABLE_SERVER_TIMING=false drops the header."""
+    monkeypatch.setenv('DNS_LOG_FILE', str(tmp_path / 'dns_updates.log'))
+    monkeypatch.setattr(Config, 'ENABLE_SERVER_TIMING', False)
+    with app.test_client() as client:
+        response = client.post('/update-dns', data='not-an-ip')
+    assert 'Server-Timing' not in response.headers
+
+def test_admin_profiling_endpoint(monkeypatch, tmp_path):
+    """Test switching the profiler on and rejecting bad sample rates."""
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', False)
+    monkeypatch.setattr(app_module, 'request_profiler', SamplingProfiler(str(tmp_path)))
+
+    with app.test_client() as client:
+        response = client.post('/admin/profiling', json={'sample_rate': 10})
+        assert response.status_code == 200
+        assert response.get_json()['profiler']['sample_rate'] == 10
+
+        response = client.post('/admin/profiling', json={'sample_rate': -1})
+        assert response.status_code == 400
+        assert client.get('/admin/profiling').get_json()['profiler']['sample_rate'] == 10
+
+def test_admin_profiling_requires_admin(monkeypatch, tmp_path):
+    """Test that only the password or an 'admin' token may change the profiler."""
+    path = str(tmp_path / 'tokens.json')
+    read_token, admin_token = generate_token(), generate_token()
+    write_token_file(path, {'tokens': [
+        {'id': 'grafana', 'digest': token_digest(read_token), 'scopes': ['read']},
+        {'id': 'ops', 'digest': token_digest(admin_token), 'scopes': ['admin']},
+    ]})
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', True)
+    monkeypatch.setattr(Config, 'AUTH_PASSWORD', 'secret')
+    monkeypatch.setattr(Config, 'API_TOKENS_FILE', path)
+    monkeypatch.setattr(app_module, 'api_token_store', TokenStore(path))
+    monkeypatch.setattr(app_module, 'request_profiler', SamplingProfiler(str(tmp_path)))
+    monkeypatch.setattr(app_module, 'get_last_successful_dns_ip', lambda: '198.51.100.7')
+
+    with app.test_client() as client:
+        # Enough for the dashboard, not for admin endpoints
+        assert client.get('/api/stats', headers={'X-Forwarded-For': '198.51.100.7'}).status_code == 200
+        with app.test_request_context():
+            client.set_cookie('dns_auth', app_module.create_auth_cookie())
+        assert client.get('/api/stats').status_code == 200
+        for headers in ({'X-Forwarded-For': '198.51.100.7'}, {'X-Auth-Password': read_token},
+                        {'X-Auth-Password': 'wrong'}):
+            response = client.post('/admin/profiling', json={'sample_rate': 1}, headers=headers)
+            assert response.status_code == 401
+        assert app_module.request_profiler.sample_rate == 0
+
+        for password in ('secret', admin_token):
+            response = client.post('/admin/profiling', json={'sample_rate': 5}, headers={'X-Auth-Password': password})
+            assert response.status_code == 200
+        assert app_module.request_profiler.sample_rate == 5
@@ -0,0 +1,156 @@
+import pytest
+import json
+import app as app_module
+from app import app
+from rate_limit import RateLimiter, retry_after_seconds
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def client():
+    """Create a test client with fresh rate limiters."""
+    app.config['TESTING'] = True
+    app_module.ip_rate_limiter.clear()
+    app_module.credential_rate_limiter.clear()
+    with app.test_client() as client:
+        yield client
+    app_module.ip_rate_limiter.clear()
+    app_module.credential_rate_limiter.clear()
+
+def test_bucket_allows_burst_then_limits():
+    """Test that a bucket allows `burst` requests and then asks the caller to wait."""
+    clock = FakeClock()
+    limiter = RateLimiter(rate_per_minute=60, burst=3, clock=clock)
+    assert [limiter.hit('a') for _ in range(3)] == [0, 0, 0]
+    assert limiter.hit('a') == pytest.approx(1.0)
+
+    # One token is refilled per second
+    clock.now += 1.0
+    assert limiter.hit('a') == 0
+    assert limiter.hit('a') > 0
+
+def test_keys_are_independent():
+    """Test that one key exhausting its bucket does not affect another."""
+    limiter = RateLimiter(rate_per_minute=1, burst=1, clock=FakeClock())
+    assert limiter.hit('a') == 0
+    assert limiter.hit('a') > 0
+    assert limiter.hit('b') == 0
+
+def test_lru_is_bounded():
+    """Test that the number of tracked buckets never exceeds max_keys."""
+    limiter = RateLimiter(rate_per_minute=1, burst=1, max_keys=100, clock=FakeClock())
+    for i in range(1000):
+        limiter.hit(f'10.0.{i // 256}.{i % 256}')
+    assert len(limiter) == 100
+
+def test_lru_keeps_recently_used_keys():
+    """Test that a recently used key survives eviction."""
+    limiter = RateLimiter(rate_per_minute=1, burst=1, max_keys=2, clock=FakeClock())
+    limiter.hit('a')
+    limiter.hit('b')
+    limiter.hit('a')
+    limiter.hit('c')  # evicts 'b', the least recently used
+    assert limiter.hit('a') > 0
+
+def test_refund_restores_a_token():
+    """Test that a refunded hit is available again, up to the bucket capacity."""
+    limiter = RateLimiter(rate_per_minute=1, burst=1, clock=FakeClock())
+    assert limiter.hit('a') == 0
+    limiter.refund('a')
+    limiter.refund('a')
+    assert limiter.hit('a') == 0
+    assert limiter.hit('a') > 0
+    limiter.refund('unknown')
+    assert len(limiter) == 1
+
+def test_retry_after_seconds():
+    """Test Retry-After rounding."""
+    assert retry_after_seconds(0.1) == 1
+    assert retry_after_seconds(2.2) == 3
+
+def test_update_dns_rate_limited_per_ip(client, monkeypatch):
+    """Test that /update-dns returns 429 with Retry-After once the requester IP is over its limit."""
+    monkeypatch.setattr(app_module, 'ip_rate_limiter', RateLimiter(1, 2))
+
+    # Count log writes to make sure rejected requests never reach the log
+    writes = []
+    monkeypatch.setattr(app_module, 'log_dns_update', lambda *args, **kwargs: writes.append(args))
+
+    for _ in range(2):
+        response = client.post('/update-dns', data='bad-ip', content_type='text/plain')
+        assert response.status_code == 400
+
+    response = client.post('/update-dns', data='192.168.1.100', content_type='text/plain')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert 'Rate limit' in json.loads(response.data)['error']
+    assert writes == []
+
+def test_update_dns_rate_limited_per_credential(client, monkeypatch):
+    """Test that a credential is limited even when requests come from different IPs."""
+    monkeypatch.setattr(app_module, 'credential_rate_limiter', RateLimiter(1, 1))
+
+    response = client.post('/update-dns', data='bad-ip guess1', content_type='text/plain',
+                           headers={'X-Forwarded-For': '198.51.100.1'})
+    assert response.status_code == 400
+
+    response = client.post('/update-dns', data='bad-ip guess1', content_type='text/plain',
+                           headers={'X-Forwarded-For': '198.51.100.2'})
+    assert response.status_code == 429
+
+    # A different credential has its own bucket
+    response = client.post('/update-dns', data='bad-ip guess2', content_type='text/plain',
+                           headers={'X-Forwarded-For': '198.51.100.3'})
+    assert response.status_code == 400
+
+def test_credential_rejection_keeps_the_ip_budget(client, monkeypatch):
+    """Test that a request rejected by the credential bucket is not charged to the requester IP."""
+    monkeypatch.setattr(app_module, 'ip_rate_limiter', RateLimiter(1, 2))
+    monkeypatch.setattr(app_module, 'credential_rate_limiter', RateLimiter(1, 1))
+    environ = {'REMOTE_ADDR': '203.0.113.5'}
+
+    # Someone else uses up the shared credential's bucket
+    response = client.post('/update-dns', data='bad-ip shared', environ_base={'REMOTE_ADDR': '198.51.100.1'})
+    assert response.status_code == 400
+    for _ in range(3):
+        response = client.post('/update-dns', data='bad-ip shared', environ_base=environ)
+        assert response.status_code == 429
+
+    # The peer's own budget is untouched
+    for _ in range(2):
+        response = client.post('/update-dns', data='bad-ip', environ_base=environ)
+        assert response.status_code == 400
+    response = client.post('/update-dns', data='bad-ip', environ_base=environ)
+    assert response.status_code == 429
+
+def test_rate_limit_can_be_disabled(client, monkeypatch):
+    """Test that ENABLE_RATE_LIMIT=false bypasses the limiter."""
+    monkeypatch.setattr(app_module.Config, 'ENABLE_RATE_LIMIT', False)
+    monkeypatch.setattr(app_module, 'ip_rate_limiter', RateLimiter(1, 1))
+    for _ in range(3):
+        response = client.post('/update-dns', data='bad-ip', content_type='text/plain')
+        assert response.status_code == 400
+
+def test_rate_limit_ignores_headers_from_untrusted_peers(client, monkeypatch):
+    """Test that rotating X-Forwarded-For only gets a fresh bucket through a trusted proxy."""
+    monkeypatch.setattr(app_module, 'ip_rate_limiter', RateLimiter(1, 1))
+
+    environ = {'REMOTE_ADDR': '203.0.113.5'}
+    response = client.post('/update-dns', data='bad-ip', headers={'X-Forwarded-For': '198.51.100.1'},
+                           environ_base=environ)
+    assert response.status_code == 400
+    response = client.post('/update-dns', data='bad-ip', headers={'X-Forwarded-For': '198.51.100.2'},
+                           environ_base=environ)
+    assert response.status_code == 429
+
+    # Through a trusted proxy, the address it appended is the client
+    for client_ip in ('198.51.100.1', '198.51.100.2'):
+        response = client.post('/update-dns', data='bad-ip',
+                               headers={'X-Forwarded-For': f'10.9.9.9, {client_ip}'})
+        assert response.status_code == 400
@@ -0,0 +1,107 @@
+import json
+import os
+import re
+from urllib.parse import urlsplit, parse_qsl
+import app as app_module
+from app import app, Config
+from api_tokens import TokenStore, generate_token, token_digest, write_token_file
+from record_state import RecordState
+
+def write_log(log_file, ip_address):
+    with open(log_file, 'a') as f:
+        f.write(json.dumps({'timestamp': '2024-01-01T00:00:00+00:00', 'ip_address': ip_address,
+                            'status': 'success'}) + '\n')
+
+def test_read_api_cache_headers(monkeypatch, tmp_path):
+    """Test X-Accel-Expires on read APIs and a version that changes on each log write."""
+    log_file = tmp_path / 'dns_updates.log'
+    write_log(log_file, '203.0.113.1')
+    monkeypatch.setenv('DNS_LOG_FILE', str(log_file))
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', False)
+    monkeypatch.setattr(Config, 'API_CACHE_TTL', 5)
+
+    with app.test_client() as client:
+        response = client.get('/api/stats')
+        assert response.headers['X-Accel-Expires'] == '5'
+        assert response.headers['Cache-Control'] == 'private, no-cache'
+        version = response.headers['X-Cache-Version']
+        assert client.get('/api/logs').headers['X-Cache-Version'] == version
+
+        write_log(log_file, '203.0.113.2')
+        assert client.get('/api/stats').headers['X-Cache-Version'] != version
+        assert 'X-Accel-Expires' not in client.get('/health').headers
+
+        monkeypatch.setattr(Config, 'API_CACHE_TTL', 0)
+        response = client.get('/api/stats')
+        assert 'X-Accel-Expires' not in response.headers
+        assert response.headers['Cache-Control'] == 'no-store'
+
+def test_cache_key_authenticates(monkeypatch, tmp_path):
+    """Test the auth_request endpoint for passwords, query passwords and tokens."""
+    log_file = tmp_path / 'dns_updates.log'
+    write_log(log_file, '203.0.113.1')
+    path = str(tmp_path / 'tokens.json')
+    token = generate_token()
+    write_token_file(path, {'tokens': [{'id': 'grafana', 'digest': token_digest(token), 'scopes': ['read']}]})
+    monkeypatch.setenv('DNS_LOG_FILE', str(log_file))
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', True)
+    monkeypatch.setattr(Config, 'AUTH_PASSWORD', 'secret')
+    monkeypatch.setattr(Config, 'AUTH_PASSWORD_HASH', '')
+    monkeypatch.setattr(Config, 'API_TOKENS_FILE', path)
+    monkeypatch.setattr(app_module, 'api_token_store', TokenStore(path))
+
+    with app.test_client() as client:
+        assert client.get('/cache-key').status_code == 401
+        response = client.get('/cache-key', headers={'X-Auth-Password': 'secret'})
+        assert response.status_code == 204
+        assert response.headers['X-Cache-Key'] == 'dashboard'
+        assert response.headers['X-Cache-Version'] == app_module.get_log_version()
+
+        response = client.get('/cache-key', headers={'X-Original-URI': '/api/logs?limit=5&password=secret'})
+        assert response.status_code == 204
+        response = client.get('/cache-key', headers={'X-Auth-Password': token})
+        assert response.headers['X-Cache-Key'] == 'token:grafana'
+
+def test_last_successful_ip_reads_log_tail(monkeypatch, tmp_path):
+    """Test that the last successful IP is kept up to date by reading only what was appended."""
+    log_file = tmp_path / 'dns_updates.log'
+    write_log(log_file, '203.0.113.1')
+    monkeypatch.setenv('DNS_LOG_FILE', str(log_file))
+    monkeypatch.setattr(app_module, '_record_states', {})
+    read_bytes = []
+    ingest_lines = RecordState._ingest_lines
+    monkeypatch.setattr(RecordState, '_ingest_lines',
+                        lambda self, data, at_end: read_bytes.append(len(data)) or ingest_lines(self, data, at_end))
+
+    assert app_module.get_last_successful_dns_ip() == '203.0.113.1'
+    assert app_module.get_last_successful_dns_ip() == '203.0.113.1'
+    assert read_bytes == [log_file.stat().st_size]
+    size = log_file.stat().st_size
+    with open(log_file, 'a') as f:
+        f.write(json.dumps({'timestamp': '2024-01-02T00:00:00+00:00', 'ip_address': '203.0.113.2',
+                            'status': 'success'}) + '\n')
+    assert app_module.get_last_successful_dns_ip() == '203.0.113.2'
+    assert read_bytes[1:] == [log_file.stat().st_size - size]
+
+NGINX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nginx')
+
+def nginx_cache_key(template, uri):
+    """Expand a proxy_cache_key template for a request URI, as nginx does for $uri and $arg_*."""
+    parts = urlsplit(uri)
+    args = dict(parse_qsl(parts.query))
+    values = {'uri': parts.path, 'request_uri': uri, 'args': parts.query, 'query_string': parts.query,
+              'dns_update_cache_key': 'dashboard', 'dns_update_cache_version': 'v1'}
+    return re.sub(r'\$(\w+)', lambda m: args.get(m.group(1)[4:], '') if m.group(1).startswith('arg_')
+                  else values[m.group(1)], template)
+
+def test_nginx_cache_key_excludes_password():
+    """Test that ?password= neither changes nor appears in the nginx cache keys."""
+    for name in ('dns-update.conf', 'dns-update-http.conf'):
+        with open(os.path.join(NGINX_DIR, name)) as f:
+            templates = re.findall(r'proxy_cache_key "([^"]+)";', f.read())
+        assert len(templates) == 2
+        for template in templates:
+            key = nginx_cache_key(template, '/api/logs?page=2&filter=error&search=home&password=s3cret')
+            assert 's3cret' not in key
+            assert key == nginx_cache_key(template, '/api/logs?page=2&filter=error&search=home')
+            assert key != nginx_cache_key(template, '/api/logs?page=3&filter=error&search=home')
@@ -0,0 +1,96 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from botocore.exceptions import ClientError, EndpointConnectionError
+import app as app_module
+from app import Config
+
+class StubRoute53:
+    """Minimal stand-in for the boto3 Route53 client."""
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+
+    def get_hosted_zone_count(self):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return {'HostedZoneCount': 1}
+
+def test_client_uses_tuned_settings(monkeypatch):
+    """Test that the Route53 client is built from the configured botocore settings."""
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'test')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'test')
+    monkeypatch.setattr(Config, 'ROUTE53_CONNECT_TIMEOUT', 2.0)
+    monkeypatch.setattr(Config, 'ROUTE53_READ_TIMEOUT', 7.0)
+    monkeypatch.setattr(Config, 'ROUTE53_MAX_POOL_CONNECTIONS', 4)
+
+    client = app_module.create_route53_client()
+    assert client.meta.config.connect_timeout == 2.0
+    assert client.meta.config.read_timeout == 7.0
+    assert client.meta.config.max_pool_connections == 4
+    assert client.meta.config.tcp_keepalive is True
+
+def test_warm_up_makes_a_call(monkeypatch):
+    """Test that warming the client makes a single cheap Route53 call."""
+    stub = StubRoute53()
+    monkeypatch.setattr(app_module, 'route53_client', stub)
+    assert app_module.warm_route53_client() is True
+    assert stub.calls == 1
+
+def test_warm_up_tolerates_aws_errors(monkeypatch):
+    """Test that an AWS error response still counts as a warm connection."""
+    error = ClientError({'Error': {'Code': 'AccessDenied', 'Message': 'denied'}}, 'GetHostedZoneCount')
+    monkeypatch.setattr(app_module, 'route53_client', StubRoute53(error))
+    assert app_module.warm_route53_client() is True
+
+def test_warm_up_reports_connection_failures(monkeypatch):
+    """Test that a connection failure is reported as not warm."""
+    error = EndpointConnectionError(endpoint_url='https://route53.amazonaws.com')
+    monkeypatch.setattr(app_module, 'route53_client', StubRoute53(error))
+    assert app_module.warm_route53_client() is False
+
+def test_keep_warm_pings_until_stopped(monkeypatch):
+    """Test that the keep-warm loop pings periodically and stops on request."""
+    stub = StubRoute53()
+    monkeypatch.setattr(app_module, 'route53_client', stub)
+    stop_event = threading.Event()
+    thread = threading.Thread(target=app_module.keep_route53_warm, args=(0.01, stop_event))
+    thread.start()
+    deadline = time.monotonic() + 5
+    while stub.calls < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stop_event.set()
+    thread.join(timeout=1)
+    assert stub.calls >= 2
+    assert not thread.is_alive()
+
+def test_importing_app_does_not_load_boto3():
+    """Test that boto3/botocore are only imported when the Route53 client is first used."""
+    code = "import sys, app; print('boto3' in sys.modules or 'botocore' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    assert result.stdout.strip() == 'False'
+
+def test_client_is_created_on_first_use(monkeypatch):
+    """Test that get_route53_client builds the client lazily and only once."""
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'test')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'test')
+    monkeypatch.setattr(Config, 'AWS_ACCESS_KEY_ID', 'test')
+    monkeypatch.setattr(Config, 'AWS_SECRET_ACCESS_KEY', 'test')
+    monkeypatch.setattr(app_module, 'route53_client', None)
+    monkeypatch.setattr(app_module, '_route53_client_attempted', False)
+
+    client = app_module.get_route53_client()
+    assert client is not None
+    assert app_module.get_route53_client() is client
+
+def test_missing_credentials_leave_client_unavailable(monkeypatch):
+    """Test that broken AWS configuration results in no client rather than an error."""
+    monkeypatch.setattr(Config, 'AWS_ACCESS_KEY_ID', None)
+    monkeypatch.setattr(Config, 'AWS_SECRET_ACCESS_KEY', 'secret-without-key-id')
+    monkeypatch.setattr(app_module, 'route53_client', None)
+    monkeypatch.setattr(app_module, '_route53_client_attempted', False)
+    assert app_module.get_route53_client() is None
@@ -0,0 +1,86 @@
+import pytest
+from botocore.exceptions import ClientError
+from route53_scheduler import Route53Scheduler
+
+class FakeTime:
+    """Fake clock whose sleep() advances time instantly."""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def make_scheduler(fake, **kwargs):
+    return Route53Scheduler(clock=fake.clock, sleep=fake.sleep, **kwargs)
+
+def aws_error(code):
+    return ClientError({'Error': {'Code': code, 'Message': code}}, 'ChangeResourceRecordSets')
+
+def flaky(codes, result='ok'):
+    """Return a callable that raises the given error codes in order, then succeeds."""
+    remaining = list(codes)
+    def call(**kwargs):
+        if remaining:
+            raise aws_error(remaining.pop(0))
+        return result
+    return call
+
+def test_success_passes_through():
+    """Test that a successful call returns its response."""
+    scheduler = make_scheduler(FakeTime())
+    assert scheduler.call(lambda **kwargs: kwargs, HostedZoneId='Z1') == {'HostedZoneId': 'Z1'}
+    assert scheduler.stats()['calls'] == 1
+
+def test_throttling_is_retried():
+    """Test that Throttling and PriorRequestNotComplete are retried with backoff."""
+    fake = FakeTime()
+    scheduler = make_scheduler(fake)
+    assert scheduler.call(flaky(['Throttling', 'PriorRequestNotComplete'])) == 'ok'
+
+    stats = scheduler.stats()
+    assert stats['throttles'] == 2
+    assert stats['retries'] == 2
+    assert stats['calls'] == 1
+
+def test_other_errors_are_not_retried():
+    """Test that non-throttling errors are raised immediately."""
+    scheduler = make_scheduler(FakeTime())
+    with pytest.raises(ClientError):
+        scheduler.call(flaky(['InvalidChangeBatch']))
+    assert scheduler.stats()['retries'] == 0
+    assert scheduler.stats()['failures'] == 1
+
+def test_gives_up_after_max_retries():
+    """Test that persistent throttling eventually surfaces the error."""
+    scheduler = make_scheduler(FakeTime(), max_retries=2)
+    with pytest.raises(ClientError):
+        scheduler.call(flaky(['Throttling'] * 10))
+    assert scheduler.stats()['retries'] == 2
+
+def test_backoff_stays_within_deadline():
+    """Test that retries never sleep past the deadline."""
+    fake = FakeTime()
+    scheduler = make_scheduler(fake, deadline=1.0, max_retries=100, base_delay=0.5)
+    with pytest.raises(ClientError):
+        scheduler.call(flaky(['Throttling'] * 1000))
+    assert fake.now <= 1.0
+
+def test_token_bucket_paces_bursts():
+    """Test that calls beyond the burst are delayed to the configured rate."""
+    fake = FakeTime()
+    scheduler = make_scheduler(fake, rate_per_second=5, burst=5)
+    for _ in range(10):
+        scheduler.call(lambda: 'ok')
+    # 5 calls from the burst, the next 5 paced at ~5/s
+    assert fake.now == pytest.approx(1.0, abs=0.2)
+
+def test_throttling_lowers_rate():
+    """Test that the admission rate adapts down after throttling."""
+    scheduler = make_scheduler(FakeTime(), rate_per_second=4)
+    scheduler.call(flaky(['Throttling']))
+    assert scheduler.stats()['current_rate'] < 4
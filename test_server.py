@@ -0,0 +1,105 @@
+import http.client
+import os
+import socket
+import stat
+import threading
+import app as app_module
+import server as server_module
+from app import app
+from rate_limit import RateLimiter
+from server import get_socket_address, get_systemd_listen_fds, make_servers
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix domain socket."""
+    def __init__(self, path):
+        super().__init__('localhost')
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+def serve(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+def test_systemd_listen_fds(monkeypatch):
+    """Test that sockets are only taken when passed to this process."""
+    monkeypatch.setenv('LISTEN_PID', str(os.getpid() + 1))
+    monkeypatch.setenv('LISTEN_FDS', '2')
+    assert get_systemd_listen_fds() == []
+
+    monkeypatch.setenv('LISTEN_PID', str(os.getpid()))
+    assert get_systemd_listen_fds() == [3, 4]
+    assert 'LISTEN_FDS' not in os.environ
+
+def test_unix_socket_keepalive(tmp_path):
+    """Test serving on a Unix socket with several requests per connection."""
+    path = str(tmp_path / 'dns-update.sock')
+    servers = make_servers(app, '127.0.0.1', 0, unix_socket=path, unix_socket_mode=0o660)
+    assert len(servers) == 1
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o660
+    serve(servers[0])
+    try:
+        connection = UnixHTTPConnection(path)
+        sockets = set()
+        for _ in range(3):
+            connection.request('GET', '/health')
+            response = connection.getresponse()
+            assert response.status == 200
+            assert response.version == 11
+            response.read()
+            sockets.add(connection.sock)
+        # All requests went over the same connection
+        assert len(sockets) == 1
+        connection.close()
+    finally:
+        servers[0].shutdown()
+        servers[0].server_close()
+
+def test_socket_activation(monkeypatch, tmp_path):
+    """Test serving on an already listening socket as passed by systemd."""
+    path = str(tmp_path / 'activated.sock')
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(16)
+    assert get_socket_address(listener.fileno()) == (f'unix://{path}', 0)
+    monkeypatch.setattr(server_module, 'get_systemd_listen_fds', lambda: [listener.fileno()])
+
+    servers = make_servers(app, '127.0.0.1', 5000, unix_socket=str(tmp_path / 'unused.sock'))
+    assert not os.path.exists(tmp_path / 'unused.sock')
+    serve(servers[0])
+    try:
+        connection = UnixHTTPConnection(path)
+        connection.request('GET', '/health')
+        assert connection.getresponse().status == 200
+        connection.close()
+    finally:
+        servers[0].shutdown()
+        servers[0].server_close()
+        listener.close()
+
+def test_unix_socket_clients_limited_apart(monkeypatch, tmp_path):
+    """Test that clients proxied over the Unix socket get their own rate limit bucket."""
+    monkeypatch.setattr(app_module.Config, 'ENABLE_RATE_LIMIT', True)
+    monkeypatch.setattr(app_module, 'ip_rate_limiter', RateLimiter(1, 1))
+    path = str(tmp_path / 'dns-update.sock')
+    servers = make_servers(app, '127.0.0.1', 0, unix_socket=path)
+    serve(servers[0])
+    try:
+        connection = UnixHTTPConnection(path)
+        statuses = []
+        for client_ip in ('198.51.100.1', '198.51.100.1', '198.51.100.2'):
+            connection.request('POST', '/update-dns', body='bad-ip', headers={'X-Real-IP': client_ip})
+            response = connection.getresponse()
+            response.read()
+            statuses.append(response.status)
+        assert statuses == [400, 429, 400]
+        connection.close()
+    finally:
+        servers[0].shutdown()
+        servers[0].server_close()
+
+def test_plain_tcp_uses_app_run(monkeypatch):
+    """Test that without a Unix socket or systemd sockets nothing is created."""
+    monkeypatch.delenv('LISTEN_PID', raising=False)
+    assert make_servers(app, '127.0.0.1', 5000) == []
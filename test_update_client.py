@@ -0,0 +1,153 @@
+import json
+import threading
+import pytest
+from werkzeug.serving import make_server
+import app as app_module
+from app import app, Config
+from route53_scheduler import Route53Scheduler
+from update_client import UpdateClient, RetryableError, UpdateRejected, backoff_delay, run_daemon
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, text='', headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.text = text
+        self.headers = headers or {}
+
+    def json(self):
+        if self.body is None:
+            raise ValueError('No JSON')
+        return self.body
+
+class FakeSession:
+    """Stands in for requests.Session: a fixed public IP and queued /update-dns answers."""
+    def __init__(self, ip_address='203.0.113.7'):
+        self.ip_address = ip_address
+        self.answers = []
+        self.posts = []
+
+    def get(self, url, timeout=None):
+        return FakeResponse(200, text=self.ip_address + '\n')
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.posts.append((url, data, headers))
+        if self.answers:
+            return self.answers.pop(0)
+        return FakeResponse(200, {'success': True, 'change_id': f'/change/C{len(self.posts)}'})
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000000.0
+
+    def __call__(self):
+        return self.now
+
+def test_posts_only_on_change_and_heartbeat(tmp_path):
+    """Test that an address is posted when it changes or the heartbeat is due, and remembered across restarts."""
+    state_file = str(tmp_path / 'state.json')
+    session, clock = FakeSession(), FakeClock()
+    client = UpdateClient('https://dns.example.com/', 'secret', state_file=state_file, heartbeat=3600,
+                          session=session, clock=clock)
+    assert client.check() == 'updated'
+    assert session.posts == [('https://dns.example.com/update-dns', '203.0.113.7',
+                              {'Content-Type': 'text/plain', 'X-Auth-Password': 'secret'})]
+    assert client.check() == 'unchanged'
+
+    # A restarted client remembers the acknowledged address
+    client = UpdateClient('https://dns.example.com', 'secret', state_file=state_file, heartbeat=3600,
+                          session=session, clock=clock)
+    clock.now += 3599
+    assert client.check() == 'unchanged' and len(session.posts) == 1
+    clock.now += 1
+    assert client.check() == 'heartbeat' and len(session.posts) == 2
+    session.ip_address = '198.51.100.1'
+    assert client.check() == 'updated' and session.posts[-1][1] == '198.51.100.1'
+    with open(state_file) as f:
+        assert json.load(f) == {'ip': '198.51.100.1', 'updated_at': clock.now, 'change_id': '/change/C3'}
+
+def test_failures_are_not_remembered(tmp_path):
+    """Test that 429/5xx are retryable with Retry-After, other errors are rejections, and neither is cached."""
+    session = FakeSession()
+    client = UpdateClient('http://localhost:5000', state_file=str(tmp_path / 'state.json'), session=session)
+    session.answers = [FakeResponse(429, {'error': 'Rate limit exceeded'}, headers={'Retry-After': '42'}),
+                       FakeResponse(502, text='Bad Gateway'),
+                       FakeResponse(401, {'error': 'Authentication failed'})]
+    with pytest.raises(RetryableError) as excinfo:
+        client.check()
+    assert excinfo.value.retry_after == 42
+    with pytest.raises(RetryableError) as excinfo:
+        client.check()
+    assert excinfo.value.retry_after is None
+    with pytest.raises(UpdateRejected):
+        client.check()
+    assert client.state == {} and not (tmp_path / 'state.json').exists()
+    session.ip_address = 'not an address'
+    with pytest.raises(RetryableError):
+        client.check()
+    assert len(session.posts) == 3
+
+def test_backoff():
+    """Test that backoff grows, stays under the maximum and honors Retry-After."""
+    for failures in range(1, 100):
+        delay = backoff_delay(failures, base_delay=10, max_delay=300)
+        assert min(300, 10 * 2 ** (failures - 1)) / 2 <= delay <= min(300, 10 * 2 ** (failures - 1))
+    assert backoff_delay(1, base_delay=10, max_delay=300, retry_after=900) == 900
+
+def test_daemon_backs_off_and_recovers(tmp_path, monkeypatch):
+    """Test the daemon loop waits the backoff delay after a failure and the interval after success."""
+    session = FakeSession()
+    session.answers = [FakeResponse(503, {'error': 'AWS error'}, headers={'Retry-After': '7'})]
+    client = UpdateClient('http://localhost:5000', state_file=None, session=session)
+    waits = []
+
+    class StopAfterTwo:
+        def wait(self, delay):
+            waits.append(delay)
+            return len(waits) == 2
+
+    monkeypatch.setattr('update_client.random.uniform', lambda low, high: low)
+    run_daemon(client, interval=300, base_delay=2, max_delay=60, stop_event=StopAfterTwo())
+    assert waits == [7, 300] and len(session.posts) == 2
+
+def test_against_service(monkeypatch, tmp_path):
+    """Test the client against the service over HTTP."""
+    calls = []
+
+    class StubRoute53:
+        def change_resource_record_sets(self, **kwargs):
+            calls.append(kwargs)
+            return {'ChangeInfo': {'Id': f'/change/C{len(calls)}'}}
+
+    monkeypatch.setenv('DNS_LOG_FILE', str(tmp_path / 'dns_updates.log'))
+    monkeypatch.setattr(Config, 'HOSTED_ZONE_ID', 'Z123')
+    monkeypatch.setattr(Config, 'DOMAIN_NAME', 'home.example.com')
+    monkeypatch.setattr(Config, 'ENABLE_PASSWORD_AUTH', True)
+    monkeypatch.setattr(Config, 'AUTH_PASSWORD', 'secret')
+    monkeypatch.setattr(Config, 'ENABLE_RATE_LIMIT', False)
+    monkeypatch.setattr(app_module, 'route53_client', StubRoute53())
+    monkeypatch.setattr(app_module, 'route53_scheduler', Route53Scheduler(rate_per_second=1000, burst=1000))
+    monkeypatch.setattr(app_module, '_record_states', {})
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f'http://127.0.0.1:{server.server_port}'
+        client = UpdateClient(url, 'secret', state_file=str(tmp_path / 'state.json'))
+        client.detect_ip = lambda: '127.0.0.1'
+        assert client.check() == 'updated' and client.check() == 'unchanged'
+        assert len(calls) == 1 and client.state['change_id'] == '/change/C1'
+
+        # With /check, an update is posted when the record was changed elsewhere, despite the cache
+        client = UpdateClient(url, 'secret', state_file=str(tmp_path / 'state.json'), use_check=True)
+        assert client.check() == 'unchanged' and len(calls) == 1
+        with open(tmp_path / 'dns_updates.log', 'a') as f:
+            f.write(json.dumps({'timestamp': '2099-01-01T00:00:00+00:00', 'ip_address': '198.51.100.1',
+                                'domain_name': 'home.example.com', 'status': 'success'}) + '\n')
+        assert client.check() == 'updated' and client.check() == 'unchanged' and len(calls) == 2
+
+        client.password = 'wrong'
+        client.state = {}
+        with pytest.raises(UpdateRejected):
+            client.check()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -17,6 +17,7 @@ SERVICE_USER="dns-updater"
 SERVICE_GROUP="dns-updater"
 INSTALL_DIR="/opt/dns-update"
 SERVICE_FILE="/etc/systemd/system/dns-update.service"
+SOCKET_FILE="/etc/systemd/system/dns-update.socket"
 ENV_FILE="/etc/dns-update/env"
 
 echo -e "${YELLOW}DNS Update Service Uninstallation${NC}"
@@ -41,6 +42,17 @@ print_error() {
     echo -e "${RED}[ERROR]${NC} $1"
 }
 
+# Stop and disable the socket first so it does not start the service again
+if systemctl is-active --quiet dns-update.socket; then
+    systemctl stop dns-update.socket
+    print_status "Stopped dns-update socket"
+fi
+
+if systemctl is-enabled --quiet dns-update.socket; then
+    systemctl disable dns-update.socket
+    print_status "Disabled dns-update socket"
+fi
+
 # Stop and disable the service
 print_status "Stopping and disabling service..."
 if systemctl is-active --quiet dns-update; then
@@ -66,6 +78,11 @@ else
     print_warning "Service file not found: $SERVICE_FILE"
 fi
 
+if [ -f "$SOCKET_FILE" ]; then
+    rm -f "$SOCKET_FILE"
+    print_status "Removed socket file: $SOCKET_FILE"
+fi
+
 # Reload systemd
 print_status "Reloading systemd..."
 systemctl daemon-reload
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Client for the DNS Update Service: a library and a daemon.
+
+Routers and hosts used to POST "IP PASSWORD" to /update-dns from cron every
+few minutes, changed or not, and every post cost a TLS handshake, an
+fsynced log line and often a Route53 call. UpdateClient looks up the
+public address, and posts only when it differs from the last address the
+service acknowledged (kept in a small state file, so restarts do not
+re-post), or when the last post is older than the heartbeat interval.
+With use_check, the address and whether the record needs an update come
+from the service's own GET /check instead, which sees the address the
+service will validate against. Posts reuse one keep-alive session; 429
+and 5xx answers and network errors are retried with jittered exponential
+backoff, never sooner than the service's Retry-After.
+
+Usage:
+  export DNS_UPDATE_PASSWORD=...
+  python update_client.py --url https://dns.example.com           - run as a daemon
+  python update_client.py --url https://dns.example.com --once    - one check, e.g. from cron
+  python update_client.py --url https://dns.example.com --use-check
+"""
+
+import argparse
+import ipaddress
+import json
+import logging
+import os
+import random
+import signal
+import sys
+import threading
+import time
+import requests
+
+logger = logging.getLogger('update_client')
+
+DEFAULT_IP_CHECK_URL = 'https://checkip.amazonaws.com'
+DEFAULT_STATE_FILE = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+                                  'dns-update', 'state.json')
+
+
+class RetryableError(Exception):
+    """The check failed in a way that may pass later (429, 5xx, network error)."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class UpdateRejected(Exception):
+    """The service refused the update (bad password, IP mismatch, bad request)."""
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header (delay-seconds form only), else None."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(failures, base_delay=30.0, max_delay=3600.0, retry_after=None):
+    """Jittered exponential backoff after `failures` consecutive failures, at least `retry_after`."""
+    delay = min(max_delay, base_delay * 2 ** min(failures - 1, 30)) * random.uniform(0.5, 1.0)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class UpdateClient:
+    """Posts the public IP address to the service when it changes."""
+
+    def __init__(self, url, password=None, state_file=DEFAULT_STATE_FILE, ip_check_url=DEFAULT_IP_CHECK_URL,
+                 heartbeat=12 * 3600, timeout=10.0, session=None, clock=time.time, use_check=False):
+        self.update_url = url.rstrip('/') + '/update-dns'
+        self.check_url = url.rstrip('/') + '/check'
+        self.password = password
+        self.state_file = state_file
+        self.ip_check_url = ip_check_url
+        self.use_check = use_check
+        self.heartbeat = heartbeat
+        self.timeout = timeout
+        self.session = session or requests.Session()  # One keep-alive connection per host
+        self.clock = clock
+        self.state = self.load_state()
+
+    def load_state(self):
+        """The last acknowledged update from the state file: {'ip', 'updated_at'}, or {}."""
+        if not self.state_file:
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return state if isinstance(state, dict) else {}
+
+    def save_state(self, state):
+        """Write the state file atomically."""
+        self.state = state
+        if not self.state_file:
+            return
+        directory = os.path.dirname(os.path.abspath(self.state_file))
+        os.makedirs(directory, exist_ok=True)
+        temp_file = f"{self.state_file}.{os.getpid()}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_file, self.state_file)
+
+    def detect_ip(self):
+        """Look up the public IPv4 address of this host."""
+        try:
+            response = self.session.get(self.ip_check_url, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise RetryableError(f"IP check failed: {e}")
+        if response.status_code != 200:
+            raise RetryableError(f"IP check returned HTTP {response.status_code}",
+                                 parse_retry_after(response.headers.get('Retry-After')))
+        text = response.text.strip()
+        try:
+            return str(ipaddress.IPv4Address(text))
+        except ValueError:
+            raise RetryableError(f"IP check returned {text[:64]!r}, not an IPv4 address")
+
+    def needs_update(self, ip_address):
+        """Whether `ip_address` has to be posted: it changed, or the heartbeat is due."""
+        if self.state.get('ip') != ip_address:
+            return True
+        updated_at = self.state.get('updated_at')
+        return not isinstance(updated_at, (int, float)) or self.clock() - updated_at >= self.heartbeat
+
+    def _call(self, name, method, url, headers, **kwargs):
+        """Make an authenticated request to the service. Returns its JSON answer."""
+        if self.password:
+            headers['X-Auth-Password'] = self.password
+        try:
+            response = getattr(self.session, method)(url, headers=headers, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            raise RetryableError(f"{name} failed: {e}")
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        if not isinstance(body, dict):
+            body = {}
+        if response.status_code == 429 or response.status_code >= 500:
+            raise RetryableError(f"{name} returned HTTP {response.status_code}: {body.get('error')}",
+                                 parse_retry_after(response.headers.get('Retry-After')))
+        if response.status_code != 200:
+            raise UpdateRejected(f"{name} returned HTTP {response.status_code}: {body.get('error')}")
+        return body
+
+    def post(self, ip_address):
+        """Post an address to /update-dns. Returns the service's JSON answer."""
+        return self._call('Update', 'post', self.update_url, {'Content-Type': 'text/plain'}, data=ip_address)
+
+    def check_service(self):
+        """
+        Ask the service's GET /check for the requester IP it sees and
+        whether the record needs an update. Returns (ip_address, update_needed).
+        """
+        body = self._call('Check', 'get', self.check_url, {})
+        try:
+            return str(ipaddress.IPv4Address(body.get('requester_ip'))), bool(body.get('update_needed'))
+        except ValueError:
+            raise RetryableError(f"Check returned requester IP {body.get('requester_ip')!r}, not an IPv4 address")
+
+    def check(self):
+        """
+        Post the current address if needed. Returns 'updated', 'heartbeat' or
+        'unchanged'; raises RetryableError or UpdateRejected.
+        """
+        if self.use_check:
+            ip_address, update_needed = self.check_service()
+        else:
+            ip_address, update_needed = self.detect_ip(), False
+        if not update_needed and not self.needs_update(ip_address):
+            logger.debug(f"{ip_address} unchanged")
+            return 'unchanged'
+        outcome = 'heartbeat' if self.state.get('ip') == ip_address and not update_needed else 'updated'
+        result = self.post(ip_address)
+        self.save_state({'ip': ip_address, 'updated_at': self.clock(), 'change_id': result.get('change_id')})
+        logger.info(f"{ip_address} acknowledged ({outcome})")
+        return outcome
+
+
+def run_daemon(client, interval=300.0, base_delay=30.0, max_delay=3600.0, stop_event=None):
+    """Check every `interval` seconds until `stop_event` is set, backing off after failures."""
+    stop_event = stop_event or threading.Event()
+    failures = 0
+    while True:
+        try:
+            client.check()
+            failures = 0
+            delay = interval
+        except RetryableError as e:
+            failures += 1
+            delay = backoff_delay(failures, base_delay, max_delay, e.retry_after)
+            logger.warning(f"{e}; retrying in {delay:.0f}s")
+        except UpdateRejected as e:
+            # Retrying will not help until the configuration is fixed
+            failures += 1
+            delay = max_delay
+            logger.error(f"{e}; retrying in {delay:.0f}s")
+        if stop_event.wait(delay):
+            return
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Keep a DNS Update Service record pointed at this host')
+    parser.add_argument('--url', default=os.environ.get('DNS_UPDATE_URL'), help='Service base URL')
+    parser.add_argument('--state-file', default=os.environ.get('DNS_UPDATE_STATE_FILE', DEFAULT_STATE_FILE),
+                        help='Where the last acknowledged address is kept')
+    parser.add_argument('--ip-check-url', default=os.environ.get('DNS_UPDATE_IP_CHECK_URL', DEFAULT_IP_CHECK_URL),
+                        help='URL answering with the public IPv4 address as plain text')
+    parser.add_argument('--use-check', action='store_true',
+                        help="Get the address and record state from the service's /check endpoint instead")
+    parser.add_argument('--interval', type=float, default=300, help='Seconds between address checks')
+    parser.add_argument('--heartbeat', type=float, default=12 * 3600,
+                        help='Post an unchanged address after this many seconds')
+    parser.add_argument('--max-backoff', type=float, default=3600, help='Longest wait after failures (seconds)')
+    parser.add_argument('--once', action='store_true', help='Check once and exit (for cron)')
+    parser.add_argument('--verbose', action='store_true', help='Log unchanged checks too')
+    args = parser.parse_args()
+    if not args.url:
+        parser.error('--url (or DNS_UPDATE_URL) is required')
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s %(levelname)s %(message)s')
+    # The password comes from the environment so it does not show up in ps
+    client = UpdateClient(args.url, os.environ.get('DNS_UPDATE_PASSWORD'), state_file=args.state_file,
+                          ip_check_url=args.ip_check_url, heartbeat=args.heartbeat, use_check=args.use_check)
+
+    if args.once:
+        try:
+            client.check()
+        except (RetryableError, UpdateRejected) as e:
+            logger.error(str(e))
+            sys.exit(1)
+        return
+
+    stop_event = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop_event.set())
+    run_daemon(client, args.interval, max_delay=args.max_backoff, stop_event=stop_event)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,23 +9,40 @@ import os
 import sys
 from datetime import datetime
 from collections import Counter
+from compact_log import is_compact_log, read_compact_log
+from log_scan import read_matching, status_prefilter
+from log_dedup import entry_count
 
-def load_logs():
-    """Load logs from the JSON log file."""
+def read_log_file(path, status=None):
+    """
+    Read entries from a JSON (NDJSON) or compact log file.
+    If status is given, only entries with that status are read, and only
+    JSON lines that can contain it are decoded.
+    """
+    if is_compact_log(path):
+        logs = read_compact_log(path)
+        return [log for log in logs if log.get('status') == status] if status else logs
+    if status:
+        return read_matching(path, status_prefilter(status), lambda log: log.get('status') == status)
     logs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_num, line in enumerate(f, 1):
+            try:
+                log_entry = json.loads(line.strip())
+                logs.append(log_entry)
+            except json.JSONDecodeError as e:
+                print(f"⚠️  Invalid JSON on line {line_num}: {e}")
+                continue
+    return logs
+
+def load_logs(status=None):
+    """Load logs (only those with `status` if given) from the log file."""
     log_file = os.environ.get('DNS_LOG_FILE', 'dns_updates.log')
     
     # Try to read from the configured log file
     if os.path.exists(log_file):
         try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
-                    try:
-                        log_entry = json.loads(line.strip())
-                        logs.append(log_entry)
-                    except json.JSONDecodeError as e:
-                        print(f"⚠️  Invalid JSON on line {line_num}: {e}")
-                        continue
+            logs = read_log_file(log_file, status)
             print(f"✅ Loaded {len(logs)} logs from {log_file}")
             return logs
         except Exception as e:
@@ -36,14 +53,7 @@ def load_logs():
         tmp_log_file = '/tmp/dns_updates.log'
         if os.path.exists(tmp_log_file):
             try:
-                with open(tmp_log_file, 'r', encoding='utf-8') as f:
-                    for line_num, line in enumerate(f, 1):
-                        try:
-                            log_entry = json.loads(line.strip())
-                            logs.append(log_entry)
-                        except json.JSONDecodeError as e:
-                            print(f"⚠️  Invalid JSON on line {line_num}: {e}")
-                            continue
+                logs = read_log_file(tmp_log_file, status)
                 print(f"✅ Loaded {len(logs)} logs from {tmp_log_file}")
                 return logs
             except Exception as e:
@@ -59,9 +69,10 @@ def show_statistics(logs):
         print("📊 No logs to analyze")
         return
     
-    total = len(logs)
-    successful = sum(1 for log in logs if log.get('status') == 'success')
-    failed = sum(1 for log in logs if log.get('status') == 'error')
+    # An entry with a repeat count stands for that many requests
+    total = sum(entry_count(log) for log in logs)
+    successful = sum(entry_count(log) for log in logs if log.get('status') == 'success')
+    failed = sum(entry_count(log) for log in logs if log.get('status') == 'error')
     unique_ips = len(set(log.get('ip_address') for log in logs if log.get('ip_address')))
     
     print("📊 DNS Update Statistics")
@@ -72,7 +83,10 @@ def show_statistics(logs):
     print(f"Unique IP addresses: {unique_ips}")
     
     # Top IP addresses
-    ip_counts = Counter(log.get('ip_address') for log in logs if log.get('ip_address'))
+    ip_counts = Counter()
+    for log in logs:
+        if log.get('ip_address'):
+            ip_counts[log['ip_address']] += entry_count(log)
     if ip_counts:
         print(f"\n🏆 Top IP addresses:")
         for ip, count in ip_counts.most_common(5):
@@ -114,6 +128,9 @@ def show_recent_logs(logs, limit=10):
         if log.get('error_message'):
             print(f"     Error: {log['error_message']}")
         
+        if entry_count(log) > 1:
+            print(f"     Repeated: {entry_count(log)} times since {log.get('repeated_since')}")
+        
         if log.get('change_id'):
             print(f"     Change ID: {log['change_id']}")
         
@@ -149,6 +166,8 @@ def show_failed_logs(logs, limit=5):
         print(f"{i}. {ip_address} -> {domain}")
         print(f"   Time: {formatted_time}")
         print(f"   Error: {error_msg}")
+        if entry_count(log) > 1:
+            print(f"   Repeated: {entry_count(log)} times since {log.get('repeated_since')}")
         print()
 
 def main():
@@ -156,10 +175,11 @@ def main():
     print("📊 DNS Update Log Viewer")
     print("=" * 30)
     
-    logs = load_logs()
+    command = sys.argv[1].lower() if len(sys.argv) > 1 else None
+    # Failed updates are a small share of the log, so only those are decoded
+    logs = load_logs('error' if command == 'failed' else None)
     
-    if len(sys.argv) > 1:
-        command = sys.argv[1].lower()
+    if command:
         
         if command == 'stats':
             show_statistics(logs)